@@ -1,26 +1,254 @@
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+import csv
+from datetime import date
+import math
+import sys
+import time
+from typing import Optional, Tuple
+
+import click
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
+from flask import Flask, g, jsonify, make_response, Response, request
+from flask.logging import default_handler
+from sqlalchemy import text
 from werkzeug.exceptions import BadRequest, Unauthorized
 
 from config import ProductionConfig
 from stock_collection.db import db
+from stock_collection.models.holding_model import Holding
+from stock_collection.models.listing_model import Listing
 from stock_collection.models.portfolio_model import PortfolioModel
-from stock_collection.models.stock_model import Stock
+from stock_collection.models.stock_model import configure_lookup_pool
 from stock_collection.models.user_model import Users
+from stock_collection.utils.auth_tokens import token_required, token_signer
+from stock_collection.utils.listings import read_listings
+from stock_collection.utils.logger import configure_logger, log_pipeline
+from stock_collection.utils.market_data_store import market_data_store
+from stock_collection.utils.metrics import instrument_engine, metrics
+from stock_collection.utils.password_hasher import HasherBusyError, password_hasher
+from stock_collection.utils.price_refresher import PriceRefresher
+from stock_collection.utils.provider_client import CircuitBreaker, provider_client
+from stock_collection.utils.quote_cache import quote_cache
+from stock_collection.utils.rate_limiter import request_scheduler
+from stock_collection.utils.readiness import DEGRADED, OK, ReadinessCheck
+from stock_collection.utils.sqlite_profile import enable_sqlite_pragmas
+from stock_collection.utils.symbol_index import symbol_index
+from stock_collection.utils.valuation import previous_closes, value_portfolios
 
 # Load environment variables from .env file
 load_dotenv()
 
 
-def create_app(config_class=ProductionConfig):
+def create_app(config_class=ProductionConfig, start_background_tasks: bool = True):
+    """
+    Creates the Flask app and configures the process-wide caches and clients.
+
+    Args:
+        config_class: The configuration class.
+        start_background_tasks (bool): Whether to start the background price refresher now.
+            Servers that fork workers from a preloaded app pass False and start it after
+            the fork (see gunicorn.conf.py), since threads do not survive a fork.
+    """
     app = Flask(__name__)
     app.config.from_object(config_class)
+    log_pipeline.configure(level=app.config['LOG_LEVEL'], fmt=app.config['LOG_FORMAT'])
+    app.logger.removeHandler(default_handler)
+    configure_logger(app.logger)
 
     db.init_app(app)  # Initialize db with app
     with app.app_context():
+        enable_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
         db.create_all()  # Recreate all tables
+        Users.add_missing_columns()
+
+    quote_cache.configure(max_size=app.config['QUOTE_CACHE_MAX_SIZE'], ttls=app.config['QUOTE_CACHE_TTLS'])
+    market_data_store.configure(app.config['MARKET_DATA_DB_PATH'], pragmas=app.config['SQLITE_PRAGMAS'])
+    provider_client.configure(
+        pool_size=app.config['PROVIDER_POOL_SIZE'],
+        connect_timeout=app.config['PROVIDER_CONNECT_TIMEOUT'],
+        read_timeout=app.config['PROVIDER_READ_TIMEOUT'],
+        max_retries=app.config['PROVIDER_MAX_RETRIES'],
+        backoff_factor=app.config['PROVIDER_BACKOFF_FACTOR'],
+        failure_threshold=app.config['PROVIDER_BREAKER_THRESHOLD'],
+        reset_timeout=app.config['PROVIDER_BREAKER_RESET'],
+        trial_timeout=app.config['PROVIDER_BREAKER_TRIAL_TIMEOUT'],
+    )
+    request_scheduler.configure(
+        per_minute=app.config['PROVIDER_CALLS_PER_MINUTE'],
+        per_day=app.config['PROVIDER_CALLS_PER_DAY'],
+        max_wait=app.config['PROVIDER_MAX_QUEUE_WAIT'],
+    )
+    symbol_index.configure(loader=Listing.symbol_names, ttl=app.config['SYMBOL_INDEX_TTL'])
+    token_signer.configure(secret=app.config['AUTH_SECRET_KEY'], ttl=app.config['AUTH_TOKEN_TTL'])
+    password_hasher.configure(
+        scheme=app.config['PASSWORD_HASH_SCHEME'],
+        pbkdf2_iterations=app.config['PASSWORD_PBKDF2_ITERATIONS'],
+        scrypt_n=app.config['PASSWORD_SCRYPT_N'],
+        scrypt_r=app.config['PASSWORD_SCRYPT_R'],
+        scrypt_p=app.config['PASSWORD_SCRYPT_P'],
+        max_workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_queue=app.config['PASSWORD_HASH_QUEUE'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT'],
+    )
+    metrics.configure(enabled=app.config['METRICS_ENABLED'])
+    if app.config['METRICS_ENABLED']:
+        with app.app_context():
+            instrument_engine(db.engine)
+        metrics.register_cache('quote', quote_cache.stats)
+    with app.app_context():
+        app.logger.info("Symbol index holds %d symbols", len(symbol_index))
+
+    configure_lookup_pool(app.config['LOOKUP_MAX_WORKERS'])
+
+    # Portfolios are loaded per request from the holdings table and share one refresh pool;
+    # the user-less model only serves stock look-ups.
+    refresh_executor = ThreadPoolExecutor(max_workers=app.config['PRICE_REFRESH_MAX_WORKERS'],
+                                          thread_name_prefix='price-refresh')
+    portfolio_model = PortfolioModel(refresh_workers=app.config['PRICE_REFRESH_MAX_WORKERS'],
+                                     refresh_timeout=app.config['PRICE_REFRESH_TIMEOUT'],
+                                     lookup_timeout=app.config['LOOKUP_TIMEOUT'],
+                                     executor=refresh_executor)
+
+    def load_portfolio() -> PortfolioModel:
+        """
+        Loads the portfolio of the user authenticated by the request's bearer token
+        from the holdings table.
+
+        Returns:
+            PortfolioModel: The user's portfolio.
+        """
+        return PortfolioModel(user_id=g.user_id,
+                              refresh_workers=app.config['PRICE_REFRESH_MAX_WORKERS'],
+                              refresh_timeout=app.config['PRICE_REFRESH_TIMEOUT'],
+                              lookup_timeout=app.config['LOOKUP_TIMEOUT'],
+                              executor=refresh_executor)
+
+    def parse_date_range(start: Optional[str], end: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Validates an optional YYYY-MM-DD date range.
+
+        Raises:
+            BadRequest: If a date is malformed or start is after end.
+        """
+        try:
+            parsed = [date.fromisoformat(value) if value else None for value in (start, end)]
+        except (TypeError, ValueError):
+            raise BadRequest("Dates must be strings in YYYY-MM-DD format.")
+        if parsed[0] and parsed[1] and parsed[0] > parsed[1]:
+            raise BadRequest("Start date must not be after end date.")
+        return start or None, end or None
+
+    def is_finite_number(value: object) -> bool:
+        """Returns whether a JSON value is a finite number; booleans, NaN and infinities are not."""
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+    def check_symbol_known(symbol: str) -> None:
+        """
+        Validates a symbol against the in-memory symbol index. Every symbol is accepted
+        until a symbol universe has been imported into the stocks table.
+
+        Raises:
+            BadRequest: If the symbol is not in the symbol universe.
+        """
+        if len(symbol_index) and symbol not in symbol_index:
+            raise BadRequest(f"Stock symbol {symbol} not found.")
+
+    if app.config['PRICE_REFRESHER_ENABLED']:
+        def held_symbols() -> list:
+            with app.app_context():
+                return Holding.held_symbols()
+
+        def store_refreshed_price(symbol: str, price: float) -> None:
+            with app.app_context():
+                Holding.update_prices({symbol: price})
+                Listing.update_prices({symbol: price})
+
+        price_refresher = PriceRefresher(
+            symbols=held_symbols,
+            on_price=store_refreshed_price,
+            interval=app.config['PRICE_REFRESHER_INTERVAL'],
+            jitter=app.config['PRICE_REFRESHER_JITTER'],
+            min_daily_budget=app.config['PRICE_REFRESHER_MIN_BUDGET'],
+        )
+        if start_background_tasks:
+            price_refresher.start()
+            atexit.register(price_refresher.stop)
+        app.extensions['price_refresher'] = price_refresher
+
+    def check_database() -> dict:
+        """Measures a round trip to the app database, pool checkout included."""
+        started = time.perf_counter()
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+        return {'status': OK, 'latency_ms': round((time.perf_counter() - started) * 1000, 2)}
+
+    def check_provider() -> dict:
+        """Reports the circuit breaker; look-ups fall back to stored data while it is not closed."""
+        state = provider_client.breaker.state
+        return {'status': OK if state == CircuitBreaker.CLOSED else DEGRADED, 'circuit': state}
+
+    def check_quota() -> dict:
+        """Reports the Alpha Vantage calls left to this process."""
+        budget = request_scheduler.metrics()
+        return {'status': OK if budget['day_remaining'] > 0 else DEGRADED,
+                'minute_remaining': budget['minute_remaining'],
+                'day_remaining': budget['day_remaining'],
+                'queued': budget['queued']}
+
+    def check_caches() -> dict:
+        """Reports how full the in-memory caches are."""
+        stats = quote_cache.stats()
+        return {'status': OK,
+                'quote_cache_size': stats['size'],
+                'quote_cache_fill': round(stats['size'] / stats['max_size'], 3) if stats['max_size'] else 0.0,
+                'quote_cache_hit_rate': round(stats['hit_rate'], 3),
+                'symbol_index_size': len(symbol_index)}
+
+    readiness = ReadinessCheck({'database': check_database, 'provider': check_provider,
+                                'quota': check_quota, 'caches': check_caches},
+                               ttl=app.config['READINESS_CACHE_TTL'])
+    app.extensions['readiness'] = readiness
+
+    ####################################################
+    #
+    # Metrics
+    #
+    ####################################################
 
-    portfolio_model = PortfolioModel()
+    if app.config['METRICS_ENABLED']:
+        @app.before_request
+        def start_request_timer() -> None:
+            g.request_started = time.perf_counter()
+
+        def record_request(status: int) -> None:
+            """Records the latency of the current request once, labelled by its URL rule."""
+            started = g.pop('request_started', None)
+            if started is not None:
+                route = request.url_rule.rule if request.url_rule else 'unmatched'
+                metrics.observe('http_request_duration_seconds', time.perf_counter() - started,
+                                route=route, method=request.method, status=str(status))
+
+        @app.after_request
+        def stop_request_timer(response: Response) -> Response:
+            record_request(response.status_code)
+            return response
+
+        @app.teardown_request
+        def record_failed_request(error: Optional[BaseException]) -> None:
+            # after_request does not run when a view raises an unhandled exception
+            record_request(500)
+
+        @app.route('/api/metrics', methods=['GET'])
+        def metrics_route() -> Response:
+            """
+            Route exposing request, database, provider and password hashing latencies and
+            cache hit rates in the Prometheus text format. Only registered when METRICS_ENABLED is set.
+
+            Returns:
+                The metrics of this process, as text/plain.
+            """
+            return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
     ####################################################
     #
@@ -39,6 +267,21 @@ def create_app(config_class=ProductionConfig):
         app.logger.info('Health check')
         return make_response(jsonify({'status': 'healthy'}), 200)
 
+    @app.route('/api/ready', methods=['GET'])
+    def readiness_check() -> Response:
+        """
+        Readiness check route reporting the database round trip, the provider circuit breaker,
+        the remaining API quota and the cache fill level. The report is reused for
+        READINESS_CACHE_TTL seconds, so frequent probes add no database load.
+
+        Returns:
+            JSON response with the overall status and each check's result.
+        Raises:
+            503 error if the database cannot be reached.
+        """
+        ready, report = readiness.run()
+        return make_response(jsonify(report), 200 if ready else 503)
+
     ##########################################################
     #
     # User management
@@ -59,6 +302,7 @@ def create_app(config_class=ProductionConfig):
         Raises:
             400 error if input validation fails.
             500 error if there is an issue adding the user to the database.
+            503 error if too many password hashes are in progress.
         """
         app.logger.info('Creating new user')
         try:
@@ -78,6 +322,8 @@ def create_app(config_class=ProductionConfig):
 
             app.logger.info("User added: %s", username)
             return make_response(jsonify({'status': 'user added', 'username': username}), 201)
+        except HasherBusyError as e:
+            return make_response(jsonify({'error': str(e)}), 503)
         except Exception as e:
             app.logger.error("Failed to add user: %s", str(e))
             return make_response(jsonify({'error': str(e)}), 500)
@@ -85,20 +331,22 @@ def create_app(config_class=ProductionConfig):
     @app.route('/api/login', methods=['POST'])
     def login():
         """
-        Route to "log in" a user and load their portfolio.
-        This only securely handles the password.
+        Route to log in a user and issue a signed bearer token. Portfolio and trade
+        routes accept the token in an "Authorization: Bearer <token>" header instead of
+        re-checking the password.
 
         Expected JSON Input:
             - username (str): The username of the user.
             - password (str): The user's password.
 
         Returns:
-            JSON response indicating the success of the login.
+            JSON response with the bearer token and its lifetime in seconds.
 
         Raises:
             400 error if input validation fails.
             401 error if authentication fails (invalid username or password).
             500 error for any unexpected server-side issues.
+            503 error if too many password checks are in progress.
         """
         data = request.get_json()
         if not data or 'username' not in data or 'password' not in data:
@@ -114,15 +362,34 @@ def create_app(config_class=ProductionConfig):
                 app.logger.warning("Login failed for username: %s", username)
                 raise Unauthorized("Invalid username or password.")
 
+            token = token_signer.issue(Users.get_id_by_username(username), username)
             app.logger.info("User %s logged in successfully.", username)
-            return jsonify({"message": f"User {username} logged in successfully."}), 200
+            return jsonify({"message": f"User {username} logged in successfully.", "token": token,
+                            "expires_in": int(token_signer.ttl)}), 200
 
         except Unauthorized as e:
             return jsonify({"error": str(e)}), 401
+        except HasherBusyError as e:
+            return jsonify({"error": str(e)}), 503
         except Exception as e:
             app.logger.error("Error during login for username %s: %s", username, str(e))
             return jsonify({"error": "An unexpected error occurred."}), 500
 
+    @app.route('/api/logout', methods=['POST'])
+    @token_required
+    def logout() -> Response:
+        """
+        Route to revoke the bearer token of the request until it expires.
+
+        Returns:
+            JSON response indicating the success of the logout.
+        Raises:
+            401 error if the bearer token is missing or invalid.
+        """
+        token_signer.revoke(g.token)
+        app.logger.info("User %s logged out.", g.username)
+        return make_response(jsonify({'message': f"User {g.username} logged out."}), 200)
+
     @app.route('/api/update-password', methods=['POST'])
     def update_password():
         """
@@ -140,6 +407,7 @@ def create_app(config_class=ProductionConfig):
             400 error if input validation fails.
             401 error if authentication fails (invalid username).
             500 error for any unexpected server-side issues.
+            503 error if too many password checks are in progress.
         """
         data = request.get_json()
         if not data or 'username' not in data or 'password' not in data or 'new_password' not in data:
@@ -164,6 +432,8 @@ def create_app(config_class=ProductionConfig):
 
         except Unauthorized as e:
             return jsonify({"error": str(e)}), 401
+        except HasherBusyError as e:
+            return jsonify({"error": str(e)}), 503
         except Exception as e:
             app.logger.error("Error during login for username %s: %s", username, str(e))
             return jsonify({"error": "An unexpected error occurred."}), 500
@@ -195,6 +465,7 @@ def create_app(config_class=ProductionConfig):
                 db.drop_all()  # Drop all existing tables
                 app.logger.info("Creating all tables from models.")
                 db.create_all()  # Recreate all tables
+            symbol_index.invalidate()
             app.logger.info("Database initialized successfully.")
             return jsonify({"status": "success", "message": "Database initialized successfully."}), 200
         except Exception as e:
@@ -202,14 +473,41 @@ def create_app(config_class=ProductionConfig):
             return jsonify({"status": "error", "message": "Failed to initialize database."}), 500
         
 
+    @app.route('/api/search-symbols', methods=['GET'])
+    def search_symbols() -> Response:
+        """
+        Route to autocomplete stock symbols from the in-memory symbol index.
+
+        Query Parameters:
+            - q (str): The prefix of the symbol or company name.
+            - limit (int, optional): The maximum number of results (1-50, default 10).
+
+        Returns:
+            JSON response with the matching symbols and company names.
+        Raises:
+            400 error if input validation fails.
+        """
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "Search query is required"}), 400
+        try:
+            limit = int(request.args.get('limit', 10))
+        except ValueError:
+            return jsonify({"error": "Limit must be an integer"}), 400
+        if not 1 <= limit <= 50:
+            return jsonify({"error": "Limit must be between 1 and 50"}), 400
+
+        return jsonify({"status": "success", "results": symbol_index.search(query, limit)}), 200
+
+
     @app.route('/api/look-up-stock', methods=['GET'])
-    def look_up_stock(stock_symbol: str):
+    def look_up_stock() -> Response:
         """
         Route to look up detailed information about a specific stock, including its current market
         price, historical price data, and a brief description of the company.
 
-        Expected JSON Input:
-            - symbol (str): The symbol of the stock to look up.
+        Query Parameters:
+            - stock_symbol (str): The symbol of the stock to look up.
 
         Returns:
             JSON response indicating the success of the stock look-up.
@@ -230,12 +528,14 @@ def create_app(config_class=ProductionConfig):
             return jsonify({"error": stock_data["error"]}), 500
 
         # Return a successful response
+        history = stock_data.get("historical_prices")
         return jsonify({
             "symbol": stock_symbol,
             "current_price": stock_data.get("current_price"),
             "company_name": stock_data.get("company_name"),
             "company_description": stock_data.get("company_description"),
             "market_cap": stock_data.get("market_cap"),
+            "historical_prices": history.to_records() if history is not None else None,
         }), 200
 
     ############################################################
@@ -245,51 +545,205 @@ def create_app(config_class=ProductionConfig):
     ############################################################
 
     @app.route('/api/view-portfolio', methods=['GET'])
+    @token_required
     def view_portfolio() -> Response:
         """
-        Route to get the stocks from the portfolio.
+        Route to get the stocks from a user's portfolio.
+
+        Query Parameters:
+            - refresh (bool, optional): Whether to refresh every price concurrently first.
 
         Returns:
             JSON response with the list of stocks.
         Raises:
+            401 error if the bearer token is missing or invalid.
             500 error if there is an issue retrieving the stocks from the portfolio.
         """
         try:
             app.logger.info("Retrieving all stocks from the portfolio")
 
             # Get all stocks from the portfolio
-            stocks = portfolio_model.view_portfolio()
+            portfolio = load_portfolio()
+            refresh = request.args.get('refresh', 'false').lower() == 'true'
+            stocks = portfolio.view_portfolio(refresh=refresh)
 
             return make_response(jsonify({'status': 'success', 'stocks': stocks}), 200)
 
+        except BadRequest as e:
+            return make_response(jsonify({'error': e.description}), 400)
         except Exception as e:
-            app.logger.error(f"Error retrieving stocks from portfolio: {e}")
+            app.logger.error("Error retrieving stocks from portfolio: %s", e)
             return make_response(jsonify({'error': str(e)}), 500)
 
 
     @app.route('/api/calculate-portfolio-value', methods=['GET'])
+    @token_required
     def calculate_portfolio_value() -> Response:
         """
-        Route to calculate the portfolio value.
+        Route to calculate the value of a user's portfolio.
+
+        Query Parameters:
+            - refresh (bool, optional): Whether to refresh every price concurrently first.
 
         Returns:
             JSON response indicating the total value of the portfolio.
         Raises:
+            401 error if the bearer token is missing or invalid.
             500 error if there is an issue calculating the portfolio.
         """
         try:
             app.logger.info('Calculating portfolio value')
-            portfolio_value = portfolio_model.calculate_portfolio_value()
+            portfolio = load_portfolio()
+            refresh = request.args.get('refresh', 'false').lower() == 'true'
+            portfolio_value = portfolio.calculate_portfolio_value(refresh=refresh)
             return make_response(jsonify({'status': 'success', 'value': portfolio_value}), 200)
+        except BadRequest as e:
+            return make_response(jsonify({'error': e.description}), 400)
+        except Exception as e:
+            app.logger.error("Error calculating portfolio value: %s", e)
+            return make_response(jsonify({'error': str(e)}), 500)
+
+
+    @app.route('/api/refresh-prices', methods=['POST'])
+    @token_required
+    def refresh_prices() -> Response:
+        """
+        Route to fetch the current price of every stock in a user's portfolio concurrently
+        and store it on the holdings.
+
+        Returns:
+            JSON response with the refreshed prices, keyed by stock symbol. Stocks whose price
+            could not be fetched in time are left out and keep their previous price.
+        Raises:
+            401 error if the bearer token is missing or invalid.
+            500 error if there is an issue refreshing the prices.
+        """
+        try:
+            app.logger.info('Refreshing portfolio prices')
+            prices = load_portfolio().refresh_prices()
+            return make_response(jsonify({'status': 'success', 'prices': prices}), 200)
+        except Exception as e:
+            app.logger.error("Error refreshing portfolio prices: %s", e)
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/portfolio-analytics', methods=['GET'])
+    @token_required
+    def portfolio_analytics() -> Response:
+        """
+        Route to value every holding of a user's portfolio at once.
+
+        Query Parameters:
+            - refresh (bool, optional): Whether to refresh every price concurrently first.
+
+        Returns:
+            JSON response with the total value, daily P&L and unrealized gain of the
+            portfolio, and the market value, weight, daily P&L and unrealized gain of each holding.
+        Raises:
+            401 error if the bearer token is missing or invalid.
+            500 error if there is an issue valuing the portfolio.
+        """
+        try:
+            app.logger.info('Valuing portfolio')
+            portfolio = load_portfolio()
+            refresh = request.args.get('refresh', 'false').lower() == 'true'
+            valuation = portfolio.valuation(refresh=refresh)
+            return make_response(jsonify({'status': 'success', **valuation.to_dict()}), 200)
+        except BadRequest as e:
+            return make_response(jsonify({'error': e.description}), 400)
+        except Exception as e:
+            app.logger.error("Error valuing portfolio: %s", e)
+            return make_response(jsonify({'error': str(e)}), 500)
+
+
+    @app.route('/api/portfolio-history', methods=['GET'])
+    @token_required
+    def portfolio_history() -> Response:
+        """
+        Route to get the daily value of a user's current holdings over a date range,
+        computed from locally stored prices only.
+
+        Query Parameters:
+            - start (str, optional): The oldest date to include (YYYY-MM-DD).
+            - end (str, optional): The newest date to include (YYYY-MM-DD).
+
+        Returns:
+            JSON response with the daily values and any symbols with no stored prices.
+        Raises:
+            400 error if input validation fails.
+            401 error if the bearer token is missing or invalid.
+            500 error if there is an issue computing the history.
+        """
+        try:
+            app.logger.info('Computing portfolio history')
+            start, end = parse_date_range(request.args.get('start'), request.args.get('end'))
+            portfolio = load_portfolio()
+            series = portfolio.value_history(start, end)
+            return make_response(jsonify({'status': 'success', 'values': series.to_records(),
+                                          'missing': series.missing}), 200)
+        except BadRequest as e:
+            return make_response(jsonify({'error': e.description}), 400)
+        except Exception as e:
+            app.logger.error("Error computing portfolio history: %s", e)
+            return make_response(jsonify({'error': str(e)}), 500)
+
+
+    @app.route('/api/backtest', methods=['POST'])
+    @token_required
+    def backtest() -> Response:
+        """
+        Route to backtest a buy-and-hold allocation over a date range, computed from
+        locally stored prices only.
+
+        Expected JSON Input:
+            - allocation (dict, optional): The weight of each stock symbol. Defaults to the
+              current weights of the user's portfolio.
+            - start (str, optional): The oldest date to include (YYYY-MM-DD).
+            - end (str, optional): The newest date to include (YYYY-MM-DD).
+            - initial_value (float, optional): The amount invested. Defaults to 10000.
+
+        Returns:
+            JSON response with the daily values, total return, volatility and maximum drawdown.
+        Raises:
+            400 error if input validation fails or a stock has no stored prices.
+            401 error if the bearer token is missing or invalid.
+            500 error if there is an issue running the backtest.
+        """
+        try:
+            app.logger.info('Running backtest')
+            data = request.get_json() or {}
+            start, end = parse_date_range(data.get('start'), data.get('end'))
+
+            allocation = data.get('allocation')
+            if allocation is not None and (not isinstance(allocation, dict) or not all(
+                    is_finite_number(weight) for weight in allocation.values())):
+                raise BadRequest("Allocation must map stock symbols to finite numeric weights.")
+
+            initial_value = data.get('initial_value', 10000.0)
+            if not is_finite_number(initial_value) or initial_value <= 0:
+                raise BadRequest("Initial value must be a positive number.")
+
+            portfolio = load_portfolio() if allocation is None else portfolio_model
+            try:
+                series = portfolio.backtest(allocation, start, end, initial_value)
+            except ValueError as e:
+                raise BadRequest(str(e))
+            if series.missing:
+                raise BadRequest(f"No stored prices for: {', '.join(series.missing)}")
+
+            return make_response(jsonify({'status': 'success', 'values': series.to_records(),
+                                          **series.stats()}), 200)
+        except BadRequest as e:
+            return make_response(jsonify({'error': e.description}), 400)
         except Exception as e:
-            app.logger.error(f"Error calculating portfolio value: {e}")
+            app.logger.error("Error running backtest: %s", e)
             return make_response(jsonify({'error': str(e)}), 500)
 
 
     @app.route('/api/buy-stock', methods=['POST'])
+    @token_required
     def buy_stock() -> Response:
         """
-        Route to buy a new stock to the database.
+        Route to buy a stock into a user's portfolio.
 
         Expected JSON Input:
             - stock_symbol (str): The stock symbol of the company.
@@ -300,6 +754,7 @@ def create_app(config_class=ProductionConfig):
             JSON response indicating the success of the stock purchase.
         Raises:
             400 error if input validation fails.
+            401 error if the bearer token is missing or invalid.
             500 error if there is an issue adding the stock purchase to the database.
         """
         app.logger.info('Buying new stock')
@@ -320,28 +775,35 @@ def create_app(config_class=ProductionConfig):
             
             if not stock_name or not isinstance(stock_name, str):
                 raise BadRequest("Company name is required and should be a string.")
-            
-            # Ensure the stock exists and the operation is possible (mock behavior in this case)
-            stock = Stock.query.filter_by(symbol=stock_symbol).first()
-            if not stock:
-                raise BadRequest(f"Stock symbol {stock_symbol} not found.")
-            
+
+            # Ensure the stock exists, without a database round trip
+            check_symbol_known(stock_symbol)
+
+            portfolio = load_portfolio()
 
             # Call the buy_stock method to update the stock
             app.logger.info('Buying stock: %s, %d', stock_symbol, quantity)
-            updated_quantity = portfolio_model.buy_stock(stock_symbol, stock_name, quantity)
+            updated_quantity = portfolio.buy_stock(stock_symbol, stock_name, quantity)
+
+            # The stock must have a market price to be bought
+            if updated_quantity < 0:
+                raise BadRequest(f"Stock symbol {stock_symbol} not found.")
 
             app.logger.info("Stock purchased: %s, %s, %d", stock_symbol, stock_name, updated_quantity)
             return make_response(jsonify({'status': 'stock purchased', 'company': stock_symbol, 'updated_quantity': updated_quantity}), 201)
+        except BadRequest as e:
+            app.logger.error("Failed to buy stock: %s", e.description)
+            return make_response(jsonify({'error': e.description}), 400)
         except Exception as e:
             app.logger.error("Failed to buy stock: %s", str(e))
             return make_response(jsonify({'error': str(e)}), 500)
 
 
     @app.route('/api/sell-stock', methods=['DELETE'])
+    @token_required
     def sell_stock() -> Response:
         """
-        Route to sell a stock.
+        Route to sell a stock from a user's portfolio.
 
         Expected JSON Input:
             - symbol (str): The symbol of the stock to sell.
@@ -351,6 +813,7 @@ def create_app(config_class=ProductionConfig):
             JSON response indicating success of the selling or error message.
         Raises:
             400 error if input validation fails.
+            401 error if the bearer token is missing or invalid.
             500 error if there is an issue adding the stock selling to the database.
         """
         app.logger.info('Selling stock')
@@ -367,27 +830,163 @@ def create_app(config_class=ProductionConfig):
             
             if not isinstance(quantity, int) or quantity <= 0:
                 raise BadRequest("Quantity must be a positive integer.")
-            
-            # Ensure the stock exists in the portfolio
-            stock = Stock.query.filter_by(symbol=symbol).first()
-            if not stock:
-                raise BadRequest(f"Stock symbol {symbol} not found in portfolio.")
-            
-            # Call the sell_stock method to update the stock
+
+            portfolio = load_portfolio()
+
+            # Call the sell_stock method to update the stock; the holdings table rejects
+            # symbols that are not held and sales larger than the position
             app.logger.info('Selling stock: %s, %d', symbol, quantity)
-            updated_quantity = portfolio_model.sell_stock(symbol, quantity)
+            try:
+                updated_quantity = portfolio.sell_stock(symbol, quantity)
+            except KeyError:
+                raise BadRequest(f"Stock symbol {symbol} not found in portfolio.")
+            except ValueError as e:
+                raise BadRequest(str(e))
 
             app.logger.info("Stock sold: %s, %d", symbol, updated_quantity)
             return make_response(jsonify({'status': 'stock sold', 'company': symbol, 'updated_quantity': updated_quantity}), 201)
+        except BadRequest as e:
+            app.logger.error("Failed to sell stock: %s", e.description)
+            return make_response(jsonify({'error': e.description}), 400)
         except Exception as e:
             app.logger.error("Failed to sell stock: %s", str(e))
             return make_response(jsonify({'error': str(e)}), 500)
 
 
+    @app.route('/api/batch-trade', methods=['POST'])
+    @token_required
+    def batch_trade() -> Response:
+        """
+        Route to execute several buy and sell orders at once, all or nothing.
+
+        Expected JSON Input:
+            - trades (list): Orders applied in sequence, each with:
+                - side (str): "buy" or "sell".
+                - symbol (str): The stock symbol.
+                - name (str, optional): The name of the company, for buys.
+                - quantity (int): The number of shares.
+
+        Returns:
+            JSON response with the quantity held of each traded stock after the batch.
+        Raises:
+            400 error if any order is invalid or cannot be filled; nothing is applied.
+            401 error if the bearer token is missing or invalid.
+            409 error if the holdings changed concurrently; nothing is applied.
+            500 error if there is an issue applying the trades.
+        """
+        app.logger.info('Executing batch trade')
+        try:
+            data = request.get_json() or {}
+            trades = data.get('trades')
+            if not isinstance(trades, list) or not trades:
+                raise BadRequest("Trades must be a non-empty list.")
+            if len(trades) > app.config['BATCH_TRADE_MAX_ORDERS']:
+                raise BadRequest(f"At most {app.config['BATCH_TRADE_MAX_ORDERS']} trades are allowed per batch.")
+
+            # Validate every order before touching prices or holdings
+            orders = []
+            for index, trade in enumerate(trades):
+                if not isinstance(trade, dict):
+                    raise BadRequest(f"Trade {index} must be an object.")
+                side, symbol, quantity = trade.get('side'), trade.get('symbol'), trade.get('quantity')
+                name = trade.get('name') or symbol
+                if side not in ('buy', 'sell'):
+                    raise BadRequest(f"Trade {index}: side must be 'buy' or 'sell'.")
+                if not symbol or not isinstance(symbol, str):
+                    raise BadRequest(f"Trade {index}: stock symbol is required and should be a string.")
+                if not isinstance(quantity, int) or quantity <= 0:
+                    raise BadRequest(f"Trade {index}: quantity must be a positive integer.")
+                if not isinstance(name, str):
+                    raise BadRequest(f"Trade {index}: company name should be a string.")
+                if side == 'buy':
+                    check_symbol_known(symbol)
+                orders.append((side, symbol, name, quantity))
+
+            portfolio = load_portfolio()
+            try:
+                quantities = portfolio.execute_trades(orders)
+            except KeyError as e:
+                raise BadRequest(e.args[0])
+            except ValueError as e:
+                raise BadRequest(str(e))
+            except RuntimeError as e:
+                return make_response(jsonify({'error': str(e)}), 409)
+
+            app.logger.info("Batch of %d trades executed", len(orders))
+            return make_response(jsonify({'status': 'trades executed', 'quantities': quantities}), 201)
+        except BadRequest as e:
+            app.logger.error("Failed to execute batch trade: %s", e.description)
+            return make_response(jsonify({'error': e.description}), 400)
+        except Exception as e:
+            app.logger.error("Failed to execute batch trade: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+
+    ############################################################
+    #
+    # Symbol universe
+    #
+    ############################################################
+
+    @app.cli.command('import-symbols')
+    @click.argument('listing_file', type=click.File('r', encoding='utf-8-sig'))
+    @click.option('--batch-size', default=1000, show_default=True, help='Rows per upsert statement.')
+    def import_symbols_command(listing_file, batch_size: int) -> None:
+        """
+        Bulk-loads a listing CSV (symbol, name, exchange) into the stocks table. Existing
+        symbols are updated in place, so the import can be re-run safely.
+        """
+        try:
+            listings, skipped = read_listings(listing_file)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        total = len(listings)
+        with click.progressbar(length=total, label='Importing symbols', file=sys.stderr) as bar:
+            reported = 0
+
+            def report(processed: int) -> None:
+                nonlocal reported
+                bar.update(processed - reported)
+                reported = processed
+
+            changed = Listing.import_listings(listings, batch_size=batch_size, progress=report)
+
+        click.echo(f"Imported {total} symbols ({changed} inserted or updated, {total - changed} unchanged, "
+                   f"{skipped} rows skipped).")
+
+    ############################################################
+    #
+    # Reporting
+    #
+    ############################################################
+
+    @app.cli.command('value-portfolios')
+    def value_portfolios_command() -> None:
+        """
+        Values every user's portfolio in one pass from stored prices and writes a CSV
+        report (user_id, total_value, daily_pnl, unrealized_gain) to stdout.
+        """
+        positions = Holding.positions()
+        # Holdings of a symbol share the price the refresher last stored for it
+        prices = {symbol: current_price for _, symbol, _, _, current_price in positions}
+        symbols = list(prices)
+        closes = dict(zip(symbols, previous_closes(symbols)))
+        values = value_portfolios([position[:4] for position in positions], prices, closes)
+
+        writer = csv.writer(sys.stdout)
+        writer.writerow(['user_id', 'total_value', 'daily_pnl', 'unrealized_gain'])
+        for user_id in sorted(values):
+            row = values[user_id]
+            writer.writerow([user_id, f"{row['total_value']:.2f}", f"{row['daily_pnl']:.2f}",
+                             f"{row['unrealized_gain']:.2f}"])
+        click.echo(f"Valued {len(values)} portfolios.", err=True)
+
     return app
 
 
 
 if __name__ == '__main__':
+    # Development server only; production runs gunicorn with gunicorn.conf.py and wsgi.py
     app = create_app()
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5000)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import create_app
+from config import ProductionConfig
+from stock_collection.models.holding_model import Holding
+from stock_collection.models.listing_model import Listing
+from stock_collection.utils import async_market_data
+from stock_collection.utils.async_provider_client import async_provider_client
+from stock_collection.utils.auth_tokens import InvalidTokenError, token_signer
+from stock_collection.utils.metrics import metrics
+
+
+Scope = Dict[str, Any]
+Handler = Callable[[Scope], Awaitable[Tuple[int, Dict[str, Any]]]]
+
+
+def create_asgi_app(config_class=ProductionConfig):
+    """
+    Creates the ASGI entry point: the Flask app from create_app, with the routes that
+    mostly wait on the market data provider served natively on the event loop.
+
+    GET /api/look-up-stock and POST /api/refresh-prices fetch through the async
+    provider client, so one process can hold hundreds of lookups in flight instead of
+    one per worker thread. Every other route is handed to the Flask app through
+    asgiref's WSGI adapter, which runs it on a thread. Both modes share the quote
+    cache, persistent store, call budget and circuit breaker.
+
+    Run it with an ASGI server, e.g. ``uvicorn --factory asgi:create_asgi_app``.
+
+    Args:
+        config_class: The configuration passed to create_app.
+
+    Returns:
+        The ASGI application; the Flask app is available as its flask_app attribute.
+    """
+    app = create_app(config_class)
+    async_provider_client.configure(max_connections=app.config['ASYNC_PROVIDER_MAX_CONNECTIONS'])
+    wsgi_app = WsgiToAsgi(app)
+
+    def authenticate(scope: Scope) -> Dict[str, Any]:
+        """
+        Verifies the request's "Authorization: Bearer <token>" header.
+
+        Raises:
+            InvalidTokenError: If the token is missing or invalid.
+        """
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        scheme, _, token = headers.get('authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not token:
+            raise InvalidTokenError("A bearer token is required.")
+        return token_signer.verify(token.strip())
+
+    async def look_up_stock(scope: Scope) -> Tuple[int, Dict[str, Any]]:
+        """Async version of the /api/look-up-stock route."""
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        stock_symbol = query.get('stock_symbol', [''])[0].strip()
+        if not stock_symbol:
+            return 400, {"error": "Stock symbol is required"}
+
+        stock_data = await async_market_data.look_up_stock(stock_symbol, timeout=app.config['LOOKUP_TIMEOUT'])
+        if "error" in stock_data:
+            return 500, {"error": stock_data["error"]}
+
+        history = stock_data.get("historical_prices")
+        return 200, {
+            "symbol": stock_symbol,
+            "current_price": stock_data.get("current_price"),
+            "company_name": stock_data.get("company_name"),
+            "company_description": stock_data.get("company_description"),
+            "market_cap": stock_data.get("market_cap"),
+            "historical_prices": history.to_records() if history is not None else None,
+        }
+
+    async def refresh_prices(scope: Scope) -> Tuple[int, Dict[str, Any]]:
+        """Async version of the /api/refresh-prices route."""
+        try:
+            claims = authenticate(scope)
+        except InvalidTokenError as e:
+            return 401, {'error': str(e)}
+
+        def held_symbols() -> list:
+            with app.app_context():
+                return [holding.symbol for holding in Holding.get_holdings(claims['sub'])]
+
+        def store_prices(prices: Dict[str, float]) -> None:
+            with app.app_context():
+                Holding.update_prices(prices)
+                Listing.update_prices(prices)
+
+        try:
+            # Database calls run on a thread so a slow database does not stall the event loop
+            symbols = await asyncio.to_thread(held_symbols)
+            prices = await async_market_data.refresh_prices(symbols, timeout=app.config['PRICE_REFRESH_TIMEOUT'])
+            await asyncio.to_thread(store_prices, prices)
+            return 200, {'status': 'success', 'prices': prices}
+        except Exception as e:
+            app.logger.error("Error refreshing portfolio prices: %s", e)
+            return 500, {'error': str(e)}
+
+    routes: Dict[Tuple[str, str], Handler] = {
+        ('GET', '/api/look-up-stock'): look_up_stock,
+        ('POST', '/api/refresh-prices'): refresh_prices,
+    }
+
+    async def lifespan(receive: Callable, send: Callable) -> None:
+        """Acknowledges server startup, and closes the provider connections on shutdown."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_provider_client.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def asgi_app(scope: Scope, receive: Callable, send: Callable) -> None:
+        if scope['type'] == 'lifespan':
+            await lifespan(receive, send)
+            return
+
+        handler = routes.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+        if handler is None:
+            await wsgi_app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status, payload = await handler(scope)
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - started,
+                        route=scope['path'], method=scope['method'], status=str(status))
+        body = json.dumps(payload).encode()
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    asgi_app.flask_app = app
+    return asgi_app
@@ -0,0 +1,67 @@
+"""
+Measures password verifications per second at each hashing cost setting, on one
+core and through the bounded worker pool.
+
+Usage:
+    python benchmarks/bench_password_hashing.py [--seconds 2] [--workers N]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stock_collection.utils.password_hasher import PasswordHasher  # noqa: E402
+
+
+SETTINGS = [
+    ('sha256 (legacy)', {}, 'sha256'),
+    ('pbkdf2_sha256 100k', {'pbkdf2_iterations': 100000}, None),
+    ('pbkdf2_sha256 310k', {'pbkdf2_iterations': 310000}, None),
+    ('pbkdf2_sha256 600k', {'pbkdf2_iterations': 600000}, None),
+    ('scrypt n=2^14 r=8 p=1', {'scheme': 'scrypt', 'scrypt_n': 2 ** 14}, None),
+    ('scrypt n=2^15 r=8 p=1', {'scheme': 'scrypt', 'scrypt_n': 2 ** 15}, None),
+]
+
+
+def measure(function, seconds: float) -> float:
+    """Calls function repeatedly for about the given time and returns calls per second."""
+    calls = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        function()
+        calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=2.0, help='Measuring time per setting.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Hashing pool size.')
+    args = parser.parse_args()
+
+    print(f"{'setting':<24}{'ms/login':>10}{'logins/s/core':>15}{f'logins/s ({args.workers} workers)':>28}")
+    for label, options, scheme in SETTINGS:
+        hasher = PasswordHasher(max_workers=args.workers, max_queue=args.workers * 4, timeout=60, **options)
+        scheme = scheme or hasher.current_scheme
+        salt = os.urandom(16).hex()
+        stored = hasher.derive('correct horse battery staple', salt, scheme)
+
+        def login() -> None:
+            hasher.verify('correct horse battery staple', salt, stored, scheme)
+
+        per_core = measure(lambda: hasher.derive('correct horse battery staple', salt, scheme), args.seconds)
+
+        # Keep every worker busy with concurrent "request threads"
+        with ThreadPoolExecutor(max_workers=args.workers) as clients:
+            futures = [clients.submit(measure, login, args.seconds) for _ in range(args.workers)]
+            pooled = sum(future.result() for future in futures)
+
+        print(f"{label:<24}{1000 / per_core:>10.2f}{per_core:>15.1f}{pooled:>28.1f}")
+        hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Measures concurrent read/write throughput of the app database with SQLite's default
+settings and with the tuned profile from config.ProductionConfig (WAL journal,
+synchronous=NORMAL, busy timeout, page cache, mmap and a sized connection pool).
+
+Writer threads buy shares (one transaction each, like the trade routes) while reader
+threads list holdings (like view-portfolio). Each profile runs against a fresh
+database file in a temporary directory.
+
+Usage:
+    python benchmarks/bench_sqlite_profile.py [--seconds 3] [--readers 8] [--writers 4]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app import create_app  # noqa: E402
+from config import ProductionConfig, TestConfig  # noqa: E402
+from stock_collection.db import db  # noqa: E402
+from stock_collection.models.holding_model import Holding  # noqa: E402
+
+
+USERS = 50
+SYMBOLS = ['AAPL', 'MSFT', 'GOOG', 'AMZN', 'TSLA', 'NVDA', 'META', 'IBM']
+
+PROFILES = [
+    ('default', {}, {}),
+    ('tuned', ProductionConfig.SQLITE_PRAGMAS, ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS),
+]
+
+
+def run_profile(directory: str, pragmas: dict, engine_options: dict, args: argparse.Namespace) -> dict:
+    """Runs the mixed workload against one profile and returns operation counts."""
+    class BenchConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'app.db')}"
+        SQLALCHEMY_ENGINE_OPTIONS = engine_options
+        SQLITE_PRAGMAS = pragmas
+        MARKET_DATA_DB_PATH = os.path.join(directory, 'market_data.db')
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        for user_id in range(USERS):
+            Holding.buy(user_id, SYMBOLS[0], SYMBOLS[0], 1, 100.0)
+
+    deadline = time.perf_counter() + args.seconds
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def work(write: bool, seed: int) -> None:
+        done = errors = 0
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                user_id = (seed + done) % USERS
+                try:
+                    if write:
+                        symbol = SYMBOLS[(seed + done) % len(SYMBOLS)]
+                        Holding.buy(user_id, symbol, symbol, 1, 100.0)
+                    else:
+                        Holding.get_holdings(user_id)
+                        db.session.rollback()  # End the read transaction, as a request would
+                    done += 1
+                except OperationalError:  # "database is locked"
+                    db.session.rollback()
+                    errors += 1
+            db.session.remove()
+        with lock:
+            counts['writes' if write else 'reads'] += done
+            counts['errors'] += errors
+
+    with ThreadPoolExecutor(max_workers=args.readers + args.writers) as pool:
+        futures = [pool.submit(work, True, i) for i in range(args.writers)]
+        futures += [pool.submit(work, False, i) for i in range(args.readers)]
+        for future in futures:
+            future.result()
+
+    with app.app_context():
+        db.engine.dispose()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=3.0, help='Measuring time per profile.')
+    parser.add_argument('--readers', type=int, default=8, help='Concurrent reader threads.')
+    parser.add_argument('--writers', type=int, default=4, help='Concurrent writer threads.')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)  # Keep per-trade log lines out of the measurement
+
+    print(f"{'profile':<10}{'reads/s':>12}{'writes/s':>12}{'locked errors':>16}")
+    for label, pragmas, engine_options in PROFILES:
+        with tempfile.TemporaryDirectory() as directory:
+            counts = run_profile(directory, pragmas, engine_options, args)
+        print(f"{label:<10}{counts['reads'] / args.seconds:>12.1f}{counts['writes'] / args.seconds:>12.1f}"
+              f"{counts['errors']:>16}")
+
+
+if __name__ == '__main__':
+    main()
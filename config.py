@@ -8,9 +8,118 @@ class ProductionConfig():
                                            # write-throughs
     basedir = os.path.abspath(os.path.dirname(__file__))
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', f"sqlite:///{os.path.join(basedir, 'db', 'app.db')}")   # Production database URI from environment
+    SQLALCHEMY_ENGINE_OPTIONS = {                                                  # Connection pool of the app database
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),                          # Pooled connections, about WEB_THREADS
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 5)),                     # Extra connections under bursts
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),                  # Seconds to wait for a free connection
+    }
+    SQLITE_PRAGMAS = {                                                             # Set on every SQLite connection
+        'journal_mode': 'WAL',                                                     # Readers no longer block the writer
+        'synchronous': 'NORMAL',                                                   # Safe with WAL; fsync at checkpoints only
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),            # Wait for the write lock instead of failing
+        'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', 65536)),              # Page cache per connection (negative = KiB)
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),        # Bytes of the file read through mmap
+        'temp_store': 'MEMORY',
+    }
+    QUOTE_CACHE_MAX_SIZE = int(os.getenv('QUOTE_CACHE_MAX_SIZE', 1024))  # Max (function, symbol) entries kept in memory
+    QUOTE_CACHE_TTLS = {                                                  # Seconds each Alpha Vantage function stays fresh
+        'TIME_SERIES_INTRADAY': 60,
+        'TIME_SERIES_DAILY': 60 * 60 * 6,
+        'OVERVIEW': 60 * 60 * 24 * 3,
+    }
+    MARKET_DATA_DB_PATH = os.getenv('MARKET_DATA_DB_PATH', os.path.join(basedir, 'db', 'market_data.db'))  # Persistent daily bars and overviews
+    PRICE_REFRESH_MAX_WORKERS = int(os.getenv('PRICE_REFRESH_MAX_WORKERS', 8))      # Concurrent quote requests per refresh
+    PRICE_REFRESH_TIMEOUT = float(os.getenv('PRICE_REFRESH_TIMEOUT', 10))           # Seconds a refresh waits for all quotes
+    LOOKUP_TIMEOUT = float(os.getenv('LOOKUP_TIMEOUT', 10))                         # Overall deadline of a stock look-up
+    LOOKUP_MAX_WORKERS = int(os.getenv('LOOKUP_MAX_WORKERS', 24))                   # Look-up fetch threads, 3 per concurrent look-up
+    PRICE_REFRESHER_ENABLED = os.getenv('PRICE_REFRESHER_ENABLED', 'false').lower() == 'true'  # Background price refresh
+    PRICE_REFRESHER_INTERVAL = float(os.getenv('PRICE_REFRESHER_INTERVAL', 900))    # Seconds between refresh cycles
+    PRICE_REFRESHER_JITTER = float(os.getenv('PRICE_REFRESHER_JITTER', 0.1))        # +/- fraction of the interval
+    PRICE_REFRESHER_MIN_BUDGET = int(os.getenv('PRICE_REFRESHER_MIN_BUDGET', 5))    # Daily calls kept for interactive use
+    PROVIDER_POOL_SIZE = int(os.getenv('PROVIDER_POOL_SIZE', 10))                   # Keep-alive connections to Alpha Vantage
+    PROVIDER_CONNECT_TIMEOUT = float(os.getenv('PROVIDER_CONNECT_TIMEOUT', 3.05))
+    PROVIDER_READ_TIMEOUT = float(os.getenv('PROVIDER_READ_TIMEOUT', 10))
+    PROVIDER_MAX_RETRIES = int(os.getenv('PROVIDER_MAX_RETRIES', 2))                # Retries on 5xx / throttled responses
+    PROVIDER_BACKOFF_FACTOR = float(os.getenv('PROVIDER_BACKOFF_FACTOR', 0.5))      # First backoff delay, doubled per retry
+    PROVIDER_BREAKER_THRESHOLD = int(os.getenv('PROVIDER_BREAKER_THRESHOLD', 5))    # Consecutive failures that open the circuit
+    PROVIDER_BREAKER_RESET = float(os.getenv('PROVIDER_BREAKER_RESET', 30))         # Seconds before a trial call
+    PROVIDER_BREAKER_TRIAL_TIMEOUT = float(os.getenv('PROVIDER_BREAKER_TRIAL_TIMEOUT', 60))  # Seconds before a lost trial call is replaced
+    PROVIDER_CALLS_PER_MINUTE = int(os.getenv('PROVIDER_CALLS_PER_MINUTE', 5))      # Alpha Vantage free tier budget
+    PROVIDER_CALLS_PER_DAY = int(os.getenv('PROVIDER_CALLS_PER_DAY', 25))
+    PROVIDER_MAX_QUEUE_WAIT = float(os.getenv('PROVIDER_MAX_QUEUE_WAIT', 15))       # Seconds a call may wait for budget
+    BATCH_TRADE_MAX_ORDERS = int(os.getenv('BATCH_TRADE_MAX_ORDERS', 100))          # Orders accepted per batch trade
+    SYMBOL_INDEX_TTL = float(os.getenv('SYMBOL_INDEX_TTL', 300))                    # Seconds before the symbol index is reloaded
+    PASSWORD_HASH_SCHEME = os.getenv('PASSWORD_HASH_SCHEME', 'pbkdf2_sha256')       # pbkdf2_sha256 or scrypt
+    PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', 600000))
+    PASSWORD_SCRYPT_N = int(os.getenv('PASSWORD_SCRYPT_N', 2 ** 14))                # scrypt cost (power of two)
+    PASSWORD_SCRYPT_R = int(os.getenv('PASSWORD_SCRYPT_R', 8))
+    PASSWORD_SCRYPT_P = int(os.getenv('PASSWORD_SCRYPT_P', 1))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))  # Concurrent hashes
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 32))                 # Hashes allowed to wait for a worker
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))           # Seconds a request waits for a hash
+    AUTH_SECRET_KEY = os.getenv('AUTH_SECRET_KEY')                                  # Shared by all workers to sign tokens
+    AUTH_TOKEN_TTL = float(os.getenv('AUTH_TOKEN_TTL', 3600))                       # Seconds a bearer token stays valid
+    ASYNC_PROVIDER_MAX_CONNECTIONS = int(os.getenv('ASYNC_PROVIDER_MAX_CONNECTIONS', 100))  # ASGI mode: open provider connections
+    PRICE_REFRESHER_LOCK = os.getenv('PRICE_REFRESHER_LOCK', os.path.join(basedir, 'db', 'price_refresher.lock'))  # Elects the worker running the refresher
+    WEB_WORKER_SLOT_LOCK = os.getenv('WEB_WORKER_SLOT_LOCK', os.path.join(basedir, 'db', 'worker_slot.lock'))  # Numbers workers for the call budget split
+    WEB_BIND = os.getenv('WEB_BIND', '0.0.0.0:5000')                                # gunicorn listen address
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', 2))                                  # Worker processes, each with its own caches
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 8))                                  # Request threads per worker
+    WEB_TIMEOUT = int(os.getenv('WEB_TIMEOUT', 60))                                 # Seconds before a stuck worker is killed
+    WEB_GRACEFUL_TIMEOUT = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))               # Seconds a stopping worker may finish requests
+    WEB_KEEPALIVE = int(os.getenv('WEB_KEEPALIVE', 5))                              # Seconds an idle client connection is kept
+    WEB_MAX_REQUESTS = int(os.getenv('WEB_MAX_REQUESTS', 5000))                     # Requests before a worker is recycled, 0 = never
+    WEB_MAX_REQUESTS_JITTER = int(os.getenv('WEB_MAX_REQUESTS_JITTER', 500))        # Spreads recycling so workers do not restart together
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'      # Latency metrics at /api/metrics
+    READINESS_CACHE_TTL = float(os.getenv('READINESS_CACHE_TTL', 5))               # Seconds a readiness report is reused
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')                                      # DEBUG logs every holding of every request
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')                                    # json (one object per line) or text
 
 class TestConfig():
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # Use in-memory database for tests
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # In-memory SQLite uses a single shared connection
+    SQLITE_PRAGMAS = {'synchronous': 'NORMAL', 'busy_timeout': 1000}
+    QUOTE_CACHE_MAX_SIZE = 128
+    QUOTE_CACHE_TTLS = {}
+    MARKET_DATA_DB_PATH = ':memory:'
+    PRICE_REFRESH_MAX_WORKERS = 4
+    PRICE_REFRESH_TIMEOUT = 1
+    LOOKUP_TIMEOUT = 1
+    LOOKUP_MAX_WORKERS = 6
+    PRICE_REFRESHER_ENABLED = False
+    PRICE_REFRESHER_INTERVAL = 900
+    PRICE_REFRESHER_JITTER = 0.1
+    PRICE_REFRESHER_MIN_BUDGET = 5
+    PROVIDER_POOL_SIZE = 2
+    PROVIDER_CONNECT_TIMEOUT = 1
+    PROVIDER_READ_TIMEOUT = 1
+    PROVIDER_MAX_RETRIES = 0
+    PROVIDER_BACKOFF_FACTOR = 0
+    PROVIDER_BREAKER_THRESHOLD = 5
+    PROVIDER_BREAKER_RESET = 30
+    PROVIDER_BREAKER_TRIAL_TIMEOUT = 60
+    PROVIDER_CALLS_PER_MINUTE = 5
+    PROVIDER_CALLS_PER_DAY = 25
+    PROVIDER_MAX_QUEUE_WAIT = 0
+    BATCH_TRADE_MAX_ORDERS = 10
+    SYMBOL_INDEX_TTL = 300
+    PASSWORD_HASH_SCHEME = 'pbkdf2_sha256'
+    PASSWORD_PBKDF2_ITERATIONS = 1000
+    PASSWORD_SCRYPT_N = 2 ** 10
+    PASSWORD_SCRYPT_R = 8
+    PASSWORD_SCRYPT_P = 1
+    PASSWORD_HASH_WORKERS = 2
+    PASSWORD_HASH_QUEUE = 8
+    PASSWORD_HASH_TIMEOUT = 5
+    AUTH_SECRET_KEY = 'test-secret'
+    AUTH_TOKEN_TTL = 3600
+    ASYNC_PROVIDER_MAX_CONNECTIONS = 10
+    PRICE_REFRESHER_LOCK = None
+    WEB_WORKER_SLOT_LOCK = None
+    METRICS_ENABLED = False
+    READINESS_CACHE_TTL = 5
+    LOG_LEVEL = 'DEBUG'
+    LOG_FORMAT = 'text'
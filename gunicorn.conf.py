@@ -0,0 +1,130 @@
+"""
+Gunicorn settings for the production server:
+
+    gunicorn --config gunicorn.conf.py wsgi:app
+
+Workers are threaded (gthread): requests mostly wait on the market data provider or
+the database, so a few processes with several threads each use memory better than
+many single-threaded processes, and threads of a worker share its quote cache,
+symbol index and call budget. The app is preloaded in the master, so workers fork
+with the code already imported; post_fork then drops the state that must not be
+shared across processes.
+
+Workers are recycled after max_requests (+/- jitter) requests to bound memory
+growth, which also empties their in-process caches. Send SIGHUP to restart the
+workers gracefully with a reloaded configuration; since the app is preloaded, new
+code needs a full restart (or SIGUSR2 followed by SIGQUIT to the old master).
+"""
+import atexit
+import fcntl
+import logging
+import os
+from typing import Any, Optional, TextIO
+
+from config import ProductionConfig
+from stock_collection.db import db
+from stock_collection.utils.market_data_store import market_data_store
+from stock_collection.utils.provider_client import provider_client
+from stock_collection.utils.rate_limiter import request_scheduler
+
+
+bind = ProductionConfig.WEB_BIND
+workers = ProductionConfig.WEB_WORKERS
+threads = ProductionConfig.WEB_THREADS
+worker_class = 'gthread'
+preload_app = True
+timeout = ProductionConfig.WEB_TIMEOUT
+graceful_timeout = ProductionConfig.WEB_GRACEFUL_TIMEOUT
+keepalive = ProductionConfig.WEB_KEEPALIVE
+max_requests = ProductionConfig.WEB_MAX_REQUESTS
+max_requests_jitter = ProductionConfig.WEB_MAX_REQUESTS_JITTER
+# Heartbeat files on tmpfs, so a slow disk cannot make healthy workers look stuck
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+accesslog = '-'
+
+logger = logging.getLogger('gunicorn.error')
+
+# Held open by the worker running the price refresher; the OS releases it when that worker exits
+_refresher_lock: Optional[TextIO] = None
+# Held open by this worker for its share of the call budget; released the same way
+_slot_lock: Optional[TextIO] = None
+
+
+def _try_lock(path: str) -> Optional[TextIO]:
+    """Takes an exclusive lock on a file without blocking, returning the open file or None if it is held."""
+    handle = open(path, 'a')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def _claim_refresher(path: str) -> bool:
+    """Takes the price refresher lock without blocking, returning whether this process got it."""
+    global _refresher_lock
+    _refresher_lock = _try_lock(path)
+    return _refresher_lock is not None
+
+
+def _claim_slot(path: Optional[str], worker_count: int, worker: Any) -> int:
+    """
+    Returns this worker's slot (0 to worker_count - 1), which decides its share of the call budget.
+
+    Each slot is a lock file (path.0, path.1, ...), so a recycled worker's replacement takes
+    over the slot it freed. Without a lock path, or while every slot is still held (e.g. old
+    workers finishing a reload), the slot follows the order in which workers were spawned.
+    """
+    global _slot_lock
+    if path:
+        for slot in range(worker_count):
+            handle = _try_lock(f"{path}.{slot}")
+            if handle is not None:
+                _slot_lock = handle
+                return slot
+    return (worker.age - 1) % worker_count
+
+
+def _budget_share(total: int, worker_count: int, slot: int) -> int:
+    """Splits total calls between the workers so the shares add up to it; the remainder goes to the lowest slots."""
+    return total // worker_count + (1 if slot < total % worker_count else 0)
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    """
+    Prepares a freshly forked worker:
+
+    - Database connections pooled by the master are discarded without closing them,
+      and the market data store and provider session are reopened, so no socket or
+      SQLite handle is shared with another process.
+    - The provider call budget is split between the workers, since each enforces it
+      in memory and together they must stay within the provider's quota. The shares
+      add up to the quota exactly, so with more workers than calls some get none.
+      The daily calls of each slot are counted in the market data store, so a worker
+      replacing a recycled or reloaded one only gets what is left of the slot's share.
+    - The first worker to take the refresher lock runs the background price refresher,
+      so held symbols are refreshed once per deployment rather than once per worker.
+      When that worker is recycled its replacement takes over.
+    """
+    app = worker.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
+    market_data_store.configure(app.config['MARKET_DATA_DB_PATH'])
+    provider_client.configure(pool_size=app.config['PROVIDER_POOL_SIZE'])
+
+    worker_count = max(1, server.cfg.workers)
+    slot = _claim_slot(app.config['WEB_WORKER_SLOT_LOCK'], worker_count, worker)
+    request_scheduler.configure(
+        per_minute=_budget_share(app.config['PROVIDER_CALLS_PER_MINUTE'], worker_count, slot),
+        per_day=_budget_share(app.config['PROVIDER_CALLS_PER_DAY'], worker_count, slot),
+        spent_today=market_data_store.provider_calls(slot),
+    )
+    request_scheduler.record_spend(lambda calls: market_data_store.add_provider_calls(slot, calls))
+
+    price_refresher = app.extensions.get('price_refresher')
+    lock_path = app.config['PRICE_REFRESHER_LOCK']
+    if price_refresher is not None and (not lock_path or _claim_refresher(lock_path)):
+        price_refresher.start()
+        atexit.register(price_refresher.stop)
+        logger.info("Worker %s runs the price refresher", worker.pid)
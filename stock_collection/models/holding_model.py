@@ -0,0 +1,264 @@
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from stock_collection.db import db
+from stock_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class Holding(db.Model):
+    """
+    A user's position in one stock. Each row is keyed by (user_id, symbol), and
+    quantities only ever change through single atomic UPDATE statements so that
+    concurrent trades from several workers cannot lose updates.
+    """
+    __tablename__ = 'holdings'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    symbol = db.Column(db.String(10), primary_key=True)
+    name = db.Column(db.String(80), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    purchase_price = db.Column(db.Float, nullable=False)  # Average cost per share
+    current_price = db.Column(db.Float, nullable=False)   # Latest known market price
+
+    __table_args__ = (
+        db.CheckConstraint('quantity >= 0', name='ck_holdings_quantity'),
+        db.Index('ix_holdings_symbol', 'symbol'),
+    )
+
+    @classmethod
+    def get_holdings(cls, user_id: int) -> List['Holding']:
+        """
+        Retrieve every holding of a user.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            List[Holding]: The user's holdings, ordered by symbol.
+        """
+        return db.session.execute(
+            select(cls).where(cls.user_id == user_id).order_by(cls.symbol)
+        ).scalars().all()
+
+    @classmethod
+    def buy(cls, user_id: int, symbol: str, name: str, quantity: int, price: float) -> int:
+        """
+        Add shares to a user's holding, creating it if needed, in one atomic statement.
+
+        Args:
+            user_id (int): The ID of the user.
+            symbol (str): The stock symbol.
+            name (str): The name of the company.
+            quantity (int): The number of shares bought.
+            price (float): The price paid per share.
+
+        Returns:
+            int: The quantity held after the purchase.
+
+        Raises:
+            ValueError: If the quantity is not positive.
+        """
+        if quantity <= 0:
+            raise ValueError("Quantity must be a positive integer to add or buy stock.")
+
+        for _ in range(2):
+            updated = db.session.execute(
+                update(cls)
+                .where(cls.user_id == user_id, cls.symbol == symbol)
+                .values(
+                    purchase_price=(cls.purchase_price * cls.quantity + price * quantity) / (cls.quantity + quantity),
+                    quantity=cls.quantity + quantity,
+                    current_price=price,
+                )
+                .returning(cls.quantity)
+            ).scalar()
+            if updated is not None:
+                db.session.commit()
+                return updated
+
+            try:
+                db.session.add(cls(user_id=user_id, symbol=symbol, name=name, quantity=quantity,
+                                   purchase_price=price, current_price=price))
+                db.session.commit()
+                return quantity
+            except IntegrityError:
+                # Another worker created the holding first; retry as an update
+                db.session.rollback()
+        raise RuntimeError(f"Could not buy {symbol} for user {user_id}")
+
+    @classmethod
+    def sell(cls, user_id: int, symbol: str, quantity: int) -> int:
+        """
+        Remove shares from a user's holding in one atomic statement, deleting the holding
+        when no shares are left.
+
+        Args:
+            user_id (int): The ID of the user.
+            symbol (str): The stock symbol.
+            quantity (int): The number of shares sold.
+
+        Returns:
+            int: The quantity held after the sale.
+
+        Raises:
+            ValueError: If the quantity is not positive or more than the shares held.
+            KeyError: If the user does not hold the stock.
+        """
+        if quantity <= 0:
+            raise ValueError("Quantity must be a positive integer to sell stock.")
+
+        remaining = db.session.execute(
+            update(cls)
+            .where(cls.user_id == user_id, cls.symbol == symbol, cls.quantity >= quantity)
+            .values(quantity=cls.quantity - quantity)
+            .returning(cls.quantity)
+        ).scalar()
+
+        if remaining is None:
+            db.session.rollback()
+            held = db.session.execute(
+                select(cls.quantity).where(cls.user_id == user_id, cls.symbol == symbol)
+            ).scalar()
+            if held is None:
+                raise KeyError(f"Stock {symbol} is not in the portfolio.")
+            raise ValueError(f"Not enough shares of {symbol} to sell. You have {held} shares.")
+
+        if remaining == 0:
+            db.session.execute(
+                delete(cls).where(cls.user_id == user_id, cls.symbol == symbol, cls.quantity == 0)
+            )
+        db.session.commit()
+        return remaining
+
+    @classmethod
+    def apply_trades(cls, user_id: int, orders: Sequence[Tuple[str, str, str, int]],
+                     prices: Dict[str, float]) -> Dict[str, int]:
+        """
+        Apply a batch of trades to a user's holdings in a single transaction, all or nothing.
+
+        The user's holdings of every traded symbol are read with one IN query and the
+        orders are replayed against them in sequence, so a sale may use shares bought
+        earlier in the same batch. Each symbol is then written once, with a conditional
+        UPDATE that re-checks the quantity it was validated against; if another worker
+        changed a holding in the meantime the whole batch is rolled back.
+
+        Args:
+            user_id (int): The ID of the user.
+            orders (Sequence[Tuple]): (side, symbol, name, quantity) tuples, side being 'buy' or 'sell'.
+            prices (Dict[str, float]): The price of every bought symbol.
+
+        Returns:
+            Dict[str, int]: The quantity held of each traded symbol after the batch.
+
+        Raises:
+            ValueError: If an order is invalid or sells more shares than held at that point.
+            KeyError: If a sale is for a stock that is not held.
+            RuntimeError: If a holding changed concurrently; nothing is applied.
+        """
+        symbols = {symbol for _, symbol, _, _ in orders}
+        held = {
+            holding.symbol: holding
+            for holding in db.session.execute(
+                select(cls).where(cls.user_id == user_id, cls.symbol.in_(symbols))
+            ).scalars()
+        }
+
+        # Replay the orders in memory: symbol -> [name, quantity, total cost]
+        positions = {symbol: [holding.name, holding.quantity, holding.purchase_price * holding.quantity]
+                     for symbol, holding in held.items()}
+        for side, symbol, name, quantity in orders:
+            if quantity <= 0:
+                raise ValueError(f"Quantity must be a positive integer to {side} stock.")
+            position = positions.get(symbol)
+            if side == 'buy':
+                if position is None:
+                    position = positions[symbol] = [name, 0, 0.0]
+                position[1] += quantity
+                position[2] += prices[symbol] * quantity
+            elif side == 'sell':
+                if position is None or position[1] == 0:
+                    raise KeyError(f"Stock {symbol} is not in the portfolio.")
+                if position[1] < quantity:
+                    raise ValueError(f"Not enough shares of {symbol} to sell. You have {position[1]} shares.")
+                position[2] -= position[2] / position[1] * quantity
+                position[1] -= quantity
+            else:
+                raise ValueError(f"Unknown trade side: {side}")
+
+        try:
+            for symbol, (name, quantity, cost) in positions.items():
+                holding = held.get(symbol)
+                if holding is None:
+                    if quantity:
+                        db.session.add(cls(user_id=user_id, symbol=symbol, name=name, quantity=quantity,
+                                           purchase_price=cost / quantity, current_price=prices[symbol]))
+                    continue
+                if quantity == holding.quantity and symbol not in prices:
+                    continue
+
+                guard = (cls.user_id == user_id, cls.symbol == symbol, cls.quantity == holding.quantity)
+                if quantity == 0:
+                    statement = delete(cls).where(*guard)
+                else:
+                    values = {'quantity': quantity, 'purchase_price': cost / quantity}
+                    if symbol in prices:
+                        values['current_price'] = prices[symbol]
+                    statement = update(cls).where(*guard).values(**values)
+                if db.session.execute(statement, execution_options={'synchronize_session': False}).rowcount != 1:
+                    raise RuntimeError(f"Holding of {symbol} changed during the batch; no trades were applied.")
+            db.session.commit()
+        except IntegrityError:
+            # Another worker created one of the new holdings first
+            db.session.rollback()
+            raise RuntimeError("Holdings changed during the batch; no trades were applied.")
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return {symbol: position[1] for symbol, position in positions.items()}
+
+    @classmethod
+    def update_prices(cls, prices: Dict[str, float]) -> None:
+        """
+        Store the latest market price of each symbol on every holding of it, in one batch.
+
+        Args:
+            prices (Dict[str, float]): The prices, keyed by stock symbol.
+        """
+        if not prices:
+            return
+        table = cls.__table__
+        db.session.execute(
+            table.update().where(table.c.symbol == bindparam('b_symbol')).values(current_price=bindparam('b_price')),
+            [{'b_symbol': symbol, 'b_price': price} for symbol, price in prices.items()]
+        )
+        db.session.commit()
+
+    @classmethod
+    def held_symbols(cls) -> List[str]:
+        """
+        Retrieve every symbol held by at least one user.
+
+        Returns:
+            List[str]: The distinct symbols.
+        """
+        return db.session.execute(select(cls.symbol).distinct()).scalars().all()
+
+    @classmethod
+    def positions(cls) -> List[Tuple[int, str, int, float, float]]:
+        """
+        Retrieve every holding of every user as plain rows, for bulk valuation.
+
+        Returns:
+            List[Tuple]: (user_id, symbol, quantity, purchase_price, current_price) rows.
+        """
+        return db.session.execute(
+            select(cls.user_id, cls.symbol, cls.quantity, cls.purchase_price, cls.current_price)
+        ).all()
@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta, timezone
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, event, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from stock_collection.db import db
+from stock_collection.utils.logger import configure_logger
+from stock_collection.utils.symbol_index import symbol_index
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class Listing(db.Model):
+    """
+    A listed stock. Rows of the stocks table form the symbol universe that trades
+    are validated against, with the last stored market price of each symbol.
+    Users' positions live in the holdings table instead.
+    """
+    __tablename__ = 'stocks'
+
+    symbol = db.Column(db.String(10), primary_key=True)
+    name = db.Column(db.String(80), nullable=False)
+    exchange = db.Column(db.String(16))
+    price = db.Column(db.Float)           # Last stored market price, None if never priced
+    last_updated = db.Column(db.DateTime)  # When price was last stored (UTC), None if never
+
+    __table_args__ = (
+        db.Index('ix_stocks_last_updated', 'last_updated', 'symbol'),  # Covers staleness queries
+    )
+
+    @classmethod
+    def symbol_names(cls) -> List[Tuple[str, str]]:
+        """
+        Retrieve every listed stock symbol with its company name, for the symbol index.
+
+        Returns:
+            List[Tuple[str, str]]: (symbol, name) rows.
+        """
+        return db.session.execute(select(cls.symbol, cls.name)).all()
+
+    @classmethod
+    def update_prices(cls, prices: Dict[str, float], at: Optional[datetime] = None) -> None:
+        """
+        Store the latest market price of each listed symbol with the time it was fetched,
+        in one batch. Symbols that are not in the stocks table are ignored.
+
+        Args:
+            prices (Dict[str, float]): The prices, keyed by stock symbol.
+            at (datetime, optional): The fetch time (naive UTC). Defaults to now.
+        """
+        if not prices:
+            return
+        at = at or datetime.now(timezone.utc).replace(tzinfo=None)
+        table = cls.__table__
+        db.session.execute(
+            table.update().where(table.c.symbol == bindparam('b_symbol'))
+            .values(price=bindparam('b_price'), last_updated=at),
+            [{'b_symbol': symbol, 'b_price': price} for symbol, price in prices.items()]
+        )
+        db.session.commit()
+
+    @classmethod
+    def stale_symbols(cls, max_age: float) -> List[str]:
+        """
+        Retrieve the symbols whose price was never stored or is older than max_age.
+
+        The condition is answered by two seeks of the (last_updated, symbol) index; the
+        rows are sorted here, since an ORDER BY would turn the seeks into a full index scan.
+
+        Args:
+            max_age (float): The age in seconds beyond which a price is stale.
+
+        Returns:
+            List[str]: The stale symbols, never-priced first, then oldest first.
+        """
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=max_age)
+        rows = db.session.execute(
+            select(cls.symbol, cls.last_updated).where(or_(cls.last_updated.is_(None), cls.last_updated < cutoff))
+        ).all()
+        rows.sort(key=lambda row: (row.last_updated is not None, row.last_updated or cutoff, row.symbol))
+        return [row.symbol for row in rows]
+
+    @classmethod
+    def import_listings(cls, rows: Iterable[Dict[str, Optional[str]]], batch_size: int = 1000,
+                        progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Upserts listed stocks into the stocks table in batches.
+
+        Each batch is sent as one multi-row INSERT ... ON CONFLICT statement. Existing
+        rows keep their stored price, and are only rewritten when their name or
+        exchange changed, so re-running an import of the same file changes nothing.
+
+        Args:
+            rows (Iterable[Dict]): symbol, name and exchange dictionaries.
+            batch_size (int): The number of rows per statement.
+            progress (Callable, optional): Called with the number of rows processed after each batch.
+
+        Returns:
+            int: The number of rows inserted or updated.
+
+        Raises:
+            ValueError: If the database does not support upserts.
+        """
+        dialects = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+        insert = dialects.get(db.engine.dialect.name)
+        if insert is None:
+            raise ValueError(f"Bulk import is not supported on {db.engine.dialect.name}")
+
+        statement = insert(cls.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=[cls.symbol],
+            set_={'name': statement.excluded.name, 'exchange': statement.excluded.exchange},
+            where=or_(cls.name != statement.excluded.name,
+                      cls.exchange.is_distinct_from(statement.excluded.exchange)),
+        )
+
+        changed = processed = 0
+        batch: List[Dict[str, Any]] = []
+
+        def flush() -> None:
+            nonlocal changed, processed
+            changed += db.session.execute(statement, batch).rowcount
+            processed += len(batch)
+            batch.clear()
+            if progress is not None:
+                progress(processed)
+
+        try:
+            for row in rows:
+                batch.append({'symbol': row['symbol'], 'name': row['name'], 'exchange': row.get('exchange')})
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        # Core statements bypass the session events that track Listing writes
+        symbol_index.invalidate()
+        logger.info("Imported %d listings, %d inserted or updated", processed, changed)
+        return changed
+
+    def __repr__(self) -> str:
+        return (f"Listing(symbol={self.symbol!r}, name={self.name!r}, exchange={self.exchange!r}, "
+                f"price={self.price!r})")
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_listing_writes(session: Session, flush_context: Any) -> None:
+    """Remembers that a transaction wrote the stocks table."""
+    if any(isinstance(obj, Listing) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['stocks_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_symbol_index(session: Session) -> None:
+    """Reloads the symbol index after a committed write to the stocks table."""
+    if session.info.pop('stocks_changed', False):
+        symbol_index.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_listing_writes(session: Session) -> None:
+    session.info.pop('stocks_changed', None)
@@ -1,13 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor, wait
 import logging
-from typing import List, Dict, Any
-import requests
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from stock_collection.models.holding_model import Holding
+from stock_collection.models.listing_model import Listing
 from stock_collection.models.stock_model import Stock
+from stock_collection.utils import market_data
 from stock_collection.utils.logger import configure_logger
-from dotenv import load_dotenv
-import os
-
-# Load environment variables from .env file
-load_dotenv()
+from stock_collection.utils.quote_cache import quote_cache
+from stock_collection.utils.rate_limiter import PRIORITY_BACKGROUND
+from stock_collection.utils.valuation import (
+    PortfolioValuation,
+    ValueSeries,
+    backtest_allocation,
+    portfolio_value_history,
+    previous_closes,
+)
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
@@ -16,107 +23,285 @@ class PortfolioModel:
     """
     A class to manage a portfolio of stocks.
 
+    When created for a user, the portfolio is backed by the user's rows in the holdings
+    table: stock_list is loaded from the database and every trade is applied to it as
+    an atomic SQL update, so any worker can serve any user. Without a user the
+    portfolio lives only in memory.
+
     Attributes:
+        user_id (int, optional): The ID of the user owning the portfolio, or None for an in-memory portfolio.
         stock_list (Dict[Stock]): A dictionary of stocks in the portfolio. (Key: Stock Symbol, Value: Stock Object)
+        cost_basis (Dict[str, float]): The average cost per share of each stock, where known.
+        refresh_workers (int): The maximum number of concurrent price requests when refreshing.
+        refresh_timeout (float): The number of seconds a refresh waits for all prices before giving up.
+        lookup_timeout (float): The number of seconds a stock look-up waits for its fetches.
 
     """
 
-    def __init__(self):
+    def __init__(self, user_id: Optional[int] = None, refresh_workers: int = 8, refresh_timeout: float = 10.0,
+                 lookup_timeout: float = 10.0, executor: Optional[ThreadPoolExecutor] = None):
         """
-        Initializes the PortfolioModel with an empty portfolio.
+        Initializes the PortfolioModel with the user's holdings, or an empty in-memory portfolio.
+
+        Args:
+            user_id (int, optional): The ID of the user whose holdings to load.
+            refresh_workers (int): The maximum number of concurrent price requests when refreshing.
+            refresh_timeout (float): The number of seconds a refresh waits for all prices before giving up.
+            lookup_timeout (float): The number of seconds a stock look-up waits for its fetches.
+            executor (ThreadPoolExecutor, optional): A pool shared between portfolios for price refreshes.
         """
+        self.user_id = user_id
         self.stock_list: Dict[str, Stock] = {} # Key: Stock Symbol, Value: Stock Object
+        self.cost_basis: Dict[str, float] = {}
+        self.refresh_workers = refresh_workers
+        self.refresh_timeout = refresh_timeout
+        self.lookup_timeout = lookup_timeout
+        self._refresh_executor = executor or ThreadPoolExecutor(max_workers=refresh_workers,
+                                                                thread_name_prefix='price-refresh')
+        if user_id is not None:
+            self.load_holdings()
+
+    def load_holdings(self) -> None:
+        """
+        Reloads stock_list from the user's rows in the holdings table.
+        """
+        holdings = Holding.get_holdings(self.user_id)
+        self.stock_list = {
+            holding.symbol: Stock(holding.symbol, holding.name, holding.quantity, holding.current_price)
+            for holding in holdings
+        }
+        self.cost_basis = {holding.symbol: holding.purchase_price for holding in holdings}
 
-    def get_current_price(self) -> float:
+    def get_current_price(self, stock_symbol: str) -> float:
         """
-        Fetches the current stock price from Alpha Vantage API.
+        Fetches the current stock price from Alpha Vantage API, served from the quote cache when fresh.
+
+        Args:
+            stock_symbol (str): The stock symbol of the company.
 
         Returns:
             float: the current price of the stock.
         
         """
-        api_key = os.getenv('ALPHA_VANTAGE_API_KEY')  # Replace with your actual API key
-        url = f'https://www.alphavantage.co/query'
-        params = {
-            'function': 'TIME_SERIES_INTRADAY',
-            'symbol': self.symbol,
-            'interval': '5min',
-            'apikey': api_key
+        return market_data.get_current_price(stock_symbol)
+
+    def get_current_prices(self, stock_symbols: Sequence[str]) -> Dict[str, float]:
+        """
+        Fetches the current prices of several stocks concurrently, waiting at most
+        lookup_timeout seconds in total.
+
+        Args:
+            stock_symbols (Sequence[str]): The stock symbols.
+
+        Returns:
+            Dict[str, float]: The prices that could be fetched, keyed by stock symbol.
+        """
+        futures = {self._refresh_executor.submit(market_data.get_current_price, symbol): symbol
+                   for symbol in set(stock_symbols)}
+        done, not_done = wait(futures, timeout=self.lookup_timeout)
+        for future in not_done:
+            future.cancel()
+
+        prices = {}
+        for future in done:
+            try:
+                price = future.result()
+            except Exception as e:
+                logger.error("Error fetching price for %s: %s", futures[future], e)
+                continue
+            if price > 0:
+                prices[futures[future]] = price
+        return prices
+
+    def look_up_stock(self, stock_symbol: str) -> Dict[str, Any]:
+        """
+        Looks up the current price and company details of a stock, whether or not it is held.
+        Concurrent look-ups of the same symbol share a single set of provider requests.
+
+        Args:
+            stock_symbol (str): The stock symbol of the company.
+
+        Returns:
+            Dict: current_price, company_name, company_description, market_cap and historical_prices
+                (a PriceHistory), or a dictionary with an "error" key if the price could not be fetched. The description
+                and history are None if they missed the look-up deadline.
+        """
+        stock = self.stock_list.get(stock_symbol) or Stock(stock_symbol, stock_symbol, 0, 0.0)
+        details = stock.look_up_stock(timeout=self.lookup_timeout)
+
+        if not details['current_price']:
+            logger.error("Failed to look up stock %s", stock_symbol)
+            return {'error': f"Unable to fetch the current price for {stock_symbol}."}
+
+        # Already cached by the description fetch unless it missed the deadline
+        overview = quote_cache.get_stale('OVERVIEW', stock_symbol) or {}
+        return {
+            'current_price': details['current_price'],
+            'company_name': overview.get('name') or stock.name,
+            'company_description': details['description'],
+            'market_cap': overview.get('market_cap'),
+            'historical_prices': details['historical_prices'],
         }
-        try:
-            response = requests.get(url, params=params)
-            data = response.json()
-
-            # Check if data contains 'Time Series (5min)'
-            if "Time Series (5min)" in data:
-                latest_data = data["Time Series (5min)"]
-                latest_close = list(latest_data.values())[0]["4. close"]
-                return float(latest_close)
-            else:
-                logger.error(f"Error fetching data for {self.symbol}. Response: {data}")
-                return 0.0
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error connecting to API for {self.symbol}: {e}")
-            return 0.0
 
-    
-    def view_portfolio(self) -> None:
+    def refresh_prices(self) -> Dict[str, float]:
         """
-        Displays the user's current stock holdings, including quantity, the current price of
-        each stock, and the total value of each holding, culminating in an overall portfolio
-        value.
+        Fetches the current price of every holding concurrently and updates the holdings in place.
+
+        At most refresh_workers requests are in flight at once, and the refresh gives up on
+        any price that has not arrived within refresh_timeout seconds. The requests are
+        scheduled behind interactive lookups. Holdings whose price could not be fetched
+        keep their previous price.
+
+        Returns:
+            Dict[str, float]: The refreshed prices, keyed by stock symbol.
         """
         if not self.stock_list:
-            logger.info("Portfolio is empty. No stocks to display.")
-            print("Your portfolio is empty.")
-            return
-        
-        total_value = 0.0
-        logger.info("Displaying portfolio details:")
-
-        print("\nPortfolio Details:")
-        print("-------------------------------------------------")
-        for stock_symbol, stock in self.stock_list.items():
-            stock_value = stock.quantity * stock.current_price
-            total_value += stock_value
-
-            logger.debug(f"Stock: {stock.name} ({stock.symbol})")
-            logger.debug(f"Quantity: {stock.quantity}")
-            logger.debug(f"Current Price: ${stock.current_price}")
-            logger.debug(f"Total Value: ${stock_value:.2f}")
-
-            print(f"Stock: {stock.name} ({stock.symbol})")
-            print(f"Quantity: {stock.quantity}")
-            print(f"Current Price: ${stock.current_price}")
-            print(f"Total Value: ${stock_value:.2f}")
-            print("-------------------------------------------------")
-        
-        logger.info(f"Total Portfolio Value: ${total_value:.2f}")
-        print(f"\nTotal Portfolio Value: ${total_value:.2f}")
-        print("-------------------------------------------------")
+            return {}
+
+        futures = {self._refresh_executor.submit(market_data.get_current_price, symbol, PRIORITY_BACKGROUND): symbol
+                   for symbol in self.stock_list}
+        done, not_done = wait(futures, timeout=self.refresh_timeout)
+
+        refreshed = {}
+        for future in done:
+            symbol = futures[future]
+            try:
+                price = future.result()
+            except Exception as e:
+                logger.error("Error refreshing price for %s: %s", symbol, e)
+                continue
+            stock = self.stock_list.get(symbol)
+            if price > 0 and stock is not None:
+                stock.current_price = price
+                refreshed[symbol] = price
+
+        for future in not_done:
+            future.cancel()
+            logger.warning("Timed out refreshing price for %s", futures[future])
+
+        if self.user_id is not None:
+            Holding.update_prices(refreshed)
+            Listing.update_prices(refreshed)
+
+        logger.info("Refreshed %d of %d prices", len(refreshed), len(futures))
+        return refreshed
+
+    def view_portfolio(self, refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Lists the user's current stock holdings, including quantity, the current price of
+        each stock, and the total value of each holding.
+
+        Args:
+            refresh (bool): Whether to refresh every price concurrently before listing.
+
+        Returns:
+            List[Dict[str, Any]]: The symbol, name, quantity, current_price and total_value of each holding.
+        """
+        if refresh:
+            self.refresh_prices()
+
+        stocks = [{
+            'symbol': stock.symbol,
+            'name': stock.name,
+            'quantity': stock.quantity,
+            'current_price': stock.current_price,
+            'total_value': stock.quantity * stock.current_price,
+        } for stock in self.stock_list.values()]
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for stock in stocks:
+                logger.debug("Holding %s (%s): %d shares at $%s, worth $%.2f", stock['name'], stock['symbol'],
+                             stock['quantity'], stock['current_price'], stock['total_value'])
+        logger.info("Listed %d holdings", len(stocks))
+        return stocks
+
+
+    def valuation(self, refresh: bool = False) -> PortfolioValuation:
+        """
+        Values every holding at once: market value, weight, daily P&L against the last
+        stored close, and unrealized gain against the average cost.
 
+        Args:
+            refresh (bool): Whether to refresh every price concurrently before valuing.
 
-    def calculate_portfolio_value(self) -> float:
+        Returns:
+            PortfolioValuation: The per-holding and total analytics.
+        """
+        if refresh:
+            self.refresh_prices()
+
+        stocks = list(self.stock_list.values())
+        symbols = [stock.symbol for stock in stocks]
+        return PortfolioValuation(
+            symbols,
+            (stock.quantity for stock in stocks),
+            (stock.current_price for stock in stocks),
+            cost_basis=(self.cost_basis.get(symbol, float('nan')) for symbol in symbols),
+            previous_close=previous_closes(symbols),
+        )
+
+    def value_history(self, start: Optional[str] = None, end: Optional[str] = None) -> ValueSeries:
+        """
+        Computes the daily value of the current holdings over a date range from locally
+        stored prices only, so no provider calls are made.
+
+        Args:
+            start (str, optional): The oldest date to include (YYYY-MM-DD).
+            end (str, optional): The newest date to include (YYYY-MM-DD).
+
+        Returns:
+            ValueSeries: The daily portfolio value; symbols with no stored prices are listed as missing.
+        """
+        quantities = {symbol: stock.quantity for symbol, stock in self.stock_list.items()}
+        histories = {symbol: market_data.get_cached_stock_history(symbol, start, end) for symbol in quantities}
+        return portfolio_value_history(quantities, histories)
+
+    def backtest(self, allocation: Optional[Dict[str, float]] = None, start: Optional[str] = None,
+                 end: Optional[str] = None, initial_value: float = 10000.0) -> ValueSeries:
+        """
+        Backtests a buy-and-hold allocation over a date range from locally stored prices only.
+
+        Args:
+            allocation (Dict[str, float], optional): The weight of each symbol. Defaults to the
+                current market-value weights of the portfolio.
+            start (str, optional): The oldest date to include (YYYY-MM-DD).
+            end (str, optional): The newest date to include (YYYY-MM-DD).
+            initial_value (float): The amount invested.
+
+        Returns:
+            ValueSeries: The value of the allocation; empty if any symbol has no stored prices.
+
+        Raises:
+            ValueError: If the allocation is empty or its weights are invalid.
+        """
+        if allocation is None:
+            allocation = {symbol: stock.quantity * stock.current_price for symbol, stock in self.stock_list.items()}
+        if not allocation:
+            raise ValueError("Allocation must contain at least one stock.")
+        histories = {symbol: market_data.get_cached_stock_history(symbol, start, end) for symbol in allocation}
+        return backtest_allocation(allocation, histories, initial_value)
+
+    def calculate_portfolio_value(self, refresh: bool = False) -> float:
         """
         Calculates the total value of the user's investment portfolio in real-time, reflecting
         the latest stock prices. This helps users understand the current worth of their 
         investments. 
 
+        Args:
+            refresh (bool): Whether to refresh every price concurrently before valuing.
+
         Returns:
             float: the total value of the portfolio
         """
-        total_value = 0.0
-        logger.info("Calculating total portfolio value:")
+        if refresh:
+            self.refresh_prices()
 
-        for stock_symbol, stock in self.stock_list.items():
-            stock_value = stock.quantity * stock.current_price
-            total_value += stock_value
+        stocks = self.stock_list.values()
+        total_value = PortfolioValuation([stock.symbol for stock in stocks],
+                                         (stock.quantity for stock in stocks),
+                                         (stock.current_price for stock in stocks)).total_value
 
-            logger.debug(f"Stock: {stock.name} ({stock.symbol})")
-            logger.debug(f"  Quantity: {stock.quantity}, Current Price: ${stock.current_price}")
-            logger.debug(f"  Stock Value: ${stock_value:.2f}")
-            
-        logger.info(f"Total Portfolio Value: ${total_value:.2f}")
+        logger.info("Total Portfolio Value: $%.2f over %d holdings", total_value, len(self.stock_list))
         return total_value
 
 
@@ -143,10 +328,13 @@ class PortfolioModel:
         # Check if the stock already exists in the portfolio
         existing_stock = self.stock_list.get(stock_symbol)
 
+        if self.user_id is not None:
+            return self._buy_holding(stock_symbol, stock_name, quantity, existing_stock)
+
         if existing_stock:
             # Stock exists in portfolio, update the quantity
             existing_stock.buy(quantity)
-            logger.info(f"Added {quantity} more shares of {stock_symbol} to portfolio. New quantity: {existing_stock.quantity}")
+            logger.info("Added %d more shares of %s to portfolio. New quantity: %d", quantity, stock_symbol, existing_stock.quantity)
             return existing_stock.quantity
         else:
             # Stock does not exist, create a new stock object and add it
@@ -154,10 +342,11 @@ class PortfolioModel:
             if current_price > 0:
                 new_stock = Stock(symbol=stock_symbol, name=stock_name, quantity=quantity, current_price=current_price)
                 self.stock_list[stock_symbol] = new_stock
-                logger.info(f"Added {quantity} shares of {stock_symbol} to portfolio at price ${current_price}.")
+                self.cost_basis[stock_symbol] = current_price
+                logger.info("Added %d shares of %s to portfolio at price $%s.", quantity, stock_symbol, current_price)
                 return new_stock.quantity
             else:
-                logger.error(f"Failed to retrieve current price for {stock_symbol}, cannot add stock.")
+                logger.error("Failed to retrieve current price for %s, cannot add stock.", stock_symbol)
                 return -1
 
 
@@ -181,15 +370,18 @@ class PortfolioModel:
         if quantity <= 0:
             logger.error("Quantity must be a positive integer to sell stock.")
             raise ValueError("Quantity must be a positive integer to sell stock.")  # Return an invalid quantity to indicate failure
+
+        if self.user_id is not None:
+            return self._sell_holding(stock_symbol, quantity)
         
         stock = self.stock_list.get(stock_symbol)
 
         if not stock:
-            logger.warning(f"Stock {stock_symbol} is not in the portfolio.")
+            logger.warning("Stock %s is not in the portfolio.", stock_symbol)
             raise KeyError (f"Stock {stock_symbol} is not in the portfolio.")
         
         if stock.quantity < quantity:
-            logger.error(f"Not enough shares of {stock_symbol} to sell. You have {stock.quantity} shares.")
+            logger.error("Not enough shares of %s to sell. You have %d shares.", stock_symbol, stock.quantity)
             raise ValueError(f"Not enough shares of {stock_symbol} to sell. You have {stock.quantity} shares.")  
         # Sell the stock
         stock.sell(quantity)
@@ -197,9 +389,110 @@ class PortfolioModel:
         # If the stock quantity becomes 0, remove the stock from the portfolio
         if stock.quantity == 0:
             del self.stock_list[stock_symbol]
-            logger.info(f"Removed {stock_symbol} from portfolio after selling all shares.")
+            self.cost_basis.pop(stock_symbol, None)
+            logger.info("Removed %s from portfolio after selling all shares.", stock_symbol)
         else:
-            logger.info(f"Sold {quantity} shares of {stock_symbol}. Remaining quantity: {stock.quantity}")
+            logger.info("Sold %d shares of %s. Remaining quantity: %d", quantity, stock_symbol, stock.quantity)
 
         # Return the updated quantity of the stock
         return stock.quantity
+
+
+    def execute_trades(self, orders: Sequence[Tuple[str, str, str, int]]) -> Dict[str, int]:
+        """
+        Executes a batch of buy and sell orders, all or nothing.
+
+        The prices of every bought stock are fetched in one concurrent step before
+        anything is applied, and a user's holdings are then updated in a single
+        database transaction.
+
+        Args:
+            orders (Sequence[Tuple]): (side, symbol, name, quantity) tuples, side being 'buy' or 'sell'.
+
+        Returns:
+            Dict[str, int]: The quantity held of each traded symbol after the batch.
+
+        Raises:
+            ValueError: If an order is invalid, a price is unavailable, or a sale exceeds the shares held.
+            KeyError: If a sale is for a stock that is not held.
+        """
+        bought = {symbol for side, symbol, _, _ in orders if side == 'buy'}
+        prices = self.get_current_prices(list(bought))
+        unpriced = sorted(bought - prices.keys())
+        if unpriced:
+            logger.error("Failed to retrieve current prices for %s, cannot execute trades.", unpriced)
+            raise ValueError(f"Failed to retrieve current price for: {', '.join(unpriced)}")
+
+        if self.user_id is not None:
+            quantities = Holding.apply_trades(self.user_id, orders, prices)
+            self.load_holdings()
+        else:
+            # Apply to a copy so that a failing order leaves the portfolio untouched
+            staged = PortfolioModel(lookup_timeout=self.lookup_timeout, executor=self._refresh_executor)
+            staged.stock_list = {symbol: Stock(stock.symbol, stock.name, stock.quantity, stock.current_price)
+                                 for symbol, stock in self.stock_list.items()}
+            staged.cost_basis = dict(self.cost_basis)
+            quantities = {}
+            for side, symbol, name, quantity in orders:
+                if side == 'buy':
+                    quantities[symbol] = staged.buy_stock(symbol, name, quantity)
+                elif side == 'sell':
+                    quantities[symbol] = staged.sell_stock(symbol, quantity)
+                else:
+                    raise ValueError(f"Unknown trade side: {side}")
+            self.stock_list, self.cost_basis = staged.stock_list, staged.cost_basis
+
+        logger.info("Executed %d trades over %d symbols", len(orders), len(quantities))
+        return quantities
+
+    def _buy_holding(self, stock_symbol: str, stock_name: str, quantity: int, existing_stock: Optional[Stock]) -> int:
+        """
+        Applies a purchase to the user's holdings table at the current market price.
+
+        Returns:
+            int: The updated quantity, or -1 if no price is available for a new holding.
+        """
+        current_price = self.get_current_price(stock_symbol)
+        if current_price <= 0:
+            if not existing_stock:
+                logger.error("Failed to retrieve current price for %s, cannot add stock.", stock_symbol)
+                return -1
+            current_price = existing_stock.current_price
+
+        updated_quantity = Holding.buy(self.user_id, stock_symbol, stock_name, quantity, current_price)
+        held = existing_stock.quantity if existing_stock else 0
+        previous_cost = self.cost_basis.get(stock_symbol, current_price)
+        self.cost_basis[stock_symbol] = (previous_cost * held + current_price * quantity) / (held + quantity)
+        self.stock_list[stock_symbol] = Stock(stock_symbol, existing_stock.name if existing_stock else stock_name,
+                                              updated_quantity, current_price)
+        logger.info("Added %d shares of %s to portfolio of user %d. New quantity: %d",
+                    quantity, stock_symbol, self.user_id, updated_quantity)
+        return updated_quantity
+
+    def _sell_holding(self, stock_symbol: str, quantity: int) -> int:
+        """
+        Applies a sale to the user's holdings table.
+
+        Returns:
+            int: The remaining quantity.
+
+        Raises:
+            KeyError: If the stock is not found in portfolio
+            ValueError: If the amount of stock being sold is greater than the amount held
+        """
+        try:
+            remaining = Holding.sell(self.user_id, stock_symbol, quantity)
+        except (KeyError, ValueError) as e:
+            logger.error("Failed to sell %s for user %d: %s", stock_symbol, self.user_id, e)
+            raise
+
+        if remaining == 0:
+            self.stock_list.pop(stock_symbol, None)
+            self.cost_basis.pop(stock_symbol, None)
+            logger.info("Removed %s from portfolio of user %d after selling all shares.", stock_symbol, self.user_id)
+        else:
+            if stock_symbol in self.stock_list:
+                self.stock_list[stock_symbol].quantity = remaining
+            logger.info("Sold %d shares of %s for user %d. Remaining quantity: %d",
+                        quantity, stock_symbol, self.user_id, remaining)
+        return remaining
@@ -1,23 +1,41 @@
-from dataclasses import asdict, dataclass
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
 import logging
-from typing import Any, List, Dict
-import requests
-from dotenv import load_dotenv
-import os
+from typing import Any, Dict, Optional
 
-from stock_collection.db import db
+from stock_collection.utils import market_data
 from stock_collection.utils.logger import configure_logger
-
-# Load environment variables from .env file
-load_dotenv()
+from stock_collection.utils.price_history import PriceHistory
+from stock_collection.utils.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+# Concurrent look-ups of the same symbol share one set of fetches
+lookup_in_flight = SingleFlight()
+
+# Runs the price, description and history fetches of a look-up side by side; sized by create_app
+lookup_executor = ThreadPoolExecutor(max_workers=12, thread_name_prefix='stock-lookup')
+DEFAULT_LOOKUP_TIMEOUT = 10.0
+
+
+def configure_lookup_pool(max_workers: int) -> None:
+    """
+    Replaces the look-up pool with one of max_workers threads. Fetches already
+    running finish on the old pool, whose threads then exit.
+
+    Args:
+        max_workers (int): The number of fetch threads; each look-up takes three.
+    """
+    global lookup_executor
+    previous, lookup_executor = lookup_executor, ThreadPoolExecutor(max_workers=max_workers,
+                                                                     thread_name_prefix='stock-lookup')
+    previous.shutdown(wait=False)
+
 @dataclass
 class Stock:
     """
-    Initializes a stock object.
+    A holding of a stock inside a PortfolioModel. Listed stocks are stored as Listing rows.
 
     Args:
         symbol (str): The stock symbol (e.g., "AAPL").
@@ -25,120 +43,97 @@ class Stock:
         quantity (int): The number of shares the user owns.
         current_price (float): The current market price of the stock.
     """
-    symbol: str = db.Column(db.String(10), primary_key=True)
-    name: str = db.Column(db.String(80), unique=True, nullable=False)
-    quantity: int = db.Column(db.Integer, default=0)
-    current_price: float = db.Column(db.Float, nullable=False)
+    symbol: str
+    name: str
+    quantity: int = 0
+    current_price: float = 0.0
 
 
     def get_current_price(self) -> float:
         """
-        Fetches the current stock price from an external API.
+        Fetches the current stock price from an external API, served from the quote cache when fresh.
 
         Returns:
             float: The current stock price.
         """
-        api_key = os.getenv('ALPHA_VANTAGE_API_KEY')  # Replace with your actual API key
-        url = f'https://www.alphavantage.co/query'
-        params = {
-            'function': 'TIME_SERIES_INTRADAY',
-            'symbol': self.symbol,
-            'interval': '5min',
-            'apikey': api_key
-        }
-        try:
-            response = requests.get(url, params=params)
-            data = response.json()
-
-            # Check if data contains 'Time Series (5min)'
-            if "Time Series (5min)" in data:
-                latest_data = data["Time Series (5min)"]
-                latest_close = list(latest_data.values())[0]["4. close"]
-                return float(latest_close)
-            else:
-                logger.error(f"Error fetching data for {self.symbol}. Response: {data}")
-                return 0.0
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error connecting to API for {self.symbol}: {e}")
-            return 0.0
+        return market_data.get_current_price(self.symbol)
 
-    def look_up_stock(self) -> Dict[str, Any]:
+    def look_up_stock(self, timeout: Optional[float] = DEFAULT_LOOKUP_TIMEOUT) -> Dict[str, Any]:
         """
         Fetches detailed information about the stock: current price, historical data, and company description.
 
+        The three fetches run concurrently, so the look-up takes as long as the slowest one,
+        bounded by timeout. Concurrent look-ups of the same symbol share a single set of fetches.
+
+        Args:
+            timeout (float, optional): The overall deadline in seconds; None waits for every fetch.
+
         Returns:
             Dict: A dictionary containing stock details (e.g., current price, historical data, description).
+                Fetches that failed or missed the deadline are None and listed under 'unavailable'.
         """
-        # First, get the current price
-        current_price = self.get_current_price()
-
-        # Fetch company description and historical data
-        description = self.get_stock_description()
-        historical_prices = self.get_stock_history()
-
-        return {
-            'symbol': self.symbol,
-            'name': self.name,
-            'current_price': current_price,
-            'description': description,
-            'historical_prices': historical_prices
-        }
+        details = lookup_in_flight.do(self.symbol, lambda: self._fetch_stock_details(timeout))
+        return dict(details, name=self.name)
 
-    def get_stock_history(self) -> List[Dict[str, Any]]:
+    def _fetch_stock_details(self, timeout: Optional[float]) -> Dict[str, Any]:
         """
-        Fetches the historical price data of the stock from an external API.
+        Fetches the current price, company description and historical data of the stock concurrently.
+
+        Fetches that miss the deadline keep running in the background and still fill the
+        quote cache for the next look-up.
+
+        Args:
+            timeout (float, optional): The overall deadline in seconds.
 
         Returns:
-            List: A list of historical price data.
+            Dict: A dictionary containing stock details.
         """
-        api_key = os.getenv('ALPHA_VANTAGE_API_KEY')  # Replace with your actual API key
-        url = f'https://www.alphavantage.co/query'
-        params = {
-            'function': 'TIME_SERIES_DAILY',
-            'symbol': self.symbol,
-            'apikey': api_key
+        futures = {
+            'current_price': lookup_executor.submit(self.get_current_price),
+            'description': lookup_executor.submit(self.get_stock_description),
+            'historical_prices': lookup_executor.submit(self.get_stock_history),
         }
-        try:
-            response = requests.get(url, params=params)
-            data = response.json()
-
-            if "Time Series (Daily)" in data:
-                historical_data = data["Time Series (Daily)"]
-                return [{'date': date, 'price': details["4. close"]} for date, details in historical_data.items()]
+        done, _ = wait(futures.values(), timeout=timeout)
+
+        details: Dict[str, Any] = {'symbol': self.symbol, 'name': self.name, 'unavailable': []}
+        for field, future in futures.items():
+            if future in done and future.exception() is None:
+                details[field] = future.result()
+                continue
+            if future in done:
+                logger.error("Error fetching %s for %s: %s", field, self.symbol, future.exception())
             else:
-                logger.error(f"Error fetching historical data for {self.symbol}. Response: {data}")
-                return []
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error connecting to API for {self.symbol}: {e}")
-            return []
+                logger.warning("Timed out fetching %s for %s", field, self.symbol)
+            details[field] = None
+            details['unavailable'].append(field)
+
+        return details
+
+    def get_stock_history(self, start: Optional[str] = None, end: Optional[str] = None,
+                          limit: Optional[int] = None) -> PriceHistory:
+        """
+        Fetches the historical price data of the stock from an external API, served from the
+        quote cache when fresh.
+
+        Args:
+            start (str, optional): The oldest date to include (YYYY-MM-DD).
+            end (str, optional): The newest date to include (YYYY-MM-DD).
+            limit (int, optional): The maximum number of bars, counting back from the newest.
+
+        Returns:
+            PriceHistory: The columnar daily closing prices, oldest first.
+        """
+        return market_data.get_stock_history(self.symbol, start=start, end=end, limit=limit)
 
     def get_stock_description(self) -> str:
         """
-        Fetches a brief description of the company associated with the stock.
+        Fetches a brief description of the company associated with the stock, served from the
+        quote cache when fresh.
 
         Returns:
             str: A brief description of the company.
         """
-        api_key = os.getenv('ALPHA_VANTAGE_API_KEY')  # Replace with your actual API key
-        url = f'https://www.alphavantage.co/query'
-        params = {
-            'function': 'OVERVIEW',
-            'symbol': self.symbol,
-            'apikey': api_key
-        }
-        try:
-            response = requests.get(url, params=params)
-            data = response.json()
-
-            if "Description" in data:
-                return data["Description"]
-            else:
-                logger.error(f"Error fetching description for {self.symbol}. Response: {data}")
-                return "No description available."
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error connecting to API for {self.symbol}: {e}")
-            return "No description available."
-        
+        return market_data.get_stock_description(self.symbol)
 
     def sell(self, quantity: int) -> int:
         """
@@ -171,4 +166,5 @@ class Stock:
         """
         if quantity <= 0:
             raise ValueError("Quantity must be positive.")
-        self.quantity += quantity
\ No newline at end of file
+        self.quantity += quantity
+
@@ -1,11 +1,12 @@
-import hashlib
 import logging
-import os
 
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import DBAPIError, IntegrityError
 
 from stock_collection.db import db
+from stock_collection.models.holding_model import Holding
 from stock_collection.utils.logger import configure_logger
+from stock_collection.utils.password_hasher import LEGACY_SCHEME, password_hasher
 
 
 logger = logging.getLogger(__name__)
@@ -16,24 +17,56 @@ class Users(db.Model):
     __tablename__ = 'users'
 
     id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
+    username = db.Column(db.String(80), nullable=False)
     salt = db.Column(db.String(32), nullable=False)  # 16-byte salt in hex
-    password = db.Column(db.String(64), nullable=False)  # SHA-256 hash in hex
+    password = db.Column(db.String(64), nullable=False)  # 32-byte hash in hex
+    hash_scheme = db.Column(db.String(40), nullable=False, default=LEGACY_SCHEME,
+                            server_default=LEGACY_SCHEME)  # e.g. "pbkdf2_sha256$600000"
+
+    __table_args__ = (
+        # Every lookup is by username. The index keys the rowid (id) already, and on
+        # PostgreSQL it also carries the credentials so a login never reads the table.
+        db.Index('ix_users_username', 'username', unique=True,
+                 postgresql_include=['salt', 'password', 'hash_scheme']),
+    )
 
     @classmethod
-    def _generate_hashed_password(cls, password: str) -> tuple[str, str]:
+    def add_missing_columns(cls) -> None:
+        """
+        Adds the hash_scheme column to a users table created before it existed, since
+        db.create_all() never alters existing tables. Rows that predate the column were
+        hashed with the legacy scheme, which the column default records for them.
         """
-        Generates a salted, hashed password.
+        if cls._has_hash_scheme():
+            return
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(text(f"ALTER TABLE {cls.__tablename__} ADD COLUMN hash_scheme VARCHAR(40) "
+                                        f"NOT NULL DEFAULT '{LEGACY_SCHEME}'"))
+        except DBAPIError:
+            # Another worker may have added the column first
+            if not cls._has_hash_scheme():
+                raise
+            return
+        logger.info("Added the hash_scheme column to the %s table", cls.__tablename__)
+
+    @classmethod
+    def _has_hash_scheme(cls) -> bool:
+        """Returns whether the users table in the database has the hash_scheme column."""
+        return any(column['name'] == 'hash_scheme' for column in inspect(db.engine).get_columns(cls.__tablename__))
+
+    @classmethod
+    def _generate_hashed_password(cls, password: str) -> tuple[str, str, str]:
+        """
+        Generates a salted, hashed password with the configured password hasher.
 
         Args:
             password (str): The password to hash.
 
         Returns:
-            tuple: A tuple containing the salt and hashed password.
+            tuple: A tuple containing the salt, hashed password and hash scheme.
         """
-        salt = os.urandom(16).hex()
-        hashed_password = hashlib.sha256((password + salt).encode()).hexdigest()
-        return salt, hashed_password
+        return password_hasher.hash(password)
 
     @classmethod
     def create_user(cls, username: str, password: str) -> None:
@@ -47,8 +80,8 @@ class Users(db.Model):
         Raises:
             ValueError: If a user with the username already exists.
         """
-        salt, hashed_password = cls._generate_hashed_password(password)
-        new_user = cls(username=username, salt=salt, password=hashed_password)
+        salt, hashed_password, hash_scheme = cls._generate_hashed_password(password)
+        new_user = cls(username=username, salt=salt, password=hashed_password, hash_scheme=hash_scheme)
         try:
             db.session.add(new_user)
             db.session.commit()
@@ -67,6 +100,9 @@ class Users(db.Model):
         """
         Check if a given password matches the stored password for a user.
 
+        A matching password stored with an outdated scheme or cost is rehashed with
+        the current one, so existing rows migrate as their users log in.
+
         Args:
             username (str): The username of the user.
             password (str): The password to check.
@@ -76,18 +112,25 @@ class Users(db.Model):
 
         Raises:
             ValueError: If the user does not exist.
+            HasherBusyError: If too many password checks are in progress.
         """
         user = cls.query.filter_by(username=username).first()
         if not user:
             logger.info("User %s not found", username)
             raise ValueError(f"User {username} not found")
-        hashed_password = hashlib.sha256((password + user.salt).encode()).hexdigest()
-        return hashed_password == user.password
+        if not password_hasher.verify(password, user.salt, user.password, user.hash_scheme):
+            return False
+
+        if password_hasher.needs_rehash(user.hash_scheme):
+            user.salt, user.password, user.hash_scheme = cls._generate_hashed_password(password)
+            db.session.commit()
+            logger.info("Rehashed password of user %s with %s", username, user.hash_scheme)
+        return True
 
     @classmethod
     def delete_user(cls, username: str) -> None:
         """
-        Delete a user from the database.
+        Delete a user and their holdings from the database.
 
         Args:
             username (str): The username of the user to delete.
@@ -99,6 +142,8 @@ class Users(db.Model):
         if not user:
             logger.info("User %s not found", username)
             raise ValueError(f"User {username} not found")
+        # SQLite does not enforce ON DELETE CASCADE unless foreign keys are enabled
+        Holding.query.filter_by(user_id=user.id).delete()
         db.session.delete(user)
         db.session.commit()
         logger.info("User %s deleted successfully", username)
@@ -117,11 +162,11 @@ class Users(db.Model):
         Raises:
             ValueError: If the user does not exist.
         """
-        user = cls.query.filter_by(username=username).first()
-        if not user:
+        user_id = db.session.execute(select(cls.id).where(cls.username == username)).scalar()
+        if user_id is None:
             logger.info("User %s not found", username)
             raise ValueError(f"User {username} not found")
-        return user.id
+        return user_id
 
     @classmethod
     def update_password(cls, username: str, new_password: str) -> None:
@@ -140,8 +185,6 @@ class Users(db.Model):
             logger.info("User %s not found", username)
             raise ValueError(f"User {username} not found")
 
-        salt, hashed_password = cls._generate_hashed_password(new_password)
-        user.salt = salt
-        user.password = hashed_password
+        user.salt, user.password, user.hash_scheme = cls._generate_hashed_password(new_password)
         db.session.commit()
         logger.info("Password updated successfully for user: %s", username)
\ No newline at end of file
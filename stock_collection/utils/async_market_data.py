@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import requests
+
+from stock_collection.utils.async_provider_client import async_provider_client
+from stock_collection.utils.logger import configure_logger
+from stock_collection.utils.market_data import (
+    merge_history,
+    overview_is_fresh,
+    parse_current_price,
+    parse_overview,
+    stored_history,
+)
+from stock_collection.utils.market_data_store import market_data_store
+from stock_collection.utils.price_history import PriceHistory
+from stock_collection.utils.provider_client import DailyLimitError
+from stock_collection.utils.quote_cache import quote_cache
+from stock_collection.utils.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, request_scheduler
+from stock_collection.utils.series_parser import read_daily_bars
+from stock_collection.utils.single_flight import AsyncSingleFlight
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# Concurrent cache misses for the same (function, symbol) on the event loop share one load
+in_flight = AsyncSingleFlight()
+
+
+# The coroutines below mirror market_data for the ASGI entry point. They share its
+# quote cache, persistent store, call budget and circuit breaker, but wait on the
+# provider without holding a thread. Reads and writes of the local store run on a
+# worker thread: a full-history write can take a while, and the store's lock is also
+# taken by the Flask routes, so neither may stall the event loop.
+
+
+async def _cached(function: str, symbol: str, loader: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+    """Returns the cached value for (function, symbol), awaiting a shared load on a miss."""
+    value = quote_cache.get(function, symbol)
+    if value is not None:
+        return value
+
+    async def load() -> Optional[Any]:
+        cached = quote_cache.peek(function, symbol)  # A previous load may have just finished
+        if cached is not None:
+            return cached
+        loaded = await loader()
+        if loaded is not None:
+            quote_cache.set(function, symbol, loaded)
+        return loaded
+
+    return await in_flight.do((function, symbol), load)
+
+
+def _with_key(params: Dict[str, str]) -> Dict[str, str]:
+    return dict(params, apikey=os.getenv('ALPHA_VANTAGE_API_KEY'))
+
+
+async def _send_budgeted(send: Callable[[Callable[[], bool]], Awaitable[Any]], priority: int) -> Any:
+    """
+    Waits for a budget token, then runs a provider call. Like market_data._send_budgeted,
+    each retry takes another token and a daily-limit notice empties the daily budget.
+    """
+    await request_scheduler.acquire_async(priority)
+    try:
+        return await send(lambda: request_scheduler.acquire_retry(priority))
+    except DailyLimitError:
+        request_scheduler.exhaust_daily()
+        raise
+
+
+async def _fetch_current_price(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[float]:
+    """Fetches the latest intraday close for a stock, or None on failure."""
+    try:
+        params = _with_key({'function': 'TIME_SERIES_INTRADAY', 'symbol': symbol, 'interval': '5min'})
+        data = await _send_budgeted(lambda acquire_retry: async_provider_client.get_json(params, acquire_retry),
+                                    priority)
+        return parse_current_price(symbol, data)
+    except requests.exceptions.RequestException as e:
+        logger.error("Error connecting to API for %s: %s", symbol, e)
+    return None
+
+
+async def _fetch_stock_history(symbol: str, outputsize: str, priority: int = PRIORITY_INTERACTIVE,
+                               start: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Fetches the daily closing prices for a stock newer than start, newest first, or None on failure.
+    The response is parsed as it streams in, and the download stops at the first bar older than start.
+    """
+    try:
+        params = _with_key({'function': 'TIME_SERIES_DAILY', 'symbol': symbol, 'outputsize': outputsize})
+        return await _send_budgeted(lambda acquire_retry: async_provider_client.stream(
+            params, lambda chunks: read_daily_bars(chunks, start=start), acquire_retry
+        ), priority)
+    except requests.exceptions.RequestException as e:
+        logger.error("Error fetching historical data for %s: %s", symbol, e)
+    return None
+
+
+async def _fetch_stock_overview(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[Dict[str, Any]]:
+    """Fetches the company overview for a stock, or None on failure."""
+    try:
+        params = _with_key({'function': 'OVERVIEW', 'symbol': symbol})
+        data = await _send_budgeted(lambda acquire_retry: async_provider_client.get_json(params, acquire_retry),
+                                    priority)
+        return parse_overview(symbol, data)
+    except requests.exceptions.RequestException as e:
+        logger.error("Error connecting to API for %s: %s", symbol, e)
+    return None
+
+
+async def _load_stock_history(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[PriceHistory]:
+    """Reads the daily history of a stock through the persistent store, fetching only the missing bars."""
+    stored, latest, outputsize = await asyncio.to_thread(stored_history, symbol)
+    if stored is not None:
+        return stored
+    fetched = await _fetch_stock_history(symbol, outputsize, priority, start=latest)
+    return await asyncio.to_thread(merge_history, symbol, latest, fetched)
+
+
+async def _load_stock_overview(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[Dict[str, Any]]:
+    """Reads the company overview of a stock through the persistent store, fetching it when stale."""
+    stored = await asyncio.to_thread(market_data_store.get_overview, symbol)
+    if overview_is_fresh(stored):
+        return stored
+
+    overview = await _fetch_stock_overview(symbol, priority)
+    if overview is None:
+        return stored
+    await asyncio.to_thread(market_data_store.save_overview, symbol, overview)
+    return overview
+
+
+async def get_current_price(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> float:
+    """
+    Returns the current price of a stock, served from the quote cache when fresh.
+
+    Args:
+        symbol (str): The stock symbol (e.g., "AAPL").
+        priority (int): The scheduling priority of the provider call, if one is needed.
+
+    Returns:
+        float: The current stock price, the last known price if it cannot be fetched,
+            or 0.0 if it has never been fetched.
+    """
+    price = await _cached('TIME_SERIES_INTRADAY', symbol, lambda: _fetch_current_price(symbol, priority))
+    if price is None:
+        price = quote_cache.get_stale('TIME_SERIES_INTRADAY', symbol)
+        if price is not None:
+            logger.warning("Serving stale price for %s", symbol)
+    return price if price is not None else 0.0
+
+
+async def get_stock_history(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> PriceHistory:
+    """
+    Returns the daily price history of a stock, served from the quote cache or the
+    persistent store when fresh.
+
+    Args:
+        symbol (str): The stock symbol.
+        priority (int): The scheduling priority of the provider call, if one is needed.
+
+    Returns:
+        PriceHistory: The columnar history (empty on failure).
+    """
+    history = await _cached('TIME_SERIES_DAILY', symbol, lambda: _load_stock_history(symbol, priority))
+    return history if history is not None else PriceHistory.empty(symbol)
+
+
+async def get_stock_overview(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[Dict[str, Any]]:
+    """
+    Returns the company overview (name, description, market_cap) of a stock, served
+    from the quote cache or the persistent store when fresh.
+
+    Args:
+        symbol (str): The stock symbol.
+        priority (int): The scheduling priority of the provider call, if one is needed.
+
+    Returns:
+        Dict: The company overview, or None if it could not be fetched.
+    """
+    return await _cached('OVERVIEW', symbol, lambda: _load_stock_overview(symbol, priority))
+
+
+async def look_up_stock(symbol: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Looks up the current price, company overview and daily history of a stock
+    concurrently, like PortfolioModel.look_up_stock.
+
+    Fetches that miss the deadline keep running on the event loop and still fill the
+    quote cache for the next look-up.
+
+    Args:
+        symbol (str): The stock symbol.
+        timeout (float, optional): The overall deadline in seconds; None waits for every fetch.
+
+    Returns:
+        Dict: current_price, company_name, company_description, market_cap and historical_prices
+            (a PriceHistory), or a dictionary with an "error" key if the price could not be fetched.
+            The description and history are None if they missed the deadline.
+    """
+    tasks = {
+        'current_price': asyncio.ensure_future(get_current_price(symbol)),
+        'overview': asyncio.ensure_future(get_stock_overview(symbol)),
+        'historical_prices': asyncio.ensure_future(get_stock_history(symbol)),
+    }
+    await asyncio.wait(tasks.values(), timeout=timeout)
+
+    details: Dict[str, Any] = {}
+    for field, task in tasks.items():
+        if task.done() and task.exception() is None:
+            details[field] = task.result()
+            continue
+        if task.done():
+            logger.error("Error fetching %s for %s: %s", field, symbol, task.exception())
+        else:
+            logger.warning("Timed out fetching %s for %s", field, symbol)
+        details[field] = None
+
+    if not details['current_price']:
+        logger.error("Failed to look up stock %s", symbol)
+        return {'error': f"Unable to fetch the current price for {symbol}."}
+
+    overview = details['overview'] or {}
+    description = overview.get('description', "No description available.") if tasks['overview'].done() else None
+    return {
+        'current_price': details['current_price'],
+        'company_name': overview.get('name') or symbol,
+        'company_description': description,
+        'market_cap': overview.get('market_cap'),
+        'historical_prices': details['historical_prices'],
+    }
+
+
+async def refresh_prices(symbols: Iterable[str], timeout: Optional[float] = None) -> Dict[str, float]:
+    """
+    Fetches the current price of every symbol concurrently, scheduled behind interactive
+    look-ups, like PortfolioModel.refresh_prices but without a thread per request.
+
+    Args:
+        symbols (Iterable[str]): The stock symbols.
+        timeout (float, optional): Seconds to wait for all prices; None waits for every fetch.
+
+    Returns:
+        Dict[str, float]: The prices that arrived in time, keyed by stock symbol.
+    """
+    tasks = {symbol: asyncio.ensure_future(get_current_price(symbol, PRIORITY_BACKGROUND)) for symbol in symbols}
+    if not tasks:
+        return {}
+    await asyncio.wait(tasks.values(), timeout=timeout)
+
+    refreshed = {}
+    for symbol, task in tasks.items():
+        if not task.done():
+            logger.warning("Timed out refreshing price for %s", symbol)
+        elif task.exception() is not None:
+            logger.error("Error refreshing price for %s: %s", symbol, task.exception())
+        elif task.result() > 0:
+            refreshed[symbol] = task.result()
+
+    logger.info("Refreshed %d of %d prices", len(refreshed), len(tasks))
+    return refreshed
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+try:
+    import httpx
+except ImportError:  # Only the ASGI entry point needs it
+    httpx = None
+
+from stock_collection.utils.logger import configure_logger
+from stock_collection.utils.metrics import metrics
+from stock_collection.utils.provider_client import (
+    CircuitOpenError,
+    ProviderClient,
+    ProviderError,
+    RateLimitedError,
+    provider_client,
+)
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+T = TypeVar('T')
+
+
+class AsyncProviderClient:
+    """
+    The asyncio HTTP client for the market data provider, used by the ASGI entry point.
+
+    Requests go through one httpx.AsyncClient whose pool keeps up to max_connections
+    connections open, so a single process can have that many provider calls in flight
+    without a thread per call. The base URL, timeouts, retry policy and circuit
+    breaker are read from the synchronous ProviderClient, so both clients back off
+    together and trip the same breaker.
+
+    An httpx client is bound to the event loop it was created on; a new one is created
+    when the client is first used from another loop.
+
+    Attributes:
+        settings (ProviderClient): The client whose settings and breaker are shared.
+        max_connections (int): The maximum number of open connections.
+    """
+
+    def __init__(self, settings: ProviderClient = provider_client, max_connections: int = 100,
+                 transport: Optional[Any] = None, sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        self.settings = settings
+        self.max_connections = max_connections
+        self._transport = transport
+        self._sleep = sleep
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def configure(self, max_connections: Optional[int] = None, transport: Optional[Any] = None) -> None:
+        """
+        Updates the pool size or transport. The current httpx client is dropped and
+        replaced on the next request.
+        """
+        if max_connections is not None:
+            self.max_connections = max_connections
+        if transport is not None:
+            self._transport = transport
+        self._client = None
+
+    def _http(self) -> 'httpx.AsyncClient':
+        """Returns the httpx client of the running event loop, creating it if needed."""
+        if httpx is None:
+            raise RuntimeError("The async entry point requires httpx (pip install httpx)")
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.settings.read_timeout, connect=self.settings.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                transport=self._transport,
+            )
+            self._loop = loop
+        return self._client
+
+    async def get_json(self, params: Dict[str, Any],
+                       acquire_retry: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """
+        Sends a GET request to the provider and returns the decoded JSON body.
+
+        Args:
+            params (Dict[str, Any]): The query parameters.
+            acquire_retry (Callable, optional): Called before each retry; the call gives up
+                instead of retrying when it returns False (e.g. no call budget is left).
+
+        Returns:
+            Dict: The decoded JSON response.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            RateLimitedError: If the provider still throttles the request after every retry.
+            ProviderError: If the provider still fails after every retry.
+        """
+        return await self.get(params, self._decode_json, acquire_retry=acquire_retry)
+
+    async def get(self, params: Dict[str, Any], handle: Callable[['httpx.Response'], T],
+                  acquire_retry: Optional[Callable[[], bool]] = None) -> T:
+        """
+        Sends a GET request to the provider with retries and backoff, and returns
+        handle(response) once the whole body has arrived.
+
+        handle may raise RateLimitedError (e.g. on a throttling notice) to have the
+        request retried.
+
+        Args:
+            params (Dict[str, Any]): The query parameters.
+            handle (Callable): Parses the response.
+            acquire_retry (Callable, optional): As for get_json.
+
+        Returns:
+            The result of handle.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            RateLimitedError: If the provider still throttles the request after every retry.
+            ProviderError: If the provider still fails after every retry.
+        """
+        async def read(response: 'httpx.Response') -> T:
+            await response.aread()
+            return handle(response)
+
+        with metrics.timed('provider_call_duration_seconds', function=str(params.get('function', ''))):
+            return await self._send(params, read, acquire_retry)
+
+    async def stream(self, params: Dict[str, Any], consume: Callable[[AsyncIterator[bytes]], Awaitable[T]],
+                     acquire_retry: Optional[Callable[[], bool]] = None) -> T:
+        """
+        Sends a GET request to the provider and hands the body to consume as it arrives,
+        without reading the whole response into memory first.
+
+        consume may raise RateLimitedError (e.g. on a throttling notice) to have the
+        request retried, so it must not have side effects before it returns.
+
+        Args:
+            params (Dict[str, Any]): The query parameters.
+            consume (Callable): Awaited with an async iterator of raw body chunks; returns the result.
+            acquire_retry (Callable, optional): As for get_json.
+
+        Returns:
+            The result of consume.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            RateLimitedError: If the provider still throttles the request after every retry.
+            ProviderError: If the provider still fails after every retry.
+        """
+        with metrics.timed('provider_call_duration_seconds', function=str(params.get('function', ''))):
+            return await self._send(params, lambda response: consume(response.aiter_bytes()), acquire_retry)
+
+    async def _send(self, params: Dict[str, Any], handle: Callable[['httpx.Response'], Awaitable[T]],
+                    acquire_retry: Optional[Callable[[], bool]] = None) -> T:
+        """Sends the request with retries and backoff, and returns await handle(response) while it streams."""
+        breaker = self.settings.breaker
+        if not breaker.allow_request():
+            raise CircuitOpenError("Market data provider is unavailable (circuit open)")
+
+        client = self._http()
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                async with client.stream('GET', self.settings.base_url, params=params) as response:
+                    if response.status_code == 429 or response.status_code >= 500:
+                        retry_after = response.headers.get('Retry-After')
+                        error = RateLimitedError if response.status_code == 429 else ProviderError
+                        raise error(f"Provider returned HTTP {response.status_code}")
+                    response.raise_for_status()
+                    result = await handle(response)
+                breaker.record_success()
+                return result
+            except (ProviderError, httpx.TransportError) as e:
+                if not self.settings._may_retry(e, attempt, acquire_retry):
+                    breaker.record_failure()
+                    if isinstance(e, ProviderError):
+                        raise
+                    raise ProviderError(str(e)) from e
+                delay = self.settings._backoff(attempt, retry_after)
+                logger.warning("Provider call failed (%s), retrying in %.2fs", e, delay)
+                await self._sleep(delay)
+                attempt += 1
+            except (httpx.HTTPError, ValueError) as e:
+                # 4xx responses and undecodable bodies are not worth retrying
+                breaker.record_failure()
+                raise ProviderError(str(e)) from e
+            except Exception:
+                # Parse errors still end the call, e.g. a half-open trial
+                breaker.record_failure()
+                raise
+            except BaseException:
+                # Cancelled or exiting: free the trial without counting it against the provider
+                breaker.release_trial()
+                raise
+
+    @staticmethod
+    def _decode_json(response: 'httpx.Response') -> Dict[str, Any]:
+        """Decodes a JSON body, raising RateLimitedError if it is a throttling notice."""
+        data = response.json()
+        ProviderClient.raise_if_throttled(data)
+        return data
+
+    async def aclose(self) -> None:
+        """Closes every pooled connection of the current httpx client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# The process-wide async client, configured by create_asgi_app
+async_provider_client = AsyncProviderClient()
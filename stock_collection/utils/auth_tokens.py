@@ -0,0 +1,154 @@
+import base64
+from functools import wraps
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from flask import g, jsonify, make_response, request
+
+from stock_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class InvalidTokenError(Exception):
+    """Raised when a bearer token is malformed, forged, expired or revoked."""
+
+
+def _encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class TokenSigner:
+    """
+    Issues and verifies stateless bearer tokens signed with HMAC-SHA256.
+
+    A token is "<payload>.<signature>", both base64url-encoded, where the payload is a
+    JSON object holding the user ID (sub), username (usr), expiry (exp) and a random
+    token ID (jti). Verifying a token needs no database access: only the signature, the
+    expiry and an in-memory revocation set are checked. Revoked token IDs are kept
+    until the token would have expired anyway.
+
+    Every worker must share the same secret for tokens to be accepted across workers;
+    the revocation set is per process.
+
+    Attributes:
+        ttl (float): The lifetime of issued tokens in seconds.
+    """
+
+    def __init__(self, secret: Optional[bytes] = None, ttl: float = 3600.0, clock: Callable[[], float] = time.time):
+        self._secret = secret or os.urandom(32)
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._revoked: Dict[str, float] = {}  # Token ID -> expiry
+
+    def configure(self, secret: Optional[str], ttl: float) -> None:
+        """
+        Sets the signing secret and token lifetime. Tokens issued with a previous secret
+        stop verifying.
+
+        Args:
+            secret (str, optional): The shared secret; a random per-process secret is used if empty.
+            ttl (float): The lifetime of issued tokens in seconds.
+        """
+        if not secret:
+            logger.warning("No AUTH_SECRET_KEY set; tokens are only valid in this process")
+        self._secret = secret.encode() if secret else os.urandom(32)
+        self.ttl = ttl
+        with self._lock:
+            self._revoked.clear()
+
+    def _sign(self, payload: str) -> str:
+        return _encode(hmac.new(self._secret, payload.encode(), hashlib.sha256).digest())
+
+    def issue(self, user_id: int, username: str) -> str:
+        """
+        Issues a token for a user.
+
+        Args:
+            user_id (int): The ID of the user.
+            username (str): The username of the user.
+
+        Returns:
+            str: The signed bearer token.
+        """
+        claims = {'sub': user_id, 'usr': username, 'exp': int(self._clock() + self.ttl), 'jti': _encode(os.urandom(12))}
+        payload = _encode(json.dumps(claims, separators=(',', ':')).encode())
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Checks the signature, expiry and revocation of a token.
+
+        Args:
+            token (str): The bearer token.
+
+        Returns:
+            Dict[str, Any]: The claims: sub (user ID), usr (username), exp and jti.
+
+        Raises:
+            InvalidTokenError: If the token is malformed, forged, expired or revoked.
+        """
+        payload, _, signature = token.partition('.')
+        # Compared as bytes: compare_digest rejects str arguments with non-ASCII characters
+        if not payload or not signature or not hmac.compare_digest(signature.encode(), self._sign(payload).encode()):
+            raise InvalidTokenError("Invalid token.")
+        try:
+            claims = json.loads(_decode(payload))
+        except ValueError:
+            raise InvalidTokenError("Invalid token.")
+        if claims['exp'] <= self._clock():
+            raise InvalidTokenError("Token has expired.")
+        if claims['jti'] in self._revoked:
+            raise InvalidTokenError("Token has been revoked.")
+        return claims
+
+    def revoke(self, claims: Dict[str, Any]) -> None:
+        """
+        Revokes a verified token until it expires, and forgets expired revocations.
+
+        Args:
+            claims (Dict[str, Any]): The claims returned by verify().
+        """
+        now = self._clock()
+        with self._lock:
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            self._revoked[claims['jti']] = claims['exp']
+
+
+# The process-wide signer, configured by create_app
+token_signer = TokenSigner()
+
+
+def token_required(view: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorates a route so that it requires a valid "Authorization: Bearer <token>" header.
+
+    The token's claims are stored in g.token, and the user in g.user_id and g.username;
+    a missing or invalid token gets a 401 response.
+    """
+    @wraps(view)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not token:
+            return make_response(jsonify({'error': 'A bearer token is required.'}), 401)
+        try:
+            claims = token_signer.verify(token.strip())
+        except InvalidTokenError as e:
+            return make_response(jsonify({'error': str(e)}), 401)
+        g.token, g.user_id, g.username = claims, claims['sub'], claims['usr']
+        return view(*args, **kwargs)
+
+    return wrapper
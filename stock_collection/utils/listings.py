@@ -0,0 +1,59 @@
+import csv
+import logging
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from stock_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Accepted header names of each column, lower-cased (e.g. NASDAQ Trader and exchange listing files)
+COLUMN_ALIASES = {
+    'symbol': ('symbol', 'ticker', 'act symbol'),
+    'name': ('name', 'security name', 'company name'),
+    'exchange': ('exchange', 'listing exchange'),
+}
+MAX_SYMBOL_LENGTH = 10
+MAX_NAME_LENGTH = 80
+
+
+def read_listings(file: TextIO) -> Tuple[List[Dict[str, Optional[str]]], int]:
+    """
+    Reads a listing CSV with symbol, name and (optionally) exchange columns.
+
+    Symbols are upper-cased, names are truncated to fit the stocks table, and a
+    symbol listed twice keeps its last row. Rows without a usable symbol or name
+    are skipped.
+
+    Args:
+        file (TextIO): The open CSV file, with a header row.
+
+    Returns:
+        Tuple[List[Dict], int]: The symbol, name and exchange rows, and the number of rows skipped.
+
+    Raises:
+        ValueError: If the header has no symbol or name column.
+    """
+    reader = csv.DictReader(file)
+    headers = {header.strip().lower(): header for header in reader.fieldnames or []}
+    columns = {field: next((headers[alias] for alias in aliases if alias in headers), None)
+               for field, aliases in COLUMN_ALIASES.items()}
+    if columns['symbol'] is None or columns['name'] is None:
+        raise ValueError("Listing file must have symbol and name columns.")
+
+    listings: Dict[str, Dict[str, Optional[str]]] = {}
+    skipped = 0
+    for row in reader:
+        symbol = (row.get(columns['symbol']) or '').strip().upper()
+        name = (row.get(columns['name']) or '').strip()
+        exchange = ((row.get(columns['exchange']) or '').strip() or None) if columns['exchange'] else None
+        if not symbol or len(symbol) > MAX_SYMBOL_LENGTH or not name:
+            skipped += 1
+            continue
+        listings[symbol] = {'symbol': symbol, 'name': name[:MAX_NAME_LENGTH], 'exchange': exchange}
+
+    if skipped:
+        logger.warning("Skipped %d listing rows without a valid symbol or name", skipped)
+    return list(listings.values()), skipped
@@ -1,26 +1,143 @@
+import atexit
+import copy
+from datetime import datetime, timezone
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
+from typing import Any, Dict, List, Optional, TextIO, Union
 
-from flask import current_app, has_request_context
 
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
-def configure_logger(logger):
-    logger.setLevel(logging.DEBUG)  # Set the desired logging level here
+# Attributes every LogRecord has; anything else was passed through extra= and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
 
-    # Create a console handler that logs to stderr
-    handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.DEBUG)
 
-    # Create a formatter with a timestamp
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+class JsonFormatter(logging.Formatter):
+    """Formats each record as a single-line JSON object, including any fields passed through extra=."""
 
-    # Add the formatter to the handler
-    handler.setFormatter(formatter)
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
 
-    # Add the handler to the logger
-    logger.addHandler(handler)
 
-    if has_request_context():
-        app_logger = current_app.logger
-        for handler in app_logger.handlers:
-            logger.addHandler(handler)
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records for the listener thread. Only the message arguments are merged here,
+    since they may change once the call returns; formatting is left to the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks hold on to frames, so render them before the record outlives the call
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LogPipeline:
+    """
+    Routes the records of every configured logger through one queue to a listener thread,
+    which formats them and writes them out, so request threads never block on the stream.
+
+    Each logger gets the shared queue handler once, however often it is configured, and
+    its level is set so that disabled levels are skipped before a record is created.
+    After a fork (e.g. gunicorn workers of a preloaded app) the child gets a new queue and
+    listener, since the parent's listener thread does not survive the fork.
+
+    Attributes:
+        level (int): The level of every configured logger.
+        fmt (str): "json" for one JSON object per line, or "text".
+    """
+
+    def __init__(self, level: Union[int, str] = logging.INFO, fmt: str = 'json', stream: Optional[TextIO] = None):
+        self._lock = threading.Lock()
+        self._loggers: List[logging.Logger] = []
+        self._handler = _RecordQueueHandler(queue.SimpleQueue())
+        self._output = logging.StreamHandler(stream or sys.stderr)
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self.level = logging.INFO
+        self.fmt = fmt
+        self.configure(level, fmt)
+
+    def configure(self, level: Optional[Union[int, str]] = None, fmt: Optional[str] = None) -> None:
+        """
+        Updates the level of every configured logger and the output format.
+
+        Args:
+            level (int | str, optional): A logging level or its name, e.g. "INFO".
+            fmt (str, optional): "json" or "text".
+
+        Raises:
+            ValueError: If the level or format is unknown.
+        """
+        with self._lock:
+            if level is not None:
+                resolved = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+                if not isinstance(resolved, int):
+                    raise ValueError(f"Unknown log level: {level}")
+                self.level = resolved
+                for logger in self._loggers:
+                    logger.setLevel(resolved)
+            if fmt is not None:
+                if fmt not in ('json', 'text'):
+                    raise ValueError(f"Unknown log format: {fmt}")
+                self.fmt = fmt
+                self._output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    def attach(self, logger: logging.Logger) -> None:
+        """Sets the logger's level and sends its records through the queue, starting the listener if needed."""
+        with self._lock:
+            logger.setLevel(self.level)
+            if self._handler not in logger.handlers:
+                logger.addHandler(self._handler)
+                self._loggers.append(logger)
+            if self._listener is None:
+                self._listener = logging.handlers.QueueListener(self._handler.queue, self._output)
+                self._listener.start()
+
+    def stop(self) -> None:
+        """Writes out every queued record and stops the listener thread."""
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+
+    def _after_fork(self) -> None:
+        """Gives a forked child its own queue and listener; records queued before the fork belong to the parent."""
+        self._lock = threading.Lock()
+        self._handler.queue = queue.SimpleQueue()
+        running, self._listener = self._listener is not None, None
+        if running:
+            self._listener = logging.handlers.QueueListener(self._handler.queue, self._output)
+            self._listener.start()
+
+
+# The process-wide pipeline; create_app sets its level and format from LOG_LEVEL and LOG_FORMAT
+log_pipeline = LogPipeline(level=os.getenv('LOG_LEVEL', 'INFO'), fmt=os.getenv('LOG_FORMAT', 'json'))
+atexit.register(log_pipeline.stop)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=log_pipeline._after_fork)
+
+
+def configure_logger(logger: logging.Logger) -> None:
+    """Sends the logger's records through the shared logging queue at the configured level."""
+    log_pipeline.attach(logger)
@@ -0,0 +1,362 @@
+from datetime import date, timedelta
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+
+from stock_collection.utils.logger import configure_logger
+from stock_collection.utils.market_data_store import market_data_store
+from stock_collection.utils.price_history import PriceHistory
+from stock_collection.utils.provider_client import DailyLimitError, provider_client
+from stock_collection.utils.quote_cache import quote_cache
+from stock_collection.utils.series_parser import iter_daily_bars
+from stock_collection.utils.rate_limiter import PRIORITY_INTERACTIVE, request_scheduler
+from stock_collection.utils.single_flight import SingleFlight
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# outputsize=compact returns the latest 100 trading days, roughly 140 calendar days
+COMPACT_WINDOW_DAYS = 140
+
+# Concurrent cache misses for the same (function, symbol) share one load
+in_flight = SingleFlight()
+
+
+def _cached(function: str, symbol: str, loader: Callable[[], Optional[Any]]) -> Optional[Any]:
+    """
+    Returns the cached value for (function, symbol), loading it on a miss.
+
+    Concurrent misses for the same key share a single load, which fills the
+    cache before the waiting callers are released. The load checks the cache
+    again first, since a previous load may have finished between this caller's
+    miss and its turn to lead. Failed loads (None) are not cached.
+    """
+    value = quote_cache.get(function, symbol)
+    if value is not None:
+        return value
+
+    def load() -> Optional[Any]:
+        cached = quote_cache.peek(function, symbol)
+        if cached is not None:
+            return cached
+        loaded = loader()
+        if loaded is not None:
+            quote_cache.set(function, symbol, loaded)
+        return loaded
+
+    return in_flight.do((function, symbol), load)
+
+
+def _send_budgeted(send: Callable[[Callable[[], bool]], Any], priority: int) -> Any:
+    """
+    Runs a provider call that already holds a budget token. Each retry takes another token,
+    since the provider counts every request, and a daily-limit notice empties the daily
+    budget so no further calls are sent for nothing.
+
+    Args:
+        send (Callable): Makes the call, given the callback that takes a token for a retry.
+        priority (int): The scheduling priority of the call.
+    """
+    try:
+        return send(lambda: request_scheduler.acquire_retry(priority))
+    except DailyLimitError:
+        request_scheduler.exhaust_daily()
+        raise
+
+
+def _query(params: Dict[str, str], priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+    """
+    Sends a query to the Alpha Vantage API through the request scheduler and the
+    shared provider client. Identical queued queries are sent once.
+
+    Args:
+        params (Dict[str, str]): The query parameters, without the API key.
+        priority (int): The scheduling priority of the call.
+
+    Returns:
+        Dict: The decoded JSON response.
+
+    Raises:
+        QuotaExhaustedError: If the call budget does not allow the call.
+        ProviderError: If the provider is unavailable, throttling, or failing.
+    """
+    key = tuple(sorted(params.items()))
+    params = dict(params, apikey=os.getenv('ALPHA_VANTAGE_API_KEY'))
+    return request_scheduler.run(
+        key, lambda: _send_budgeted(lambda acquire_retry: provider_client.get_json(params, acquire_retry), priority),
+        priority)
+
+
+def _stream_query(params: Dict[str, str], consume: Callable[[Iterator[bytes]], Any],
+                  priority: int = PRIORITY_INTERACTIVE) -> Any:
+    """
+    Like _query, but hands the response body to consume as it arrives instead of
+    decoding it in one piece.
+
+    Args:
+        params (Dict[str, str]): The query parameters, without the API key.
+        consume (Callable): Receives an iterator of raw body chunks and returns the result.
+        priority (int): The scheduling priority of the call.
+
+    Returns:
+        The result of consume.
+    """
+    key = tuple(sorted(params.items()))
+    params = dict(params, apikey=os.getenv('ALPHA_VANTAGE_API_KEY'))
+    return request_scheduler.run(
+        key,
+        lambda: _send_budgeted(lambda acquire_retry: provider_client.stream(params, consume, acquire_retry=acquire_retry),
+                               priority),
+        priority)
+
+
+def parse_current_price(symbol: str, data: Dict[str, Any]) -> Optional[float]:
+    """Returns the latest close of an intraday response, or None if it has no series."""
+    # Check if data contains 'Time Series (5min)'
+    if "Time Series (5min)" in data:
+        latest_data = data["Time Series (5min)"]
+        latest_close = list(latest_data.values())[0]["4. close"]
+        return float(latest_close)
+    logger.error("Error fetching data for %s. Response: %s", symbol, data)
+    return None
+
+
+def parse_overview(symbol: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Returns the name, description and market cap of an overview response, or None if it has none."""
+    if "Description" in data:
+        return {
+            'name': data.get("Name"),
+            'description': data["Description"],
+            'market_cap': data.get("MarketCapitalization"),
+        }
+    logger.error("Error fetching description for %s. Response: %s", symbol, data)
+    return None
+
+
+def _fetch_current_price(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[float]:
+    """Fetches the latest intraday close for a stock, or None on failure."""
+    try:
+        data = _query({'function': 'TIME_SERIES_INTRADAY', 'symbol': symbol, 'interval': '5min'}, priority)
+        return parse_current_price(symbol, data)
+    except requests.exceptions.RequestException as e:
+        logger.error("Error connecting to API for %s: %s", symbol, e)
+    return None
+
+
+def _fetch_stock_history(symbol: str, outputsize: str = 'compact', priority: int = PRIORITY_INTERACTIVE,
+                         start: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Fetches the daily closing prices for a stock, newest first, or None on failure.
+
+    The response is parsed as it streams in, and the download stops at the first
+    bar older than start.
+    """
+    try:
+        return _stream_query(
+            {'function': 'TIME_SERIES_DAILY', 'symbol': symbol, 'outputsize': outputsize},
+            lambda chunks: list(iter_daily_bars(chunks, start=start)),
+            priority
+        )
+    except requests.exceptions.RequestException as e:
+        logger.error("Error fetching historical data for %s: %s", symbol, e)
+    return None
+
+
+def _fetch_stock_overview(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[Dict[str, Any]]:
+    """Fetches the company overview for a stock, or None on failure."""
+    try:
+        data = _query({'function': 'OVERVIEW', 'symbol': symbol}, priority)
+        return parse_overview(symbol, data)
+    except requests.exceptions.RequestException as e:
+        logger.error("Error connecting to API for %s: %s", symbol, e)
+    return None
+
+
+def _load_stock_history(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[PriceHistory]:
+    """
+    Reads the daily history of a stock through the persistent store.
+
+    Stored bars are returned as-is if they were refreshed within the TTL. Otherwise
+    only the bars newer than the latest stored one are fetched and appended; the
+    full series is downloaded only when nothing (or nothing recent) is stored. If
+    the fetch fails the stored bars are returned.
+    """
+    stored, latest, outputsize = stored_history(symbol)
+    if stored is not None:
+        return stored
+    return merge_history(symbol, latest, _fetch_stock_history(symbol, outputsize, priority, start=latest))
+
+
+def stored_history(symbol: str) -> Tuple[Optional[PriceHistory], Optional[str], str]:
+    """
+    Returns the stored history of a stock if it was refreshed within the TTL (else None),
+    the date of the latest stored bar, and the outputsize needed to fetch the bars after it.
+    """
+    refreshed_at = market_data_store.history_refreshed_at(symbol)
+    if refreshed_at is not None and time.time() - refreshed_at < quote_cache.ttl_for('TIME_SERIES_DAILY'):
+        return market_data_store.get_daily_history(symbol), None, 'compact'
+
+    latest = market_data_store.latest_bar_date(symbol)
+    compact_cutoff = (date.today() - timedelta(days=COMPACT_WINDOW_DAYS)).isoformat()
+    return None, latest, 'compact' if latest and latest >= compact_cutoff else 'full'
+
+
+def merge_history(symbol: str, latest: Optional[str],
+                   fetched: Optional[List[Dict[str, Any]]]) -> Optional[PriceHistory]:
+    """
+    Appends the fetched bars newer than latest to the store and returns the stored
+    history, or None if nothing is stored and the fetch failed.
+    """
+    if fetched is not None:
+        market_data_store.append_daily_bars(symbol, [bar for bar in fetched if not latest or bar['date'] > latest])
+
+    history = market_data_store.get_daily_history(symbol)
+    return history if len(history) or fetched is not None else None
+
+
+def _load_stock_overview(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[Dict[str, Any]]:
+    """
+    Reads the company overview of a stock through the persistent store, fetching and
+    writing it back when it is missing or older than the TTL. If the fetch fails the
+    stored overview is returned.
+    """
+    stored = market_data_store.get_overview(symbol)
+    if overview_is_fresh(stored):
+        return stored
+
+    overview = _fetch_stock_overview(symbol, priority)
+    if overview is None:
+        return stored
+    market_data_store.save_overview(symbol, overview)
+    return overview
+
+
+def overview_is_fresh(stored: Optional[Dict[str, Any]]) -> bool:
+    """Returns whether a stored overview was fetched within the TTL."""
+    return bool(stored) and time.time() - stored['fetched_at'] < quote_cache.ttl_for('OVERVIEW')
+
+
+def get_current_price(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> float:
+    """
+    Returns the current price of a stock, served from the quote cache when fresh.
+
+    If the price cannot be fetched (e.g. the call budget is spent), the last known
+    price is returned instead, however old.
+
+    Args:
+        symbol (str): The stock symbol (e.g., "AAPL").
+        priority (int): The scheduling priority of the provider call, if one is needed.
+
+    Returns:
+        float: The current stock price, or 0.0 if it has never been fetched.
+    """
+    price = _cached('TIME_SERIES_INTRADAY', symbol, lambda: _fetch_current_price(symbol, priority))
+    if price is None:
+        price = quote_cache.get_stale('TIME_SERIES_INTRADAY', symbol)
+        if price is not None:
+            logger.warning("Serving stale price for %s", symbol)
+    return price if price is not None else 0.0
+
+
+def refresh_current_price(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[float]:
+    """
+    Fetches the current price of a stock even if a fresh one is cached, and caches it.
+    Joins an in-flight fetch of the same symbol instead of starting another.
+
+    Args:
+        symbol (str): The stock symbol.
+        priority (int): The scheduling priority of the provider call.
+
+    Returns:
+        float: The current stock price, or None if it could not be fetched.
+    """
+    def load() -> Optional[float]:
+        price = _fetch_current_price(symbol, priority)
+        if price is not None:
+            quote_cache.set('TIME_SERIES_INTRADAY', symbol, price)
+        return price
+
+    return in_flight.do(('TIME_SERIES_INTRADAY', symbol), load)
+
+
+def get_stock_history(symbol: str, start: Optional[str] = None, end: Optional[str] = None,
+                      limit: Optional[int] = None, priority: int = PRIORITY_INTERACTIVE) -> PriceHistory:
+    """
+    Returns the daily price history of a stock, served from the quote cache or the
+    persistent store when fresh.
+
+    Args:
+        symbol (str): The stock symbol.
+        start (str, optional): The oldest date to include (YYYY-MM-DD), inclusive.
+        end (str, optional): The newest date to include (YYYY-MM-DD), inclusive.
+        limit (int, optional): The maximum number of bars, counting back from the newest.
+        priority (int): The scheduling priority of the provider call, if one is needed.
+
+    Returns:
+        PriceHistory: The columnar history (empty on failure). Filtered results are views
+            on the cached arrays and must not be modified in place.
+    """
+    history = _cached('TIME_SERIES_DAILY', symbol, lambda: _load_stock_history(symbol, priority))
+    if history is None:
+        return PriceHistory.empty(symbol)
+    if start is not None or end is not None:
+        history = history.between(start, end)
+    if limit is not None:
+        history = history.tail(limit)
+    return history
+
+
+def get_cached_stock_history(symbol: str, start: Optional[str] = None, end: Optional[str] = None) -> PriceHistory:
+    """
+    Returns the daily price history of a stock from the quote cache or the persistent
+    store only, however old, without ever calling the provider.
+
+    Args:
+        symbol (str): The stock symbol.
+        start (str, optional): The oldest date to include (YYYY-MM-DD), inclusive.
+        end (str, optional): The newest date to include (YYYY-MM-DD), inclusive.
+
+    Returns:
+        PriceHistory: The locally available history (empty if nothing is stored).
+    """
+    history = quote_cache.get_stale('TIME_SERIES_DAILY', symbol)
+    if history is None:
+        history = market_data_store.get_daily_history(symbol)
+    return history.between(start, end)
+
+
+def get_stock_overview(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[Dict[str, Any]]:
+    """
+    Returns the company overview (name, description, market_cap) of a stock,
+    served from the quote cache or the persistent store when fresh.
+
+    Args:
+        symbol (str): The stock symbol.
+        priority (int): The scheduling priority of the provider call, if one is needed.
+
+    Returns:
+        Dict: The company overview, or None if it could not be fetched.
+    """
+    return _cached('OVERVIEW', symbol, lambda: _load_stock_overview(symbol, priority))
+
+
+def get_stock_description(symbol: str, priority: int = PRIORITY_INTERACTIVE) -> str:
+    """
+    Returns a brief description of the company associated with the stock.
+
+    Args:
+        symbol (str): The stock symbol.
+        priority (int): The scheduling priority of the provider call, if one is needed.
+
+    Returns:
+        str: The company description, or "No description available." on failure.
+    """
+    overview = get_stock_overview(symbol, priority)
+    return overview['description'] if overview else "No description available."
@@ -0,0 +1,288 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from stock_collection.utils.logger import configure_logger
+from stock_collection.utils.price_history import PriceHistory
+from stock_collection.utils.sqlite_profile import apply_pragmas
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Symbols bound per IN (...) list, below SQLite's default limit on host parameters
+SYMBOLS_PER_QUERY = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_bars (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    close REAL NOT NULL,
+    PRIMARY KEY (symbol, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS history_refreshes (
+    symbol TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS overviews (
+    symbol TEXT PRIMARY KEY,
+    name TEXT,
+    description TEXT NOT NULL,
+    market_cap TEXT,
+    fetched_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS provider_calls (
+    day TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    calls INTEGER NOT NULL,
+    PRIMARY KEY (day, slot)
+) WITHOUT ROWID;
+"""
+
+
+class MarketDataStore:
+    """
+    A persistent SQLite store for daily bars and company overviews, so that a
+    restarted process does not have to re-download data that barely changes. It
+    also keeps the provider calls spent per day, so that a restarted process does
+    not get the day's call budget back.
+
+    A single connection is shared between threads and guarded by a lock.
+
+    Attributes:
+        path (str): The path of the SQLite file, or ":memory:".
+    """
+
+    def __init__(self, path: str = ':memory:', pragmas: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.pragmas: Dict[str, Any] = dict(pragmas or {})
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def configure(self, path: str, pragmas: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Points the store at a new SQLite file, closing the previous connection.
+
+        Args:
+            path (str): The path of the SQLite file, or ":memory:".
+            pragmas (Dict[str, Any], optional): PRAGMAs set when the connection is opened;
+                the previous ones are kept if omitted.
+        """
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self.path = path
+            if pragmas is not None:
+                self.pragmas = dict(pragmas)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Opens the connection and creates the tables on first use. Must hold the lock."""
+        if self._conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            apply_pragmas(self._conn, self.pragmas)
+            self._conn.executescript(SCHEMA)
+            logger.info("Opened market data store at %s", self.path)
+        return self._conn
+
+    ##################################################
+    # Daily bars
+    ##################################################
+
+    def get_daily_bars(self, symbol: str) -> List[Dict[str, Any]]:
+        """
+        Returns the stored daily closing prices of a stock.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            List: A list of {'date', 'price'} dictionaries, newest first.
+        """
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT date, close FROM daily_bars WHERE symbol = ? ORDER BY date DESC", (symbol,)
+            ).fetchall()
+        return [{'date': date, 'price': close} for date, close in rows]
+
+    def get_daily_history(self, symbol: str) -> PriceHistory:
+        """
+        Returns the stored daily closing prices of a stock as a columnar history.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            PriceHistory: The stored bars, oldest first.
+        """
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT date, close FROM daily_bars WHERE symbol = ? ORDER BY date", (symbol,)
+            ).fetchall()
+        return PriceHistory.from_rows(symbol, rows)
+
+    def latest_bar_date(self, symbol: str) -> Optional[str]:
+        """Returns the date of the newest stored bar for a stock, or None if there is none."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT MAX(date) FROM daily_bars WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        return row[0]
+
+    def closes_before(self, symbols: Sequence[str], before: str) -> Dict[str, float]:
+        """
+        Returns the newest stored close strictly before a date for many stocks, in one
+        grouped query per batch of symbols.
+
+        Args:
+            symbols (Sequence[str]): The stock symbols.
+            before (str): The date (YYYY-MM-DD) the closes must precede.
+
+        Returns:
+            Dict[str, float]: The close of each symbol that has a stored bar before the date.
+        """
+        closes: Dict[str, float] = {}
+        unique = list(dict.fromkeys(symbols))
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(unique), SYMBOLS_PER_QUERY):
+                batch = unique[start:start + SYMBOLS_PER_QUERY]
+                # SQLite takes the bare close column from the row holding MAX(date)
+                rows = conn.execute(
+                    f"SELECT symbol, close, MAX(date) FROM daily_bars "
+                    f"WHERE symbol IN ({', '.join('?' * len(batch))}) AND date < ? GROUP BY symbol",
+                    (*batch, before)
+                ).fetchall()
+                closes.update((symbol, close) for symbol, close, _ in rows)
+        return closes
+
+    def history_refreshed_at(self, symbol: str) -> Optional[float]:
+        """Returns the UNIX time the history of a stock was last refreshed, or None."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT refreshed_at FROM history_refreshes WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def append_daily_bars(self, symbol: str, bars: Iterable[Dict[str, Any]]) -> int:
+        """
+        Stores new daily bars and records the refresh time. Bars that are already
+        stored are left untouched.
+
+        Args:
+            symbol (str): The stock symbol.
+            bars (Iterable[Dict]): {'date', 'price'} dictionaries.
+
+        Returns:
+            int: The number of bars inserted.
+        """
+        rows = [(symbol, bar['date'], float(bar['price'])) for bar in bars]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                before = conn.total_changes
+                conn.executemany("INSERT OR IGNORE INTO daily_bars (symbol, date, close) VALUES (?, ?, ?)", rows)
+                inserted = conn.total_changes - before
+                conn.execute(
+                    "INSERT OR REPLACE INTO history_refreshes (symbol, refreshed_at) VALUES (?, ?)",
+                    (symbol, time.time())
+                )
+        logger.info("Stored %d new daily bars for %s", inserted, symbol)
+        return inserted
+
+    ##################################################
+    # Overviews
+    ##################################################
+
+    def get_overview(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the stored company overview of a stock.
+
+        Args:
+            symbol (str): The stock symbol.
+
+        Returns:
+            Dict: name, description, market_cap and fetched_at, or None if not stored.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT name, description, market_cap, fetched_at FROM overviews WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        if not row:
+            return None
+        return {'name': row[0], 'description': row[1], 'market_cap': row[2], 'fetched_at': row[3]}
+
+    def save_overview(self, symbol: str, overview: Dict[str, Any]) -> None:
+        """
+        Stores (or replaces) the company overview of a stock.
+
+        Args:
+            symbol (str): The stock symbol.
+            overview (Dict): name, description and market_cap.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO overviews (symbol, name, description, market_cap, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (symbol, overview.get('name'), overview['description'], overview.get('market_cap'), time.time())
+                )
+
+    ##################################################
+    # Provider calls
+    ##################################################
+
+    def provider_calls(self, slot: int, day: Optional[str] = None) -> int:
+        """
+        Returns the number of provider calls a worker slot spent on a day.
+
+        Args:
+            slot (int): The worker slot the calls were counted for.
+            day (str, optional): The UTC date (YYYY-MM-DD); defaults to today.
+
+        Returns:
+            int: The number of calls spent, 0 if none were recorded.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT calls FROM provider_calls WHERE day = ? AND slot = ?", (day or _utc_today(), slot)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def add_provider_calls(self, slot: int, calls: int, day: Optional[str] = None) -> None:
+        """
+        Adds to the number of provider calls a worker slot spent on a day.
+
+        Args:
+            slot (int): The worker slot the calls are counted for.
+            calls (int): The number of calls spent.
+            day (str, optional): The UTC date (YYYY-MM-DD); defaults to today.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT INTO provider_calls (day, slot, calls) VALUES (?, ?, ?) "
+                    "ON CONFLICT (day, slot) DO UPDATE SET calls = calls + excluded.calls",
+                    (day or _utc_today(), slot, calls)
+                )
+
+
+def _utc_today() -> str:
+    """Returns today's UTC date as YYYY-MM-DD."""
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+# The process-wide store, pointed at a file by create_app
+market_data_store = MarketDataStore()
@@ -0,0 +1,193 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from stock_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Upper bounds (in seconds) of the latency histogram buckets
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Type and help text of every exported metric, by name
+METRICS: Dict[str, Tuple[str, str]] = {
+    'http_request_duration_seconds': ('histogram', 'Request latency by route, method and status code.'),
+    'db_query_duration_seconds': ('histogram', 'App database statement latency by operation.'),
+    'provider_call_duration_seconds': ('histogram', 'Market data provider call latency, retries included, '
+                                                    'by Alpha Vantage function and outcome.'),
+    'password_hash_duration_seconds': ('histogram', 'Password hash latency, queueing included, by operation.'),
+    'cache_lookups_total': ('counter', 'Cache lookups by cache and result.'),
+    'cache_hit_ratio': ('gauge', 'Share of cache lookups answered from the cache.'),
+    'cache_entries': ('gauge', 'Entries held by each cache.'),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Metrics:
+    """
+    A thread-safe registry of counters and latency histograms, rendered in the
+    Prometheus text exposition format.
+
+    Recording is opt-in: while enabled is False, the hooks in the provider client,
+    the password hasher and the request handlers only test that flag, and create_app
+    installs no request or database hooks at all. Values are per process, so under
+    gunicorn each scrape reflects the worker that served it.
+
+    Attributes:
+        enabled (bool): Whether measurements are recorded.
+        buckets (Tuple[float, ...]): The histogram bucket upper bounds, in seconds.
+    """
+
+    def __init__(self, enabled: bool = False, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self._caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def configure(self, enabled: Optional[bool] = None, buckets: Optional[Sequence[float]] = None) -> None:
+        """
+        Updates the settings. Changing the buckets discards the recorded histograms.
+
+        Args:
+            enabled (bool, optional): Whether to record measurements.
+            buckets (Sequence[float], optional): The new histogram bucket upper bounds.
+        """
+        with self._lock:
+            if enabled is not None:
+                self.enabled = enabled
+            if buckets is not None and tuple(sorted(buckets)) != self.buckets:
+                self.buckets = tuple(sorted(buckets))
+                self._histograms.clear()
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """
+        Records a measurement in a histogram. Does nothing while disabled.
+
+        Args:
+            name (str): The metric name, one of METRICS.
+            value (float): The measurement, in seconds.
+            **labels: The label values of the series.
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                # One count per bucket, then the +Inf count and the sum
+                series = self._histograms[key] = [0.0] * (len(self.buckets) + 2)
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    @contextmanager
+    def timed(self, name: str, **labels: str) -> Iterator[None]:
+        """
+        Records the duration of the block in a histogram, with an outcome label of
+        "success" or "error" depending on whether the block raised.
+        """
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            yield
+            outcome = 'success'
+        finally:
+            self.observe(name, time.perf_counter() - started, outcome=outcome, **labels)
+
+    def register_cache(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        """
+        Exports a cache's counters, read when the metrics are rendered.
+
+        Args:
+            name (str): The cache label, e.g. "quote".
+            stats (Callable): Returns a dict with hits, misses, size and hit_rate, like QuoteCache.stats.
+        """
+        with self._lock:
+            self._caches[name] = stats
+
+    def reset(self) -> None:
+        """Discards every recorded measurement."""
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format (version 0.0.4).
+        """
+        samples: Dict[str, List[str]] = {name: [] for name in METRICS}
+        with self._lock:
+            histograms = sorted((key, list(series)) for key, series in self._histograms.items())
+            caches = sorted(self._caches.items())
+
+        for (name, labels), series in histograms:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                samples[name].append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {int(cumulative)}")
+            samples[name].append(f"{name}_sum{_format_labels(labels)} {series[-1]!r}")
+            samples[name].append(f"{name}_count{_format_labels(labels)} {int(cumulative)}")
+
+        for cache, stats in caches:
+            values = stats()
+            for result in ('hit', 'miss'):
+                samples['cache_lookups_total'].append(
+                    f"cache_lookups_total{_format_labels((('cache', cache), ('result', result)))} "
+                    f"{values['hits' if result == 'hit' else 'misses']}")
+            samples['cache_hit_ratio'].append(f"cache_hit_ratio{_format_labels((('cache', cache),))} "
+                                              f"{values['hit_rate']!r}")
+            samples['cache_entries'].append(f"cache_entries{_format_labels((('cache', cache),))} {values['size']}")
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            if samples[name]:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"] + samples[name]
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: Labels) -> str:
+    """Formats label pairs as {name="value",...}, escaping the values."""
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+def instrument_engine(engine: Engine, registry: Optional[Metrics] = None) -> None:
+    """
+    Times every statement the engine executes, labelled by its SQL verb (SELECT, INSERT, ...).
+
+    Args:
+        engine (Engine): The SQLAlchemy engine.
+        registry (Metrics, optional): The registry to record into, the process-wide one by default.
+    """
+    registry = registry or metrics
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_timer(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any,
+                    executemany: bool) -> None:
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_timer(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any,
+                   executemany: bool) -> None:
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+        registry.observe('db_query_duration_seconds', time.perf_counter() - context._metrics_started,
+                         operation=operation)
+
+
+# The process-wide registry, configured by create_app
+metrics = Metrics()
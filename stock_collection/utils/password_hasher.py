@@ -0,0 +1,179 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import hashlib
+import hmac
+import logging
+import os
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+from stock_collection.utils.logger import configure_logger
+from stock_collection.utils.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Scheme of rows hashed before key stretching was introduced: sha256(password + salt)
+LEGACY_SCHEME = 'sha256'
+HASH_BYTES = 32  # Stored as 64 hex characters
+
+
+class HasherBusyError(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords with a tunable key-derivation function, on a bounded
+    worker pool.
+
+    The scheme and its cost parameters are stored next to each hash as a string such as
+    "pbkdf2_sha256$600000" or "scrypt$16384$8$1", so the cost can be raised later and
+    rows hashed with older parameters (or with the legacy single SHA-256 "sha256" scheme) are
+    still verified and can be rehashed on the next successful login.
+
+    hashlib's PBKDF2 and scrypt release the GIL, so the pool hashes in parallel on
+    max_workers cores. At most max_workers + max_queue hashes are accepted at once;
+    beyond that HasherBusyError is raised instead of letting request threads pile up.
+
+    Attributes:
+        scheme (str): "pbkdf2_sha256" or "scrypt", used for new hashes.
+        pbkdf2_iterations (int): The PBKDF2-HMAC-SHA256 iteration count.
+        scrypt_n (int): The scrypt CPU/memory cost (a power of two).
+        scrypt_r (int): The scrypt block size.
+        scrypt_p (int): The scrypt parallelization factor.
+        timeout (float): Seconds a caller waits for a hash before giving up.
+    """
+
+    def __init__(self, scheme: str = 'pbkdf2_sha256', pbkdf2_iterations: int = 600000, scrypt_n: int = 2 ** 14,
+                 scrypt_r: int = 8, scrypt_p: int = 1, max_workers: Optional[int] = None, max_queue: int = 32,
+                 timeout: float = 10.0):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.configure(scheme, pbkdf2_iterations, scrypt_n, scrypt_r, scrypt_p, max_workers, max_queue, timeout)
+
+    def configure(self, scheme: str = 'pbkdf2_sha256', pbkdf2_iterations: int = 600000, scrypt_n: int = 2 ** 14,
+                  scrypt_r: int = 8, scrypt_p: int = 1, max_workers: Optional[int] = None, max_queue: int = 32,
+                  timeout: float = 10.0) -> None:
+        """
+        Sets the scheme, cost parameters and pool size, replacing the worker pool.
+
+        Raises:
+            ValueError: If the scheme is unknown.
+        """
+        if scheme not in ('pbkdf2_sha256', 'scrypt'):
+            raise ValueError(f"Unknown password hash scheme: {scheme}")
+        self.scheme = scheme
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self.scrypt_n = scrypt_n
+        self.scrypt_r = scrypt_r
+        self.scrypt_p = scrypt_p
+        self.timeout = timeout
+
+        max_workers = max_workers or os.cpu_count() or 1
+        previous = self._executor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        if previous is not None:
+            previous.shutdown(wait=False)
+
+    @property
+    def current_scheme(self) -> str:
+        """Returns the scheme string, with parameters, that new hashes are stored with."""
+        if self.scheme == 'scrypt':
+            return f"scrypt${self.scrypt_n}${self.scrypt_r}${self.scrypt_p}"
+        return f"pbkdf2_sha256${self.pbkdf2_iterations}"
+
+    @staticmethod
+    def derive(password: str, salt: str, scheme: str) -> str:
+        """
+        Computes the hash of a password under a stored scheme string. Runs on the caller's thread.
+
+        Args:
+            password (str): The password.
+            salt (str): The salt, in hex.
+            scheme (str): The scheme string stored with the hash.
+
+        Returns:
+            str: The hash, in hex.
+
+        Raises:
+            ValueError: If the scheme string is not recognized.
+        """
+        name, *params = scheme.split('$')
+        if name == LEGACY_SCHEME:
+            return hashlib.sha256((password + salt).encode()).hexdigest()
+        if name == 'pbkdf2_sha256':
+            return hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(salt), int(params[0]),
+                                       dklen=HASH_BYTES).hex()
+        if name == 'scrypt':
+            n, r, p = (int(param) for param in params)
+            return hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt), n=n, r=r, p=p,
+                                  maxmem=256 * n * r + 1024 * 1024, dklen=HASH_BYTES).hex()
+        raise ValueError(f"Unknown password hash scheme: {scheme}")
+
+    def _run(self, function: Callable[..., Any], *args: Any) -> Any:
+        """Runs a hash on the pool and waits for it, if a slot is free."""
+        if not self._slots.acquire(blocking=False):
+            logger.warning("Password hashing queue is full")
+            raise HasherBusyError("Too many password checks in progress, try again later.")
+        try:
+            future = self._executor.submit(function, *args)
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                raise HasherBusyError("Password check timed out, try again later.")
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> Tuple[str, str, str]:
+        """
+        Hashes a password with a new random salt under the current scheme.
+
+        Args:
+            password (str): The password to hash.
+
+        Returns:
+            Tuple[str, str, str]: The salt (hex), the hash (hex) and the scheme string.
+
+        Raises:
+            HasherBusyError: If the pool is saturated or the hash timed out.
+        """
+        salt = os.urandom(16).hex()
+        scheme = self.current_scheme
+        with metrics.timed('password_hash_duration_seconds', operation='hash'):
+            return salt, self._run(self.derive, password, salt, scheme), scheme
+
+    def verify(self, password: str, salt: str, hashed_password: str, scheme: str) -> bool:
+        """
+        Checks a password against a stored hash in constant time.
+
+        Args:
+            password (str): The password to check.
+            salt (str): The stored salt (hex).
+            hashed_password (str): The stored hash (hex).
+            scheme (str): The stored scheme string.
+
+        Returns:
+            bool: True if the password matches.
+
+        Raises:
+            HasherBusyError: If the pool is saturated or the hash timed out.
+        """
+        with metrics.timed('password_hash_duration_seconds', operation='verify'):
+            hashed = self._run(self.derive, password, salt, scheme)
+        return hmac.compare_digest(hashed, hashed_password)
+
+    def needs_rehash(self, scheme: str) -> bool:
+        """Returns whether a stored hash uses a scheme or parameters other than the current ones."""
+        return scheme != self.current_scheme
+
+    def shutdown(self) -> None:
+        """Stops the worker pool."""
+        self._executor.shutdown(wait=False)
+
+
+# The process-wide hasher, configured by create_app
+password_hasher = PasswordHasher()
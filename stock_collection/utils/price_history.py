@@ -0,0 +1,122 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+DateLike = Union[str, np.datetime64]
+
+
+class PriceHistory:
+    """
+    A compact, columnar daily price history for one stock.
+
+    Dates are held as a datetime64[D] array and closing prices as a float64 array,
+    both sorted oldest first, so that analytics can be vectorized and a bar costs
+    16 bytes instead of a dictionary of strings. The JSON list of
+    {'date', 'price'} dictionaries is only produced by to_records() at the HTTP
+    boundary.
+
+    Attributes:
+        symbol (str): The stock symbol.
+        dates (np.ndarray): The trading dates (datetime64[D]), oldest first.
+        close (np.ndarray): The closing prices (float64), aligned with dates.
+    """
+
+    __slots__ = ('symbol', 'dates', 'close')
+
+    def __init__(self, symbol: str, dates: np.ndarray, close: np.ndarray):
+        if len(dates) != len(close):
+            raise ValueError("dates and close must have the same length.")
+        self.symbol = symbol
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.close = np.asarray(close, dtype=np.float64)
+
+    @classmethod
+    def empty(cls, symbol: str) -> 'PriceHistory':
+        """Returns a history with no bars."""
+        return cls(symbol, np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype=np.float64))
+
+    @classmethod
+    def from_rows(cls, symbol: str, rows: Sequence[Tuple[str, float]]) -> 'PriceHistory':
+        """
+        Builds a history from (date, close) rows in any order.
+
+        Args:
+            symbol (str): The stock symbol.
+            rows (Sequence[Tuple[str, float]]): ISO dates (YYYY-MM-DD) and closing prices.
+        """
+        if not rows:
+            return cls.empty(symbol)
+        dates = np.array([row[0] for row in rows], dtype='datetime64[D]')
+        close = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+        order = np.argsort(dates, kind='stable')
+        return cls(symbol, dates[order], close[order])
+
+    @classmethod
+    def from_bars(cls, symbol: str, bars: Iterable[Dict[str, Any]]) -> 'PriceHistory':
+        """Builds a history from {'date', 'price'} dictionaries in any order."""
+        return cls.from_rows(symbol, [(bar['date'], float(bar['price'])) for bar in bars])
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return f"PriceHistory({self.symbol!r}, empty)"
+        return f"PriceHistory({self.symbol!r}, {len(self)} bars, {self.dates[0]} to {self.dates[-1]})"
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the memory held by the date and price arrays, in bytes."""
+        return self.dates.nbytes + self.close.nbytes
+
+    @property
+    def latest_date(self) -> Optional[str]:
+        """Returns the date of the newest bar (YYYY-MM-DD), or None if empty."""
+        return str(self.dates[-1]) if len(self) else None
+
+    @property
+    def latest_close(self) -> Optional[float]:
+        """Returns the closing price of the newest bar, or None if empty."""
+        return float(self.close[-1]) if len(self) else None
+
+    def between(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> 'PriceHistory':
+        """
+        Returns the bars from start to end, both inclusive, as a view on the same arrays.
+
+        Args:
+            start (str, optional): The oldest date to include (YYYY-MM-DD).
+            end (str, optional): The newest date to include (YYYY-MM-DD).
+        """
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left')
+        hi = len(self) if end is None else np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right')
+        return PriceHistory(self.symbol, self.dates[lo:hi], self.close[lo:hi])
+
+    def tail(self, limit: int) -> 'PriceHistory':
+        """Returns the newest limit bars, as a view on the same arrays."""
+        lo = max(len(self) - limit, 0)
+        return PriceHistory(self.symbol, self.dates[lo:], self.close[lo:])
+
+    def close_asof(self, dates: np.ndarray) -> np.ndarray:
+        """
+        Returns the closing price on or before each of the given dates, carrying the last
+        close forward over non-trading days. Dates before the first bar get NaN.
+
+        Args:
+            dates (np.ndarray): The dates to look up (datetime64[D]).
+        """
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        positions = np.searchsorted(self.dates, dates, side='right') - 1
+        prices = self.close[np.clip(positions, 0, None)] if len(self) else np.full(len(dates), np.nan)
+        return np.where(positions >= 0, prices, np.nan)
+
+    def returns(self) -> np.ndarray:
+        """Returns the simple daily returns (one fewer than the number of bars)."""
+        return np.diff(self.close) / self.close[:-1] if len(self) > 1 else np.empty(0, dtype=np.float64)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        Returns the bars as {'date', 'price'} dictionaries, newest first, for JSON responses.
+        """
+        return [{'date': day, 'price': price}
+                for day, price in zip(self.dates[::-1].astype(str).tolist(), self.close[::-1].tolist())]
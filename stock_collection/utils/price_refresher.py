@@ -0,0 +1,117 @@
+import logging
+import random
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+from stock_collection.utils import market_data
+from stock_collection.utils.logger import configure_logger
+from stock_collection.utils.rate_limiter import PRIORITY_BACKGROUND, RequestScheduler, request_scheduler
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class PriceRefresher:
+    """
+    A background thread that periodically refreshes the price of every held symbol,
+    so that valuations are answered from memory instead of the request path.
+
+    Each cycle fetches the symbols one at a time at background priority and stops
+    early once the daily call budget falls to min_daily_budget, leaving the rest
+    for interactive look-ups. Cycles are spaced interval seconds apart, randomly
+    spread by +/- jitter (a fraction of the interval) so that several workers do
+    not refresh in lockstep.
+
+    Attributes:
+        interval (float): The number of seconds between cycles.
+        jitter (float): The random spread of the interval, as a fraction.
+        min_daily_budget (int): Daily provider calls kept in reserve for interactive requests.
+    """
+
+    def __init__(self, symbols: Callable[[], Iterable[str]],
+                 on_price: Optional[Callable[[str, float], None]] = None,
+                 interval: float = 900.0, jitter: float = 0.1, min_daily_budget: int = 5,
+                 scheduler: RequestScheduler = request_scheduler):
+        """
+        Args:
+            symbols (Callable): Returns the symbols to refresh at the start of each cycle.
+            on_price (Callable, optional): Called with (symbol, price) for every refreshed price.
+            interval (float): The number of seconds between cycles.
+            jitter (float): The random spread of the interval, as a fraction.
+            min_daily_budget (int): Daily provider calls kept in reserve for interactive requests.
+            scheduler (RequestScheduler): The scheduler whose budget is checked.
+        """
+        self.symbols = symbols
+        self.on_price = on_price
+        self.interval = interval
+        self.jitter = jitter
+        self.min_daily_budget = min_daily_budget
+        self.scheduler = scheduler
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Returns True while the background thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Starts the background thread; does nothing if it is already running."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='price-refresher', daemon=True)
+        self._thread.start()
+        logger.info("Price refresher started (interval %.0fs)", self.interval)
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        Stops the background thread, waiting up to timeout seconds for the current fetch to end.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+            logger.info("Price refresher stopped")
+
+    def next_delay(self) -> float:
+        """Returns the number of seconds until the next cycle."""
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def refresh_once(self) -> Dict[str, float]:
+        """
+        Refreshes every symbol once, within the daily call budget.
+
+        Returns:
+            Dict[str, float]: The refreshed prices, keyed by stock symbol.
+        """
+        refreshed: Dict[str, float] = {}
+        symbols = sorted(set(self.symbols()))
+        for symbol in symbols:
+            if self._stop.is_set():
+                break
+            if self.scheduler.remaining_daily() <= self.min_daily_budget:
+                logger.warning("Skipping price refresh of %d symbols to preserve the daily call budget",
+                               len(symbols) - len(refreshed))
+                break
+
+            price = market_data.refresh_current_price(symbol, PRIORITY_BACKGROUND)
+            if price is None:
+                continue
+            refreshed[symbol] = price
+            if self.on_price is not None:
+                try:
+                    self.on_price(symbol, price)
+                except Exception as e:
+                    logger.error("Error storing refreshed price for %s: %s", symbol, e)
+
+        logger.info("Background refresh updated %d of %d prices", len(refreshed), len(symbols))
+        return refreshed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.next_delay()):
+            try:
+                self.refresh_once()
+            except Exception as e:
+                logger.error("Background price refresh failed: %s", e)
@@ -0,0 +1,328 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from stock_collection.utils.logger import configure_logger
+from stock_collection.utils.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+ALPHA_VANTAGE_URL = 'https://www.alphavantage.co/query'
+
+T = TypeVar('T')
+
+# Alpha Vantage answers throttled calls with HTTP 200 and one of these keys
+RATE_LIMIT_KEYS = ('Note', 'Information')
+RATE_LIMIT_PHRASES = ('rate limit', 'call frequency', 'requests per')
+DAILY_LIMIT_PHRASES = ('per day', 'daily')
+
+
+class ProviderError(requests.exceptions.RequestException):
+    """Raised when the market data provider could not answer a request."""
+
+
+class RateLimitedError(ProviderError):
+    """Raised when the market data provider throttled the request."""
+
+
+class DailyLimitError(RateLimitedError):
+    """Raised when the provider reports the daily quota as spent; retrying cannot succeed."""
+
+
+class CircuitOpenError(ProviderError):
+    """Raised without contacting the provider while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    A circuit breaker that fails fast once the provider has failed repeatedly.
+
+    The breaker is closed while calls succeed. After failure_threshold consecutive
+    failures it opens and rejects every call for reset_timeout seconds, then lets
+    a single trial call through (half-open): success closes it again, failure
+    re-opens it. A trial that has not reported back within trial_timeout seconds
+    is presumed lost, and another trial is let through.
+
+    Attributes:
+        failure_threshold (int): Consecutive failures that open the breaker.
+        reset_timeout (float): Seconds the breaker stays open before a trial call.
+        trial_timeout (float): Seconds a trial call may take before another is allowed.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic, trial_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.trial_timeout = trial_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started_at = 0.0
+
+    @property
+    def state(self) -> str:
+        """Returns the current state, moving from open to half-open once the reset timeout has passed."""
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Returns True if a call may be made now."""
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and (not self._trial_in_flight
+                                            or self._clock() - self._trial_started_at >= self.trial_timeout):
+                self._trial_in_flight = True
+                self._trial_started_at = self._clock()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Closes the breaker and resets the failure count."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """
+        Ends a call that was abandoned rather than failed (e.g. cancelled, or the worker
+        is exiting) without counting a failure, so a half-open breaker lets another trial through.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Counts a failure, opening the breaker if the threshold is reached or the trial call failed."""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("Circuit breaker opened after %d failures", self._failures)
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class ProviderClient:
+    """
+    The shared HTTP client for the market data provider.
+
+    A single requests.Session keeps connections alive across calls, every
+    request has connect/read timeouts, 5xx, 429 and throttled responses are
+    retried with exponential backoff, and a circuit breaker fails fast while
+    the provider is down.
+
+    Attributes:
+        base_url (str): The provider endpoint.
+        connect_timeout (float): Seconds to wait for a connection.
+        read_timeout (float): Seconds to wait for the response.
+        max_retries (int): Retries after the first attempt.
+        backoff_factor (float): The first backoff delay in seconds; doubled on each retry.
+        max_backoff (float): The maximum backoff delay in seconds.
+        breaker (CircuitBreaker): The circuit breaker guarding the provider.
+    """
+
+    def __init__(self, base_url: str = ALPHA_VANTAGE_URL, pool_size: int = 10,
+                 connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 max_retries: int = 2, backoff_factor: float = 0.5, max_backoff: float = 8.0,
+                 breaker: Optional[CircuitBreaker] = None, sleep: Callable[[float], None] = time.sleep):
+        self.base_url = base_url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        self.session = self._build_session(pool_size)
+
+    @staticmethod
+    def _build_session(pool_size: int) -> requests.Session:
+        """Creates a session whose connection pool holds up to pool_size keep-alive connections."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def configure(self, pool_size: Optional[int] = None, connect_timeout: Optional[float] = None,
+                  read_timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                  backoff_factor: Optional[float] = None, failure_threshold: Optional[int] = None,
+                  reset_timeout: Optional[float] = None, trial_timeout: Optional[float] = None) -> None:
+        """
+        Updates the client settings. Changing the pool size replaces the session.
+        """
+        if pool_size is not None:
+            self.session.close()
+            self.session = self._build_session(pool_size)
+        if connect_timeout is not None:
+            self.connect_timeout = connect_timeout
+        if read_timeout is not None:
+            self.read_timeout = read_timeout
+        if max_retries is not None:
+            self.max_retries = max_retries
+        if backoff_factor is not None:
+            self.backoff_factor = backoff_factor
+        if failure_threshold is not None:
+            self.breaker.failure_threshold = failure_threshold
+        if reset_timeout is not None:
+            self.breaker.reset_timeout = reset_timeout
+        if trial_timeout is not None:
+            self.breaker.trial_timeout = trial_timeout
+
+    def get_json(self, params: Dict[str, Any], acquire_retry: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """
+        Sends a GET request to the provider and returns the decoded JSON body.
+
+        Args:
+            params (Dict[str, Any]): The query parameters.
+            acquire_retry (Callable, optional): Called before each retry; the call gives up
+                instead of retrying when it returns False (e.g. no call budget is left).
+
+        Returns:
+            Dict: The decoded JSON response.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            RateLimitedError: If the provider still throttles the request after every retry.
+            ProviderError: If the provider still fails after every retry.
+        """
+        return self._call(params, self._decode_json, acquire_retry=acquire_retry)
+
+    def stream(self, params: Dict[str, Any], consume: Callable[[Iterator[bytes]], T],
+               chunk_size: int = 64 * 1024, acquire_retry: Optional[Callable[[], bool]] = None) -> T:
+        """
+        Sends a GET request to the provider and hands the body to consume as it arrives,
+        without reading the whole response into memory first.
+
+        consume may raise RateLimitedError (e.g. on a throttling notice) to have the
+        request retried, so it must not have side effects before it returns.
+
+        Args:
+            params (Dict[str, Any]): The query parameters.
+            consume (Callable): Receives an iterator of raw body chunks and returns the result.
+            chunk_size (int): The number of bytes read at a time.
+            acquire_retry (Callable, optional): As for get_json.
+
+        Returns:
+            The result of consume.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            RateLimitedError: If the provider still throttles the request after every retry.
+            ProviderError: If the provider still fails after every retry.
+        """
+        return self._call(params, lambda response: consume(response.iter_content(chunk_size)), stream=True,
+                          acquire_retry=acquire_retry)
+
+    def _call(self, params: Dict[str, Any], handle: Callable[[requests.Response], T], stream: bool = False,
+              acquire_retry: Optional[Callable[[], bool]] = None) -> T:
+        """Sends the request, timed per Alpha Vantage function, and returns handle(response)."""
+        with metrics.timed('provider_call_duration_seconds', function=str(params.get('function', ''))):
+            return self._send(params, handle, stream, acquire_retry)
+
+    def _send(self, params: Dict[str, Any], handle: Callable[[requests.Response], T], stream: bool = False,
+              acquire_retry: Optional[Callable[[], bool]] = None) -> T:
+        """Sends the request with retries and backoff, and returns handle(response)."""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Market data provider is unavailable (circuit open)")
+
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = self.session.get(self.base_url, params=params, stream=stream,
+                                            timeout=(self.connect_timeout, self.read_timeout))
+                try:
+                    if response.status_code == 429 or response.status_code >= 500:
+                        retry_after = response.headers.get('Retry-After')
+                        error = RateLimitedError if response.status_code == 429 else ProviderError
+                        raise error(f"Provider returned HTTP {response.status_code}")
+                    response.raise_for_status()
+                    result = handle(response)
+                finally:
+                    response.close()
+                self.breaker.record_success()
+                return result
+            except (ProviderError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not self._may_retry(e, attempt, acquire_retry):
+                    self.breaker.record_failure()
+                    if isinstance(e, ProviderError):
+                        raise
+                    raise ProviderError(str(e)) from e
+                delay = self._backoff(attempt, retry_after)
+                logger.warning("Provider call failed (%s), retrying in %.2fs", e, delay)
+                self._sleep(delay)
+                attempt += 1
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # 4xx responses and undecodable bodies are not worth retrying
+                self.breaker.record_failure()
+                raise ProviderError(str(e)) from e
+            except Exception:
+                # E.g. a consumer choking on a malformed body: still a failed call, or a
+                # half-open breaker would wait forever for its trial to report back
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                # Interrupted, not failed: free the trial without counting it against the provider
+                self.breaker.release_trial()
+                raise
+
+    def _may_retry(self, error: Exception, attempt: int, acquire_retry: Optional[Callable[[], bool]]) -> bool:
+        """Returns whether a failed attempt is retried: retries are left, it was not the daily quota, and the budget allows it."""
+        if attempt >= self.max_retries or isinstance(error, DailyLimitError):
+            return False
+        return acquire_retry is None or acquire_retry()
+
+    def _decode_json(self, response: requests.Response) -> Dict[str, Any]:
+        """Decodes a JSON body, raising RateLimitedError if it is a throttling notice."""
+        data = response.json()
+        self.raise_if_throttled(data)
+        return data
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Returns the delay before the next retry, honouring a numeric Retry-After header."""
+        if retry_after is not None:
+            try:
+                return min(self.max_backoff, float(retry_after))
+            except ValueError:
+                pass
+        return min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+
+    @staticmethod
+    def raise_if_throttled(data: Any) -> None:
+        """Raises RateLimitedError (DailyLimitError for the daily quota) if a 200 response body is a throttling notice."""
+        if not isinstance(data, dict):
+            return
+        for key in RATE_LIMIT_KEYS:
+            message = data.get(key)
+            if isinstance(message, str) and any(phrase in message.lower() for phrase in RATE_LIMIT_PHRASES):
+                if any(phrase in message.lower() for phrase in DAILY_LIMIT_PHRASES):
+                    raise DailyLimitError(message)
+                raise RateLimitedError(message)
+
+    def close(self) -> None:
+        """Closes every pooled connection."""
+        self.session.close()
+
+
+# The process-wide client shared by every Alpha Vantage fetcher
+provider_client = ProviderClient()
@@ -0,0 +1,199 @@
+from collections import OrderedDict
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from stock_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Default time-to-live (in seconds) for each Alpha Vantage function.
+DEFAULT_TTLS: Dict[str, float] = {
+    'TIME_SERIES_INTRADAY': 60.0,          # Intraday quotes go stale quickly
+    'TIME_SERIES_DAILY': 60.0 * 60 * 6,    # A new daily bar appears once a day
+    'OVERVIEW': 60.0 * 60 * 24 * 3,        # Company descriptions barely change
+}
+DEFAULT_TTL = 60.0
+DEFAULT_MAX_SIZE = 1024
+
+
+class QuoteCache:
+    """
+    A thread-safe, size-bounded LRU cache with per-function TTLs for market data.
+
+    Entries are keyed by (function, symbol). Expired entries are not returned by
+    get(), but they are kept until evicted so that callers can fall back to the
+    last known value through get_stale().
+
+    Attributes:
+        max_size (int): The maximum number of entries held before evicting the least recently used.
+        ttls (Dict[str, float]): The time-to-live in seconds for each Alpha Vantage function.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that had to be loaded.
+        evictions (int): The number of entries evicted to respect max_size.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttls: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttls: Dict[str, float] = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_size: Optional[int] = None, ttls: Optional[Dict[str, float]] = None) -> None:
+        """
+        Updates the cache settings, evicting entries if the new size is smaller.
+
+        Args:
+            max_size (int, optional): The new maximum number of entries.
+            ttls (Dict[str, float], optional): TTL overrides keyed by Alpha Vantage function.
+        """
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttls:
+                self.ttls.update(ttls)
+            self._evict()
+
+    def ttl_for(self, function: str) -> float:
+        """Returns the time-to-live in seconds for the given Alpha Vantage function."""
+        return self.ttls.get(function, DEFAULT_TTL)
+
+    def get(self, function: str, symbol: Hashable) -> Optional[Any]:
+        """
+        Returns a fresh cached value, or None if it is missing or expired.
+
+        Args:
+            function (str): The Alpha Vantage function (e.g. "OVERVIEW").
+            symbol (Hashable): The stock symbol (or any other key within the function).
+        """
+        key = (function, symbol)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, function: str, symbol: Hashable) -> Optional[Any]:
+        """
+        Returns a fresh cached value, or None, without affecting the hit/miss counters
+        or the LRU order.
+        """
+        with self._lock:
+            entry = self._entries.get((function, symbol))
+            if entry is None or entry[0] <= self._clock():
+                return None
+            return entry[1]
+
+    def get_stale(self, function: str, symbol: Hashable) -> Optional[Any]:
+        """
+        Returns the last cached value regardless of its age, or None if there is none.
+        Does not affect the hit/miss counters.
+        """
+        with self._lock:
+            entry = self._entries.get((function, symbol))
+            return entry[1] if entry is not None else None
+
+    def set(self, function: str, symbol: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Stores a value, evicting the least recently used entries if the cache is full.
+
+        Args:
+            function (str): The Alpha Vantage function.
+            symbol (Hashable): The stock symbol.
+            value (Any): The value to cache.
+            ttl (float, optional): Overrides the function's default time-to-live.
+        """
+        key = (function, symbol)
+        expires_at = self._clock() + (self.ttl_for(function) if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def get_or_load(self, function: str, symbol: Hashable, loader: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """
+        Returns the cached value, calling the loader on a miss.
+
+        The loader's result is only cached if it is not None, so that failed
+        fetches are retried on the next call instead of being remembered.
+
+        Args:
+            function (str): The Alpha Vantage function.
+            symbol (Hashable): The stock symbol.
+            loader (Callable): Fetches the value when it is not cached.
+
+        Returns:
+            The cached or freshly loaded value, or None if the loader failed.
+        """
+        value = self.get(function, symbol)
+        if value is not None:
+            logger.debug("Quote cache hit for %s %s", function, symbol)
+            return value
+
+        logger.debug("Quote cache miss for %s %s", function, symbol)
+        value = loader()
+        if value is not None:
+            self.set(function, symbol, value)
+        return value
+
+    def invalidate(self, function: Optional[str] = None, symbol: Optional[Hashable] = None) -> None:
+        """
+        Removes entries matching the given function and/or symbol (all entries if neither is given).
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if (function is None or key[0] == function) and (symbol is None or key[1] == symbol):
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        """Removes every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            Dict: size, max_size, hits, misses, evictions and hit_rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        """Drops least recently used entries until the cache fits. Must hold the lock."""
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+# The process-wide cache shared by every Alpha Vantage fetcher
+quote_cache = QuoteCache()
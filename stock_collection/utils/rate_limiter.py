@@ -0,0 +1,343 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from stock_collection.utils.logger import configure_logger
+from stock_collection.utils.provider_client import ProviderError
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# Lower numbers are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+
+class QuotaExhaustedError(ProviderError):
+    """Raised when a provider call cannot be made within the call budget."""
+
+
+class TokenBucket:
+    """
+    A token bucket that refills continuously up to its capacity.
+
+    Attributes:
+        capacity (float): The maximum number of tokens.
+        refill_rate (float): The number of tokens added per second.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float, clock: Callable[[], float] = time.monotonic,
+                 tokens: Optional[float] = None):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._clock = clock
+        self._tokens = float(capacity) if tokens is None else min(float(capacity), max(float(tokens), 0.0))
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.refill_rate)
+        self._updated_at = now
+
+    @property
+    def tokens(self) -> float:
+        """Returns the number of tokens currently available."""
+        self._refill()
+        return self._tokens
+
+    def try_take(self) -> bool:
+        """Takes one token if available and returns whether it did."""
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def drain(self) -> None:
+        """Takes every available token."""
+        self._refill()
+        self._tokens = 0.0
+
+    def time_until_available(self) -> float:
+        """Returns the number of seconds until one token is available."""
+        self._refill()
+        if self._tokens >= 1:
+            return 0.0
+        if self.refill_rate <= 0:
+            return float('inf')
+        return (1 - self._tokens) / self.refill_rate
+
+
+class _PendingRequest:
+    """A queued provider call, shared by every caller asking for the same key."""
+
+    def __init__(self, key: Hashable, fn: Callable[[], Any], priority: int):
+        self.key = key
+        self.fn = fn
+        self.priority = priority
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 1
+
+
+class RequestScheduler:
+    """
+    Schedules provider calls within a per-minute and per-day call budget.
+
+    Callers queue for a token in priority order (interactive lookups ahead of
+    background refreshes). Identical calls that are queued at the same time are
+    coalesced: only the first is sent, and every caller receives its result.
+    A call that cannot get a token within max_wait seconds, or once the daily
+    budget is spent, fails with QuotaExhaustedError instead of being sent and
+    throttled by the provider.
+
+    The daily budget is a token bucket refilling over 24 hours, i.e. a rolling
+    approximation of the provider's calendar-day quota. Daily tokens taken are
+    passed to the spend recorder, if one is set, so that a new process can start
+    with what is left of the day's budget instead of a full one.
+
+    Attributes:
+        per_minute (int): Calls allowed per minute.
+        per_day (int): Calls allowed per day.
+        max_wait (float): The longest a caller waits in the queue, in seconds.
+    """
+
+    def __init__(self, per_minute: int = 5, per_day: int = 25, max_wait: float = 15.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[int, int, _PendingRequest]] = []
+        self._pending: Dict[Hashable, _PendingRequest] = {}
+        self._sequence = itertools.count()
+        self.dispatched = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self._spend_recorder: Optional[Callable[[int], None]] = None
+        self.configure(per_minute, per_day, max_wait)
+
+    def configure(self, per_minute: Optional[int] = None, per_day: Optional[int] = None,
+                  max_wait: Optional[float] = None, spent_today: int = 0) -> None:
+        """
+        Updates the call budget. Changing a limit refills the matching bucket; the
+        daily one less spent_today, the calls already spent against it today.
+        """
+        with self._cond:
+            if per_minute is not None:
+                self.per_minute = per_minute
+                self._minute_bucket = TokenBucket(per_minute, per_minute / 60.0, self._clock)
+            if per_day is not None:
+                self.per_day = per_day
+                self._day_bucket = TokenBucket(per_day, per_day / 86400.0, self._clock, per_day - spent_today)
+            if max_wait is not None:
+                self.max_wait = max_wait
+            self._cond.notify_all()
+
+    def record_spend(self, recorder: Optional[Callable[[int], None]]) -> None:
+        """
+        Sets the function called with the number of daily tokens taken, e.g. to keep
+        the day's spend in shared storage. None stops recording.
+        """
+        with self._cond:
+            self._spend_recorder = recorder
+
+    def _report_spend(self, calls: int) -> None:
+        """Passes spent daily tokens to the spend recorder. Must not hold the lock."""
+        recorder = self._spend_recorder
+        if recorder is None or calls <= 0:
+            return
+        try:
+            recorder(calls)
+        except Exception:
+            logger.exception("Failed to record %d provider calls", calls)
+
+    def run(self, key: Hashable, fn: Callable[[], Any], priority: int = PRIORITY_INTERACTIVE) -> Any:
+        """
+        Runs fn once a token is available, sharing the call with queued callers of the same key.
+
+        Args:
+            key (Hashable): Identifies the call; callers with the same key are coalesced.
+            fn (Callable): Makes the provider call.
+            priority (int): PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND.
+
+        Returns:
+            The result of fn.
+
+        Raises:
+            QuotaExhaustedError: If no token became available within max_wait seconds.
+        """
+        with self._cond:
+            request = self._pending.get(key)
+            if request is not None:
+                request.waiters += 1
+                self.coalesced += 1
+                if priority < request.priority:
+                    request.priority = priority
+                    heapq.heappush(self._queue, (priority, next(self._sequence), request))
+                    self._cond.notify_all()
+                owner = False
+            else:
+                request = _PendingRequest(key, fn, priority)
+                self._pending[key] = request
+                heapq.heappush(self._queue, (priority, next(self._sequence), request))
+                self._cond.notify_all()
+                owner = True
+
+        if owner:
+            self._dispatch(request)
+        else:
+            request.done.wait()
+
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _dispatch(self, request: _PendingRequest) -> None:
+        """Waits for the request's turn and a token, then runs it and wakes coalesced callers."""
+        deadline = self._clock() + self.max_wait
+        with self._cond:
+            while True:
+                self._drop_stale_heads()
+                if self._queue and self._queue[0][2] is request and self._take_token():
+                    heapq.heappop(self._queue)
+                    del self._pending[request.key]
+                    self.dispatched += 1
+                    self._cond.notify_all()
+                    break
+
+                wait = max(self._minute_bucket.time_until_available(), self._day_bucket.time_until_available())
+                remaining = deadline - self._clock()
+                if self._clock() + wait > deadline or remaining <= 0:
+                    del self._pending[request.key]
+                    self.rejected += request.waiters
+                    self._cond.notify_all()
+                    logger.warning("Provider call budget exhausted, rejecting %s", request.key)
+                    request.error = QuotaExhaustedError("Market data provider call budget exhausted")
+                    request.done.set()
+                    return
+                self._cond.wait(timeout=min(remaining, wait) if wait > 0 else remaining)
+
+        self._report_spend(1)
+        try:
+            request.result = request.fn()
+        except BaseException as e:
+            request.error = e
+        finally:
+            request.done.set()
+
+    def try_acquire(self, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """
+        Takes a token without queueing, for callers that cannot block (e.g. an event
+        loop). A token is only taken if no queued call of the same or a higher
+        priority is waiting for one.
+
+        Args:
+            priority (int): PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND.
+
+        Returns:
+            float: 0.0 if a token was taken, otherwise the seconds to wait before trying again.
+        """
+        with self._cond:
+            self._drop_stale_heads()
+            queued_ahead = bool(self._queue) and self._queue[0][0] <= priority
+            taken = not queued_ahead and self._take_token()
+            if taken:
+                self.dispatched += 1
+            else:
+                wait = max(self._minute_bucket.time_until_available(), self._day_bucket.time_until_available())
+        if taken:
+            self._report_spend(1)
+            return 0.0
+        return max(wait, 0.01)
+
+    def acquire_retry(self, priority: int = PRIORITY_INTERACTIVE) -> bool:
+        """
+        Takes a token for a retry of a call that is already running, without waiting, so
+        that every request sent to the provider is counted against the budget.
+
+        Args:
+            priority (int): The priority of the call being retried.
+
+        Returns:
+            bool: Whether a token was taken; if not, the call should give up instead of retrying.
+        """
+        return self.try_acquire(priority) == 0.0
+
+    def exhaust_daily(self) -> None:
+        """Empties the daily budget, e.g. once the provider reports its daily quota as spent."""
+        with self._cond:
+            unspent = int(self._day_bucket.tokens)
+            self._day_bucket.drain()
+        self._report_spend(unspent)
+        logger.warning("Provider reported its daily quota as spent")
+
+    async def acquire_async(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """
+        Waits on the running event loop, without blocking it, until a token is taken.
+
+        Async callers are not coalesced here; they deduplicate their own calls.
+
+        Args:
+            priority (int): PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND.
+
+        Raises:
+            QuotaExhaustedError: If no token became available within max_wait seconds.
+        """
+        deadline = self._clock() + self.max_wait
+        while True:
+            wait = self.try_acquire(priority)
+            if not wait:
+                return
+            if self._clock() + wait > deadline:
+                with self._cond:
+                    self.rejected += 1
+                logger.warning("Provider call budget exhausted, rejecting async call")
+                raise QuotaExhaustedError("Market data provider call budget exhausted")
+            await asyncio.sleep(min(wait, max(deadline - self._clock(), 0.01)))
+
+    def _drop_stale_heads(self) -> None:
+        """Pops queue entries that were already dispatched, rejected or re-queued at a higher priority."""
+        while self._queue:
+            priority, _, request = self._queue[0]
+            if self._pending.get(request.key) is request and request.priority == priority:
+                return
+            heapq.heappop(self._queue)
+
+    def _take_token(self) -> bool:
+        """Takes one token from both buckets if both have one. Must hold the lock."""
+        if self._minute_bucket.tokens >= 1 and self._day_bucket.tokens >= 1:
+            self._minute_bucket.try_take()
+            self._day_bucket.try_take()
+            return True
+        return False
+
+    def remaining_daily(self) -> int:
+        """Returns the number of calls left in the daily budget."""
+        with self._cond:
+            return int(self._day_bucket.tokens)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Returns the remaining budget and scheduler counters.
+
+        Returns:
+            Dict: minute_remaining, day_remaining, queued, dispatched, coalesced and rejected.
+        """
+        with self._cond:
+            return {
+                'minute_remaining': int(self._minute_bucket.tokens),
+                'day_remaining': int(self._day_bucket.tokens),
+                'queued': len(self._pending),
+                'dispatched': self.dispatched,
+                'coalesced': self.coalesced,
+                'rejected': self.rejected,
+            }
+
+
+# The process-wide scheduler shared by every Alpha Vantage fetcher
+request_scheduler = RequestScheduler()
@@ -0,0 +1,75 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from stock_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Check statuses, from best to worst
+OK = 'ok'
+DEGRADED = 'degraded'
+FAILING = 'failing'
+
+Check = Callable[[], Dict[str, Any]]
+
+
+class ReadinessCheck:
+    """
+    Runs a set of dependency checks and memoizes the report for a few seconds, so that
+    frequent load balancer probes do not each query the database.
+
+    Every check returns a dict with a "status" of OK, DEGRADED or FAILING plus any
+    measurements; a check that raises counts as FAILING. The service is "unavailable"
+    if any check is failing, "degraded" if any is degraded, and "ready" otherwise.
+    Only one caller at a time runs the checks; the others wait for its report.
+
+    Attributes:
+        ttl (float): Seconds a report is reused.
+    """
+
+    def __init__(self, checks: Dict[str, Check], ttl: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.checks = checks
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._report: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+
+    def run(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Returns the memoized report, running the checks if it is older than ttl.
+
+        Returns:
+            Tuple[bool, Dict]: Whether the service can take traffic, and the report with
+                the overall status, the age of the report in seconds and each check's result.
+        """
+        with self._lock:
+            if self._report is None or self._clock() - self._checked_at >= self.ttl:
+                self._report = self._check_all()
+                self._checked_at = self._clock()
+            report = dict(self._report, age=round(self._clock() - self._checked_at, 3))
+        return report['status'] != 'unavailable', report
+
+    def _check_all(self) -> Dict[str, Any]:
+        """Runs every check and derives the overall status."""
+        results = {}
+        for name, check in self.checks.items():
+            try:
+                results[name] = check()
+            except Exception as e:
+                logger.error("Readiness check %s failed: %s", name, e)
+                results[name] = {'status': FAILING, 'error': str(e)}
+
+        statuses = {result['status'] for result in results.values()}
+        if FAILING in statuses:
+            status = 'unavailable'
+        elif DEGRADED in statuses:
+            status = 'degraded'
+        else:
+            status = 'ready'
+        return {'status': status, 'checks': results}
@@ -0,0 +1,183 @@
+import codecs
+import json
+from typing import Any, AsyncIterable, Dict, Iterable, Iterator, List, Optional, Union
+
+from stock_collection.utils.provider_client import ProviderClient, ProviderError
+
+
+DAILY_SERIES_KEY = '"Time Series (Daily)"'
+
+# Metadata before the series is a few hundred bytes; anything this large without it is not a series
+MAX_PREAMBLE_SIZE = 1024 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def _skip(buffer: str, pos: int, chars: str) -> int:
+    while pos < len(buffer) and buffer[pos] in chars:
+        pos += 1
+    return pos
+
+
+class DailyBarParser:
+    """
+    Incrementally parses a TIME_SERIES_DAILY response fed to it chunk by chunk.
+
+    Only the bar being parsed is held in memory, never the whole document. Alpha
+    Vantage lists bars newest first, so the parser is done as soon as a bar is older
+    than start or limit bars have been returned, and the rest of the body need not
+    be read.
+
+    Args:
+        start (str, optional): The oldest date to return (YYYY-MM-DD), inclusive.
+        end (str, optional): The newest date to return (YYYY-MM-DD), inclusive.
+        limit (int, optional): The maximum number of bars to return.
+
+    Attributes:
+        done (bool): Whether every wanted bar has been returned.
+    """
+
+    def __init__(self, start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None):
+        self.start = start
+        self.end = end
+        self.limit = limit
+        self.done = limit is not None and limit <= 0
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._in_series = False
+        self._returned = 0
+
+    def feed(self, chunk: Union[bytes, str]) -> List[Dict[str, Any]]:
+        """
+        Parses the next chunk of the body.
+
+        Returns:
+            List[Dict]: {'date': str, 'price': float} for each bar the chunk completed, newest first.
+
+        Raises:
+            RateLimitedError: If the body is a throttling notice.
+            ProviderError: If the body does not contain a daily series.
+        """
+        if self.done:
+            return []
+        self._buffer = self._buffer[self._pos:] + (self._utf8.decode(chunk) if isinstance(chunk, bytes) else chunk)
+        self._pos = 0
+        return self._parse(final=False)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        Marks the end of the body and returns the bars it completed.
+
+        Raises:
+            RateLimitedError: If the body is a throttling notice.
+            ProviderError: If the body ended before the series did.
+        """
+        if self.done:
+            return []
+        self._buffer = self._buffer[self._pos:] + self._utf8.decode(b'', final=True)
+        self._pos = 0
+        return self._parse(final=True)
+
+    def _parse(self, final: bool) -> List[Dict[str, Any]]:
+        """Parses as many complete '"date": {...}' entries as the buffer holds."""
+        buffer = self._buffer
+        if not self._in_series:
+            key_at = buffer.find(DAILY_SERIES_KEY)
+            brace_at = buffer.find('{', key_at + len(DAILY_SERIES_KEY)) if key_at >= 0 else -1
+            if brace_at < 0:
+                if final or len(buffer) > MAX_PREAMBLE_SIZE:
+                    _raise_for_body(buffer)
+                return []
+            self._in_series = True
+            self._pos = brace_at + 1
+
+        bars: List[Dict[str, Any]] = []
+        while True:
+            entry_at = _skip(buffer, self._pos, _WHITESPACE + ',')
+            if entry_at < len(buffer) and buffer[entry_at] == '}':
+                self.done = True
+                return bars
+            try:
+                day, after_key = _decoder.raw_decode(buffer, entry_at)
+                colon_at = _skip(buffer, after_key, _WHITESPACE)
+                if colon_at >= len(buffer):
+                    raise ValueError("incomplete entry")
+                details, self._pos = _decoder.raw_decode(buffer, _skip(buffer, colon_at + 1, _WHITESPACE))
+            except ValueError:
+                break  # The entry is split across chunks; wait for more
+
+            if self.end is not None and day > self.end:
+                continue
+            if self.start is not None and day < self.start:
+                self.done = True
+                return bars
+            bars.append({'date': day, 'price': float(details["4. close"])})
+            self._returned += 1
+            if self.limit is not None and self._returned >= self.limit:
+                self.done = True
+                return bars
+
+        if final:
+            raise ProviderError("Daily series response ended unexpectedly")
+        return bars
+
+
+def iter_daily_bars(chunks: Iterable[Union[bytes, str]], start: Optional[str] = None,
+                    end: Optional[str] = None, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Parses a TIME_SERIES_DAILY response with a DailyBarParser and yields its bars as
+    they arrive, without reading the rest of the body once the wanted bars are parsed.
+
+    Args:
+        chunks (Iterable): The response body, as bytes or str chunks.
+        start (str, optional): The oldest date to yield (YYYY-MM-DD), inclusive.
+        end (str, optional): The newest date to yield (YYYY-MM-DD), inclusive.
+        limit (int, optional): The maximum number of bars to yield.
+
+    Yields:
+        Dict: {'date': str, 'price': float} for each bar, newest first.
+
+    Raises:
+        RateLimitedError: If the body is a throttling notice.
+        ProviderError: If the body does not contain a daily series.
+    """
+    parser = DailyBarParser(start=start, end=end, limit=limit)
+    if parser.done:
+        return
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.done:
+            return
+    yield from parser.close()
+
+
+async def read_daily_bars(chunks: AsyncIterable[Union[bytes, str]], start: Optional[str] = None,
+                          end: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Like iter_daily_bars, for a body that arrives as an async stream (e.g. httpx's
+    aiter_bytes). Reading stops once the wanted bars are parsed.
+
+    Returns:
+        List[Dict]: {'date': str, 'price': float} for each bar, newest first.
+    """
+    parser = DailyBarParser(start=start, end=end, limit=limit)
+    bars: List[Dict[str, Any]] = []
+    if parser.done:
+        return bars
+    async for chunk in chunks:
+        bars += parser.feed(chunk)
+        if parser.done:
+            return bars
+    return bars + parser.close()
+
+
+def _raise_for_body(buffer: str) -> None:
+    """Raises the most specific error for a body that has no daily series."""
+    try:
+        data = json.loads(buffer)
+    except ValueError:
+        raise ProviderError("Daily series response is not valid JSON")
+    ProviderClient.raise_if_throttled(data)
+    raise ProviderError(f"Daily series missing from response: {data}")
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """An in-flight call whose result is shared by every caller of the same key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls: while a call for a key is in flight, other
+    callers for the same key wait for it and receive its result (or exception)
+    instead of starting their own.
+
+    Unlike the quote cache, nothing is remembered once the call completes.
+
+    Attributes:
+        shared (int): The number of callers that received another caller's result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Runs fn, or waits for the in-flight call with the same key.
+
+        Args:
+            key (Hashable): Identifies the call, e.g. (function, symbol).
+            fn (Callable): Makes the call.
+
+        Returns:
+            The result of fn.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self) -> int:
+        """Returns the number of keys with a call in flight."""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    The asyncio counterpart of SingleFlight: while a coroutine for a key is running,
+    other callers for the same key await its result instead of starting their own.
+
+    It must only be used from one event loop at a time.
+
+    Attributes:
+        shared (int): The number of callers that received another caller's result.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Awaits fn(), or the in-flight call with the same key.
+
+        Args:
+            key (Hashable): Identifies the call, e.g. (function, symbol).
+            fn (Callable): Returns the awaitable making the call.
+
+        Returns:
+            The result of fn().
+        """
+        call = self._calls.get(key)
+        if call is not None:
+            self.shared += 1
+            # Shielded so a cancelled waiter does not cancel the leader's call
+            return await asyncio.shield(call)
+
+        call = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except BaseException as e:
+            call.set_exception(e)
+            call.exception()  # Retrieved so an error no waiter awaited is not logged as unhandled
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        """Returns the number of keys with a call in flight."""
+        return len(self._calls)
@@ -0,0 +1,56 @@
+import logging
+import sqlite3
+from typing import Any, Dict, Mapping
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from stock_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+def apply_pragmas(connection: sqlite3.Connection, pragmas: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Sets PRAGMAs on a SQLite connection.
+
+    journal_mode is persistent in the database file; the other settings only last
+    as long as the connection, so they must be applied to every new connection.
+
+    Args:
+        connection (sqlite3.Connection): The connection.
+        pragmas (Mapping[str, Any]): Values keyed by PRAGMA name, e.g. {'journal_mode': 'WAL'}.
+
+    Returns:
+        Dict[str, Any]: The value SQLite reports for each PRAGMA afterwards. An in-memory
+            database, for example, reports journal_mode "memory" whatever was asked for.
+    """
+    applied = {}
+    cursor = connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+            row = cursor.execute(f"PRAGMA {name}").fetchone()
+            applied[name] = row[0] if row else None
+    finally:
+        cursor.close()
+    return applied
+
+
+def enable_sqlite_pragmas(engine: Engine, pragmas: Mapping[str, Any]) -> None:
+    """
+    Applies PRAGMAs to every connection the engine opens. Does nothing for other databases.
+
+    Args:
+        engine (Engine): The SQLAlchemy engine, before its first connection.
+        pragmas (Mapping[str, Any]): Values keyed by PRAGMA name.
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection: sqlite3.Connection, connection_record: Any) -> None:
+        applied = apply_pragmas(dbapi_connection, pragmas)
+        logger.debug("Opened SQLite connection with %s", applied)
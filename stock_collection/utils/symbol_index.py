@@ -0,0 +1,142 @@
+from bisect import bisect_left
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from stock_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class _Snapshot:
+    """An immutable view of the symbol universe, swapped in whole on reload."""
+
+    __slots__ = ('names', 'symbols', 'by_name', 'loaded_at')
+
+    def __init__(self, rows: Iterable[Tuple[str, str]], loaded_at: float):
+        self.names: Dict[str, str] = {symbol.upper(): name for symbol, name in rows}
+        self.symbols: List[str] = sorted(self.names)
+        self.by_name: List[Tuple[str, str]] = sorted((name.lower(), symbol) for symbol, name in self.names.items())
+        self.loaded_at = loaded_at
+
+
+class SymbolIndex:
+    """
+    A process-level index of every known stock symbol, so that trades can be validated
+    without a database round trip and symbols can be searched by prefix.
+
+    Symbols are kept in a dictionary for membership tests and in sorted lists of
+    symbols and lower-cased names for prefix search with bisect. Readers use the current
+    snapshot without locking; a reload builds a new snapshot and swaps it in. The index
+    reloads lazily after invalidate() or once it is older than ttl seconds, which bounds
+    how stale it can get when another process writes the stocks table.
+
+    Attributes:
+        ttl (float): The maximum age of the index in seconds before it is reloaded.
+    """
+
+    def __init__(self, loader: Optional[Callable[[], Iterable[Tuple[str, str]]]] = None, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._loader = loader
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+
+    def configure(self, loader: Callable[[], Iterable[Tuple[str, str]]], ttl: float) -> None:
+        """
+        Sets the function that reads (symbol, name) rows from the database, and discards the index.
+
+        Args:
+            loader (Callable): Returns every (symbol, name) pair.
+            ttl (float): The maximum age of the index in seconds.
+        """
+        with self._lock:
+            self._loader = loader
+            self.ttl = ttl
+            self._snapshot = None
+
+    def invalidate(self) -> None:
+        """Discards the index so the next read reloads it."""
+        self._snapshot = None
+
+    def load(self, rows: Iterable[Tuple[str, str]]) -> None:
+        """
+        Replaces the index with the given rows.
+
+        Args:
+            rows (Iterable[Tuple[str, str]]): (symbol, name) pairs.
+        """
+        self._snapshot = _Snapshot(rows, self._clock())
+
+    def _current(self) -> _Snapshot:
+        """Returns the current snapshot, reloading it if it was invalidated or has expired."""
+        snapshot = self._snapshot
+        if snapshot is not None and self._clock() - snapshot.loaded_at < self.ttl:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or self._clock() - snapshot.loaded_at >= self.ttl:
+                rows = self._loader() if self._loader is not None else []
+                snapshot = _Snapshot(rows, self._clock())
+                self._snapshot = snapshot
+                logger.info("Loaded %d symbols into the symbol index", len(snapshot.symbols))
+            return snapshot
+
+    def __len__(self) -> int:
+        return len(self._current().symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._current().names
+
+    def name_of(self, symbol: str) -> Optional[str]:
+        """Returns the company name of a symbol, or None if it is not known."""
+        return self._current().names.get(symbol.upper())
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, str]]:
+        """
+        Finds symbols starting with the query, then companies whose name starts with it.
+
+        Args:
+            query (str): The prefix to search for, case-insensitive.
+            limit (int): The maximum number of results.
+
+        Returns:
+            List[Dict[str, str]]: {'symbol', 'name'} dictionaries, symbol matches first, each group sorted.
+        """
+        snapshot = self._current()
+        query = query.strip()
+        if not query or limit <= 0:
+            return []
+
+        matches: List[str] = []
+        prefix = query.upper()
+        position = bisect_left(snapshot.symbols, prefix)
+        while position < len(snapshot.symbols) and len(matches) < limit:
+            symbol = snapshot.symbols[position]
+            if not symbol.startswith(prefix):
+                break
+            matches.append(symbol)
+            position += 1
+
+        prefix = query.lower()
+        seen = set(matches)
+        position = bisect_left(snapshot.by_name, (prefix, ''))
+        while position < len(snapshot.by_name) and len(matches) < limit:
+            name, symbol = snapshot.by_name[position]
+            if not name.startswith(prefix):
+                break
+            if symbol not in seen:
+                matches.append(symbol)
+                seen.add(symbol)
+            position += 1
+
+        return [{'symbol': symbol, 'name': snapshot.names[symbol]} for symbol in matches]
+
+
+# The process-wide index, given a loader by create_app
+symbol_index = SymbolIndex()
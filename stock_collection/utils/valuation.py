@@ -0,0 +1,283 @@
+from datetime import date
+import logging
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from stock_collection.utils.logger import configure_logger
+from stock_collection.utils.market_data_store import market_data_store
+from stock_collection.utils.price_history import PriceHistory
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+def _json_float(value: float) -> Optional[float]:
+    """Converts a NumPy scalar to a float, or None if it is NaN."""
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+class PortfolioValuation:
+    """
+    The valuation of one portfolio, computed for every holding at once with array
+    operations over aligned quantity and price vectors.
+
+    Cost basis and previous close are optional per holding; where they are unknown
+    (NaN) the unrealized gain or daily P&L of that holding is NaN and it is left out
+    of the totals.
+
+    Attributes:
+        symbols (List[str]): The stock symbols, one per holding.
+        quantities (np.ndarray): The number of shares held (float64).
+        prices (np.ndarray): The current price per share.
+        cost_basis (np.ndarray): The average cost per share, NaN if unknown.
+        previous_close (np.ndarray): The previous closing price per share, NaN if unknown.
+        market_value (np.ndarray): quantities * prices.
+        weights (np.ndarray): Each holding's share of the total market value.
+        daily_pnl (np.ndarray): The change in value since the previous close.
+        unrealized_gain (np.ndarray): The change in value since purchase.
+    """
+
+    def __init__(self, symbols: Sequence[str], quantities: Iterable[float], prices: Iterable[float],
+                 cost_basis: Optional[Iterable[float]] = None, previous_close: Optional[Iterable[float]] = None):
+        self.symbols = list(symbols)
+        count = len(self.symbols)
+        self.quantities = np.fromiter(quantities, dtype=np.float64, count=count)
+        self.prices = np.fromiter(prices, dtype=np.float64, count=count)
+        self.cost_basis = (np.full(count, np.nan) if cost_basis is None
+                           else np.fromiter(cost_basis, dtype=np.float64, count=count))
+        self.previous_close = (np.full(count, np.nan) if previous_close is None
+                               else np.fromiter(previous_close, dtype=np.float64, count=count))
+
+        self.market_value = self.quantities * self.prices
+        total = self.market_value.sum()
+        self.weights = self.market_value / total if total > 0 else np.zeros(count)
+        self.daily_pnl = self.quantities * (self.prices - self.previous_close)
+        self.unrealized_gain = self.quantities * (self.prices - self.cost_basis)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def total_value(self) -> float:
+        """Returns the total market value of the portfolio."""
+        return float(self.market_value.sum())
+
+    @property
+    def total_daily_pnl(self) -> float:
+        """Returns the change in value since the previous close, over holdings with a known close."""
+        return float(np.nansum(self.daily_pnl))
+
+    @property
+    def total_unrealized_gain(self) -> float:
+        """Returns the change in value since purchase, over holdings with a known cost basis."""
+        return float(np.nansum(self.unrealized_gain))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the valuation as JSON-serializable totals and per-holding rows, with
+        unknown values as None.
+        """
+        holdings = [
+            {
+                'symbol': symbol,
+                'quantity': int(quantity),
+                'current_price': _json_float(price),
+                'market_value': _json_float(value),
+                'weight': _json_float(weight),
+                'daily_pnl': _json_float(pnl),
+                'unrealized_gain': _json_float(gain),
+            }
+            for symbol, quantity, price, value, weight, pnl, gain in zip(
+                self.symbols, self.quantities, self.prices, self.market_value,
+                self.weights, self.daily_pnl, self.unrealized_gain)
+        ]
+        return {
+            'total_value': self.total_value,
+            'daily_pnl': self.total_daily_pnl,
+            'unrealized_gain': self.total_unrealized_gain,
+            'holdings': holdings,
+        }
+
+
+def previous_closes(symbols: Sequence[str], asof: Optional[date] = None) -> np.ndarray:
+    """
+    Returns the last stored closing price before a date for each symbol, from the local
+    market data store only, in one grouped query.
+
+    Args:
+        symbols (Sequence[str]): The stock symbols.
+        asof (date, optional): The valuation date. Defaults to today.
+
+    Returns:
+        np.ndarray: The previous closes, NaN where no bar is stored.
+    """
+    stored = market_data_store.closes_before(symbols, (asof or date.today()).isoformat())
+    return np.array([stored.get(symbol, np.nan) for symbol in symbols], dtype=np.float64)
+
+
+def value_portfolios(positions: Sequence[Tuple[int, str, float, float]], prices: Dict[str, float],
+                     previous_close: Optional[Dict[str, float]] = None) -> Dict[int, Dict[str, float]]:
+    """
+    Values many portfolios in a single vectorized pass, for reporting.
+
+    Every position is priced from one vector indexed by symbol, and the per-position
+    values are summed per portfolio with np.bincount, so the cost grows with the number
+    of positions rather than the number of portfolios times a Python loop.
+
+    Args:
+        positions (Sequence[Tuple]): (portfolio_id, symbol, quantity, cost_basis) rows.
+        prices (Dict[str, float]): The current price of each symbol.
+        previous_close (Dict[str, float], optional): The previous close of each symbol.
+
+    Returns:
+        Dict[int, Dict[str, float]]: total_value, daily_pnl and unrealized_gain keyed by portfolio ID.
+            Positions without a price are valued at zero.
+    """
+    if not positions:
+        return {}
+
+    portfolio_ids, symbols, quantities, costs = zip(*positions)
+    portfolio_ids = np.asarray(portfolio_ids, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    costs = np.asarray(costs, dtype=np.float64)
+
+    universe, symbol_index = np.unique(np.asarray(symbols, dtype=object).astype(str), return_inverse=True)
+    price_vector = np.array([prices.get(symbol, np.nan) for symbol in universe], dtype=np.float64)
+    close_vector = np.array([(previous_close or {}).get(symbol, np.nan) for symbol in universe], dtype=np.float64)
+
+    position_prices = price_vector[symbol_index]
+    priced = ~np.isnan(position_prices)
+    market_value = np.where(priced, quantities * position_prices, 0.0)
+    daily_pnl = np.nan_to_num(quantities * (position_prices - close_vector[symbol_index]))
+    unrealized_gain = np.where(priced, quantities * (position_prices - costs), 0.0)
+
+    owners, owner_index = np.unique(portfolio_ids, return_inverse=True)
+    totals = np.bincount(owner_index, weights=market_value, minlength=len(owners))
+    pnl = np.bincount(owner_index, weights=daily_pnl, minlength=len(owners))
+    gains = np.bincount(owner_index, weights=unrealized_gain, minlength=len(owners))
+
+    unpriced = len(universe) - int(np.count_nonzero(~np.isnan(price_vector)))
+    if unpriced:
+        logger.warning("Valued %d positions with no price for %d symbols", int((~priced).sum()), unpriced)
+    logger.info("Valued %d portfolios over %d positions", len(owners), len(positions))
+
+    return {int(owner): {'total_value': float(total), 'daily_pnl': float(day), 'unrealized_gain': float(gain)}
+            for owner, total, day, gain in zip(owners, totals, pnl, gains)}
+
+
+class ValueSeries:
+    """
+    The daily value of a portfolio over a date range.
+
+    Attributes:
+        dates (np.ndarray): The trading dates (datetime64[D]), oldest first.
+        values (np.ndarray): The portfolio value on each date (float64).
+        missing (List[str]): Symbols with no local price data in the range, valued at zero.
+    """
+
+    __slots__ = ('dates', 'values', 'missing')
+
+    def __init__(self, dates: np.ndarray, values: np.ndarray, missing: Optional[List[str]] = None):
+        self.dates = dates
+        self.values = values
+        self.missing = missing or []
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """
+        Returns the total return, annualized volatility of daily returns, and maximum
+        drawdown of the series, or None where there are too few points.
+        """
+        if len(self) < 2 or self.values[0] <= 0:
+            return {'total_return': None, 'volatility': None, 'max_drawdown': None}
+        daily_returns = np.diff(self.values) / self.values[:-1]
+        drawdowns = self.values / np.maximum.accumulate(self.values) - 1
+        return {
+            'total_return': float(self.values[-1] / self.values[0] - 1),
+            'volatility': float(daily_returns.std() * np.sqrt(252)),
+            'max_drawdown': float(drawdowns.min()),
+        }
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Returns the series as {'date', 'value'} dictionaries, oldest first, for JSON responses."""
+        return [{'date': day, 'value': value}
+                for day, value in zip(self.dates.astype(str).tolist(), self.values.tolist())]
+
+
+def _aligned_closes(histories: Sequence[PriceHistory]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Aligns several price histories on the union of their trading dates, carrying each
+    close forward over dates on which that stock did not trade.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The dates, and a (symbols x dates) matrix of
+            closes with NaN before a stock's first bar.
+    """
+    dates = np.unique(np.concatenate([history.dates for history in histories])) if histories \
+        else np.empty(0, dtype='datetime64[D]')
+    closes = np.empty((len(histories), len(dates)))
+    for row, history in enumerate(histories):
+        closes[row] = history.close_asof(dates)
+    return dates, closes
+
+
+def portfolio_value_history(quantities: Dict[str, float], histories: Dict[str, PriceHistory]) -> ValueSeries:
+    """
+    Computes the daily value of a portfolio as a weighted sum of its holdings' aligned
+    closing prices.
+
+    Args:
+        quantities (Dict[str, float]): The number of shares held, keyed by symbol.
+        histories (Dict[str, PriceHistory]): The price history of each symbol over the range.
+
+    Returns:
+        ValueSeries: The value on every date any holding traded. Holdings without a
+            price on a date (before their first bar) count as zero on that date.
+    """
+    symbols = [symbol for symbol in quantities if len(histories.get(symbol, ()))]
+    missing = [symbol for symbol in quantities if symbol not in symbols]
+    dates, closes = _aligned_closes([histories[symbol] for symbol in symbols])
+    weights = np.array([quantities[symbol] for symbol in symbols], dtype=np.float64)
+    return ValueSeries(dates, weights @ np.nan_to_num(closes), missing)
+
+
+def backtest_allocation(allocation: Dict[str, float], histories: Dict[str, PriceHistory],
+                        initial_value: float = 10000.0) -> ValueSeries:
+    """
+    Backtests a buy-and-hold allocation: initial_value is split by the normalized
+    weights and invested on the first date every symbol has a price, then held.
+
+    Args:
+        allocation (Dict[str, float]): The non-negative weight of each symbol.
+        histories (Dict[str, PriceHistory]): The price history of each symbol over the range.
+        initial_value (float): The amount invested.
+
+    Returns:
+        ValueSeries: The value of the allocation from the investment date on.
+
+    Raises:
+        ValueError: If the weights are negative or sum to zero.
+    """
+    weights = np.array(list(allocation.values()), dtype=np.float64)
+    if (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError("Allocation weights must be non-negative and sum to more than zero.")
+
+    symbols = [symbol for symbol in allocation if len(histories.get(symbol, ()))]
+    missing = [symbol for symbol in allocation if symbol not in symbols]
+    if missing:
+        return ValueSeries(np.empty(0, dtype='datetime64[D]'), np.empty(0), missing)
+
+    dates, closes = _aligned_closes([histories[symbol] for symbol in symbols])
+    priced = ~np.isnan(closes).any(axis=0)
+    dates, closes = dates[priced], closes[:, priced]
+    if not len(dates):
+        return ValueSeries(dates, np.empty(0), missing)
+
+    shares = initial_value * (weights / weights.sum()) / closes[:, 0]
+    return ValueSeries(dates, shares @ closes)
@@ -0,0 +1,34 @@
+import pytest
+
+from app import create_app
+from config import TestConfig
+from stock_collection.db import db
+from stock_collection.utils.auth_tokens import token_signer
+
+
+@pytest.fixture
+def app():
+    """Fixture to provide an application bound to a fresh in-memory database."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def session(app):
+    return db.session
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Fixture to build the Authorization header of a logged-in user."""
+    def headers(user_id, username):
+        return {'Authorization': f"Bearer {token_signer.issue(user_id, username)}"}
+    return headers
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+pytest.importorskip('asgiref')
+
+from asgi import create_asgi_app
+from config import TestConfig
+from stock_collection.db import db
+from stock_collection.models.holding_model import Holding
+from stock_collection.models.portfolio_model import PortfolioModel
+from stock_collection.utils import async_market_data
+from stock_collection.utils.auth_tokens import token_signer
+from stock_collection.utils.price_history import PriceHistory
+
+
+@pytest.fixture
+def asgi_app():
+    """Fixture to provide the ASGI entry point bound to a fresh in-memory database."""
+    asgi_app = create_asgi_app(TestConfig)
+    yield asgi_app
+    with asgi_app.flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def call(asgi_app, method, path, **kwargs):
+    """Sends one request to the ASGI app and returns the response."""
+    async def send():
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+            return await client.request(method, path, **kwargs)
+    return asyncio.run(send())
+
+
+def bearer(user_id, username):
+    return {'Authorization': f"Bearer {token_signer.issue(user_id, username)}"}
+
+
+##################################################
+# Async Route Test Cases
+##################################################
+
+def test_look_up_stock_is_served_on_the_event_loop(asgi_app, mocker):
+    """Test that look-ups go through the async fetchers instead of the thread-based model."""
+    mock_look_up = mocker.patch.object(async_market_data, 'look_up_stock', return_value={
+        'current_price': 151.5, 'company_name': 'IBM Corp', 'company_description': 'Computers.',
+        'market_cap': '1000', 'historical_prices': PriceHistory.from_rows('IBM', [('2024-01-04', 151.5)]),
+    })
+    mock_threaded = mocker.patch.object(PortfolioModel, 'look_up_stock')
+
+    response = call(asgi_app, 'GET', '/api/look-up-stock', params={'stock_symbol': 'IBM'})
+
+    assert response.status_code == 200
+    assert response.json()['current_price'] == 151.5
+    assert response.json()['historical_prices'] == [{'date': '2024-01-04', 'price': 151.5}]
+    mock_look_up.assert_awaited_once_with('IBM', timeout=TestConfig.LOOKUP_TIMEOUT)
+    mock_threaded.assert_not_called()
+
+def test_look_up_stock_requires_symbol(asgi_app):
+    """Test that a look-up without a symbol is rejected."""
+    response = call(asgi_app, 'GET', '/api/look-up-stock')
+    assert response.status_code == 400
+    assert response.json() == {'error': 'Stock symbol is required'}
+
+def test_refresh_prices_requires_token(asgi_app):
+    """Test that the async refresh route rejects requests without a bearer token."""
+    assert call(asgi_app, 'POST', '/api/refresh-prices').status_code == 401
+
+def test_refresh_prices_stores_refreshed_prices(asgi_app, mocker):
+    """Test that the async refresh fetches the user's holdings and stores their prices."""
+    with asgi_app.flask_app.app_context():
+        Holding.buy(1, 'IBM', 'IBM', 2, 100.0)
+    mock_refresh = mocker.patch.object(async_market_data, 'refresh_prices', return_value={'IBM': 151.5})
+
+    response = call(asgi_app, 'POST', '/api/refresh-prices', headers=bearer(1, 'alice'))
+
+    assert response.status_code == 200
+    assert response.json() == {'status': 'success', 'prices': {'IBM': 151.5}}
+    assert mock_refresh.await_args.args[0] == ['IBM']
+    with asgi_app.flask_app.app_context():
+        assert Holding.get_holdings(1)[0].current_price == 151.5
+
+def test_other_routes_fall_through_to_flask(asgi_app):
+    """Test that routes without an async version are served by the Flask app."""
+    response = call(asgi_app, 'GET', '/api/health')
+    assert response.status_code == 200
+    assert response.json() == {'status': 'healthy'}
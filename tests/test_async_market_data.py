@@ -0,0 +1,211 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+
+from stock_collection.utils import async_market_data, market_data
+from stock_collection.utils.async_provider_client import AsyncProviderClient
+from stock_collection.utils.market_data_store import MarketDataStore
+from stock_collection.utils.provider_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderClient,
+    ProviderError,
+    RateLimitedError,
+)
+from stock_collection.utils.quote_cache import quote_cache
+from stock_collection.utils.rate_limiter import RequestScheduler
+from stock_collection.utils.series_parser import read_daily_bars
+
+
+PRICE = {'Time Series (5min)': {'2024-01-04 16:00:00': {'4. close': '151.5'}}}
+OVERVIEW = {'Name': 'IBM Corp', 'Description': 'Computers.', 'MarketCapitalization': '1000'}
+DAILY = {'Time Series (Daily)': {'2024-01-04': {'4. close': '151.5'}, '2024-01-03': {'4. close': '150.25'}}}
+
+
+class Provider:
+    """An httpx transport answering each Alpha Vantage function with a canned body."""
+
+    def __init__(self, bodies, delay=0.0):
+        self.bodies = bodies
+        self.delay = delay
+        self.calls = []
+
+    async def handle(self, request):
+        function = request.url.params['function']
+        self.calls.append((function, request.url.params['symbol']))
+        await asyncio.sleep(self.delay)
+        body = self.bodies[function]
+        if isinstance(body, int):
+            return httpx.Response(body)
+        return httpx.Response(200, content=json.dumps(body).encode())
+
+
+@pytest.fixture
+def provider(mocker):
+    """Fixture to route the async fetchers to a fake provider with an ample call budget."""
+    provider = Provider({'TIME_SERIES_INTRADAY': PRICE, 'OVERVIEW': OVERVIEW, 'TIME_SERIES_DAILY': DAILY})
+    client = AsyncProviderClient(settings=ProviderClient(max_retries=0),
+                                 transport=httpx.MockTransport(provider.handle))
+    store = MarketDataStore(':memory:')
+    mocker.patch.object(async_market_data, 'async_provider_client', client)
+    mocker.patch.object(async_market_data, 'request_scheduler', RequestScheduler(per_minute=100, per_day=100))
+    mocker.patch.object(async_market_data, 'market_data_store', store)
+    mocker.patch.object(market_data, 'market_data_store', store)
+    quote_cache.clear()
+    yield provider
+    quote_cache.clear()
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def client(sleeps):
+    async def sleep(delay):
+        sleeps.append(delay)
+    return AsyncProviderClient(settings=ProviderClient(max_retries=2, backoff_factor=0.5,
+                                                       breaker=CircuitBreaker(failure_threshold=2)),
+                               sleep=sleep)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+##################################################
+# Async Provider Client Test Cases
+##################################################
+
+def test_get_json_retries_5xx_with_backoff(client, sleeps):
+    """Test that server errors are retried with the shared backoff policy."""
+    statuses = iter([503, 502, 200])
+    client.configure(transport=httpx.MockTransport(
+        lambda request: httpx.Response(next(statuses), json={'ok': 1})))
+    assert run(client.get_json({})) == {'ok': 1}
+    assert sleeps == [0.5, 1.0]
+
+def test_get_json_raises_on_throttling_notice(client):
+    """Test that a throttling notice in a 200 body is retried, then raised."""
+    client.configure(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, json={'Note': 'API call frequency is 5 calls per minute'})))
+    with pytest.raises(RateLimitedError):
+        run(client.get_json({}))
+
+def test_transport_errors_trip_the_shared_breaker(client):
+    """Test that connection failures become ProviderError and open the breaker shared with the sync client."""
+    def fail(request):
+        raise httpx.ConnectError("refused")
+    client.configure(transport=httpx.MockTransport(fail))
+    for _ in range(2):
+        with pytest.raises(ProviderError):
+            run(client.get_json({}))
+    assert client.settings.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        run(client.get_json({}))
+
+def test_cancelled_call_is_not_a_provider_failure(client):
+    """Test that cancelling an in-flight call does not count against the shared breaker."""
+    async def hang(request):
+        await asyncio.sleep(10)
+
+    async def cancel_calls():
+        client.configure(transport=httpx.MockTransport(hang))
+        for _ in range(3):
+            task = asyncio.ensure_future(client.get_json({}))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    run(cancel_calls())
+    assert client.settings.breaker.state == CircuitBreaker.CLOSED
+
+def test_stream_hands_the_body_over_as_it_arrives(client):
+    """Test that a streamed call parses chunks as they arrive and stops reading once the wanted bars are parsed."""
+    sent = []
+
+    async def body():
+        yield b'{"Time Series (Daily)": {'
+        for day in ('2024-01-04', '2024-01-03', '2024-01-02'):
+            sent.append(day)
+            yield f'"{day}": {{"4. close": "150.0"}},'.encode()
+        yield b'}}'
+
+    async def handle(request):
+        return httpx.Response(200, content=body())
+
+    client.configure(transport=httpx.MockTransport(handle))
+    bars = run(client.stream({}, lambda chunks: read_daily_bars(chunks, start='2024-01-04')))
+    assert bars == [{'date': '2024-01-04', 'price': 150.0}]
+    assert sent == ['2024-01-04', '2024-01-03']
+
+##################################################
+# Async Fetcher Test Cases
+##################################################
+
+def test_concurrent_price_lookups_share_one_request(provider):
+    """Test that concurrent cache misses for one symbol send a single request, then hit the cache."""
+    provider.delay = 0.01
+
+    async def lookups():
+        return await asyncio.gather(*(async_market_data.get_current_price('IBM') for _ in range(50)))
+
+    assert run(lookups()) == [151.5] * 50
+    assert run(async_market_data.get_current_price('IBM')) == 151.5
+    assert provider.calls == [('TIME_SERIES_INTRADAY', 'IBM')]
+
+def test_failed_price_fetch_serves_stale_price(provider):
+    """Test that a failed fetch returns the last known price instead of 0.0."""
+    provider.bodies['TIME_SERIES_INTRADAY'] = 503
+    quote_cache.set('TIME_SERIES_INTRADAY', 'IBM', 150.0, ttl=0)
+    assert run(async_market_data.get_current_price('IBM')) == 150.0
+
+def test_look_up_stock_fetches_concurrently_and_stores(provider):
+    """Test that a look-up gathers the price, overview and history, and persists the history."""
+    details = run(async_market_data.look_up_stock('IBM', timeout=1))
+
+    assert details['current_price'] == 151.5
+    assert details['company_name'] == 'IBM Corp'
+    assert details['company_description'] == 'Computers.'
+    assert details['market_cap'] == '1000'
+    assert details['historical_prices'].to_records()[0] == {'date': '2024-01-04', 'price': 151.5}
+    assert len(market_data.market_data_store.get_daily_history('IBM')) == 2
+
+def test_store_writes_do_not_block_the_event_loop(provider, mocker):
+    """Test that a slow history write runs on a thread while other coroutines keep running."""
+    append = market_data.market_data_store.append_daily_bars
+    mocker.patch.object(market_data.market_data_store, 'append_daily_bars',
+                        side_effect=lambda *args: (time.sleep(0.2), append(*args))[1])
+    ticks = []
+
+    async def tick():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    async def both():
+        return await asyncio.gather(async_market_data.get_stock_history('IBM'), tick())
+
+    history, _ = run(both())
+    assert len(history) == 2
+    assert ticks[-1] - ticks[0] < 0.2
+
+def test_look_up_stock_reports_missing_price(provider):
+    """Test that a look-up without a price returns an error."""
+    provider.bodies['TIME_SERIES_INTRADAY'] = {'Error Message': 'Invalid API call.'}
+    assert run(async_market_data.look_up_stock('NOPE', timeout=1)) == {
+        'error': "Unable to fetch the current price for NOPE."}
+
+def test_refresh_prices_skips_failures(provider, mocker):
+    """Test that a refresh returns the prices that could be fetched, keyed by symbol."""
+    async def get_current_price(symbol, priority):
+        return {'IBM': 151.5, 'AAPL': 0.0}[symbol]
+
+    mocker.patch.object(async_market_data, 'get_current_price', get_current_price)
+    assert run(async_market_data.refresh_prices(['IBM', 'AAPL'], timeout=1)) == {'IBM': 151.5}
@@ -0,0 +1,101 @@
+import pytest
+
+from stock_collection.models.user_model import Users
+from stock_collection.utils.auth_tokens import InvalidTokenError, TokenSigner
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def signer(clock):
+    return TokenSigner(secret=b'secret', ttl=60, clock=clock)
+
+
+##################################################
+# Token Test Cases
+##################################################
+
+def test_issue_and_verify(signer):
+    """Test that an issued token verifies to its user."""
+    claims = signer.verify(signer.issue(7, 'testuser'))
+    assert (claims['sub'], claims['usr'], claims['exp']) == (7, 'testuser', 1060)
+
+def test_forged_token_rejected(signer):
+    """Test that a token signed with another secret or with a modified payload is rejected."""
+    other = TokenSigner(secret=b'other', ttl=60)
+    with pytest.raises(InvalidTokenError, match="Invalid token."):
+        signer.verify(other.issue(7, 'testuser'))
+
+    payload, signature = signer.issue(7, 'testuser').split('.')
+    with pytest.raises(InvalidTokenError, match="Invalid token."):
+        signer.verify(payload[:-2] + 'xx.' + signature)
+    with pytest.raises(InvalidTokenError):
+        signer.verify('garbage')
+
+def test_non_ascii_token_rejected(signer, client):
+    """Test that a token with non-ASCII characters is rejected as invalid rather than raising."""
+    payload, signature = signer.issue(7, 'testuser').split('.')
+    for token in (f"{payload}.{signature[:-1]}é", f"é{payload}.{signature}"):
+        with pytest.raises(InvalidTokenError, match="Invalid token."):
+            signer.verify(token)
+
+    response = client.get('/api/view-portfolio', headers={'Authorization': 'Bearer abc.dé'})
+    assert response.status_code == 401
+
+def test_expired_token_rejected(signer, clock):
+    """Test that a token is rejected once its lifetime has passed."""
+    token = signer.issue(7, 'testuser')
+    clock.now += 60
+    with pytest.raises(InvalidTokenError, match="Token has expired."):
+        signer.verify(token)
+
+def test_revoked_token_rejected(signer, clock):
+    """Test that a revoked token is rejected and forgotten once it would have expired."""
+    token = signer.issue(7, 'testuser')
+    signer.revoke(signer.verify(token))
+    with pytest.raises(InvalidTokenError, match="Token has been revoked."):
+        signer.verify(token)
+
+    clock.now += 120
+    signer.revoke(signer.verify(signer.issue(8, 'other')))
+    assert len(signer._revoked) == 1
+
+##################################################
+# Route Test Cases
+##################################################
+
+def test_login_token_flow(client, session, mocker):
+    """Test that a login token authorizes portfolio routes without a user lookup until logout."""
+    Users.create_user('testuser', 'securepassword123')
+    response = client.post('/api/login', json={'username': 'testuser', 'password': 'securepassword123'})
+    assert response.status_code == 200
+    headers = {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+    lookup = mocker.spy(Users, 'get_id_by_username')
+    check = mocker.spy(Users, 'check_password')
+    response = client.get('/api/calculate-portfolio-value', headers=headers)
+    assert response.get_json() == {'status': 'success', 'value': 0.0}
+    lookup.assert_not_called()
+    check.assert_not_called()
+
+    assert client.post('/api/logout', headers=headers).status_code == 200
+    response = client.get('/api/calculate-portfolio-value', headers=headers)
+    assert response.status_code == 401
+    assert response.get_json()['error'] == "Token has been revoked."
+
+def test_portfolio_route_requires_token(client):
+    """Test that portfolio routes reject requests without a bearer token."""
+    response = client.get('/api/view-portfolio')
+    assert response.status_code == 401
+    assert response.get_json()['error'] == "A bearer token is required."
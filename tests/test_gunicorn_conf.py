@@ -0,0 +1,122 @@
+import os
+import runpy
+
+import pytest
+
+from app import create_app
+from config import ProductionConfig, TestConfig
+from stock_collection.db import db
+from stock_collection.utils.market_data_store import market_data_store
+from stock_collection.utils.rate_limiter import request_scheduler
+
+
+CONF_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+
+
+class RefresherConfig(TestConfig):
+    PRICE_REFRESHER_ENABLED = True
+    PROVIDER_CALLS_PER_MINUTE = 5
+    PROVIDER_CALLS_PER_DAY = 25
+
+
+@pytest.fixture
+def conf():
+    """Fixture to load the gunicorn settings module."""
+    return runpy.run_path(CONF_PATH)
+
+
+@pytest.fixture
+def preloaded_app(tmp_path):
+    """Fixture to provide an app created the way wsgi.py creates it, with the refresher not yet started."""
+    app = create_app(RefresherConfig, start_background_tasks=False)
+    app.config['PRICE_REFRESHER_LOCK'] = str(tmp_path / 'price_refresher.lock')
+    yield app
+    app.extensions['price_refresher'].stop()
+    request_scheduler.configure(per_minute=TestConfig.PROVIDER_CALLS_PER_MINUTE,
+                                per_day=TestConfig.PROVIDER_CALLS_PER_DAY)
+    request_scheduler.record_spend(None)
+    market_data_store.configure(TestConfig.MARKET_DATA_DB_PATH)
+    with app.app_context():
+        db.drop_all()
+
+
+def fake_worker(mocker, app, pid):
+    worker = mocker.Mock(pid=pid, age=pid)
+    worker.app.wsgi.return_value = app
+    return worker
+
+
+##################################################
+# Gunicorn Settings Test Cases
+##################################################
+
+def test_settings_come_from_config(conf):
+    """Test that worker counts and recycling are driven by the configuration."""
+    assert conf['worker_class'] == 'gthread'
+    assert conf['preload_app'] is True
+    assert conf['workers'] == ProductionConfig.WEB_WORKERS
+    assert conf['threads'] == ProductionConfig.WEB_THREADS
+    assert conf['max_requests'] == ProductionConfig.WEB_MAX_REQUESTS
+    assert conf['max_requests_jitter'] == ProductionConfig.WEB_MAX_REQUESTS_JITTER
+
+def test_post_fork_splits_budget_and_elects_one_refresher(conf, preloaded_app, mocker):
+    """Test that each worker gets a share of the call budget and only one runs the refresher."""
+    server = mocker.Mock()
+    server.cfg.workers = 2
+    refresher = preloaded_app.extensions['price_refresher']
+    assert not refresher.running
+
+    conf['post_fork'](server, fake_worker(mocker, preloaded_app, 1))
+    assert refresher.running
+    assert request_scheduler.per_minute == 3
+    assert request_scheduler.per_day == 13
+
+    # A second worker cannot take the lock while the first holds it
+    mock_start = mocker.patch.object(refresher, 'start')
+    runpy.run_path(CONF_PATH)['post_fork'](server, fake_worker(mocker, preloaded_app, 2))
+    mock_start.assert_not_called()
+    assert (request_scheduler.per_minute, request_scheduler.per_day) == (2, 12)
+
+def test_budget_shares_never_exceed_the_quota(preloaded_app, tmp_path, mocker):
+    """Test that workers outnumbering the calls share them exactly, the lowest slots first, and a
+    recycled worker's replacement takes over the freed slot."""
+    server = mocker.Mock()
+    server.cfg.workers = 7
+    preloaded_app.config['WEB_WORKER_SLOT_LOCK'] = str(tmp_path / 'worker_slot.lock')
+    mocker.patch.object(preloaded_app.extensions['price_refresher'], 'start')
+
+    shares, workers = [], []
+    for pid in range(1, 8):
+        workers.append(runpy.run_path(CONF_PATH))  # Each worker process has its own copy, holding its slot
+        workers[-1]['post_fork'](server, fake_worker(mocker, preloaded_app, pid))
+        shares.append((request_scheduler.per_minute, request_scheduler.per_day))
+    assert shares == [(1, 4)] * 4 + [(1, 3)] + [(0, 3)] * 2
+
+    workers[2]['post_fork'].__globals__['_slot_lock'].close()  # The worker in slot 2 exits
+    runpy.run_path(CONF_PATH)['post_fork'](server, fake_worker(mocker, preloaded_app, 8))
+    assert (request_scheduler.per_minute, request_scheduler.per_day) == (1, 4)
+
+def test_replacement_worker_does_not_regain_spent_calls(preloaded_app, tmp_path, mocker):
+    """Test that a worker replacing a recycled one starts with what is left of the slot's daily
+    share, and with none once the provider reported the daily quota as spent."""
+    server = mocker.Mock()
+    server.cfg.workers = 2
+    preloaded_app.config['WEB_WORKER_SLOT_LOCK'] = str(tmp_path / 'worker_slot.lock')
+    preloaded_app.config['MARKET_DATA_DB_PATH'] = str(tmp_path / 'market_data.db')
+    mocker.patch.object(preloaded_app.extensions['price_refresher'], 'start')
+
+    worker = runpy.run_path(CONF_PATH)
+    worker['post_fork'](server, fake_worker(mocker, preloaded_app, 1))
+    assert request_scheduler.remaining_daily() == 13
+    for _ in range(3):
+        assert request_scheduler.try_acquire() == 0.0
+
+    worker['post_fork'].__globals__['_slot_lock'].close()  # The worker is recycled
+    worker = runpy.run_path(CONF_PATH)
+    worker['post_fork'](server, fake_worker(mocker, preloaded_app, 3))
+    assert request_scheduler.remaining_daily() == 10
+
+    request_scheduler.exhaust_daily()
+    worker['post_fork'].__globals__['_slot_lock'].close()
+    runpy.run_path(CONF_PATH)['post_fork'](server, fake_worker(mocker, preloaded_app, 4))
+    assert (request_scheduler.per_day, request_scheduler.remaining_daily()) == (13, 0)
@@ -0,0 +1,175 @@
+import pytest
+
+from stock_collection.models.holding_model import Holding
+from stock_collection.models.portfolio_model import PortfolioModel
+from stock_collection.models.user_model import Users
+
+
+@pytest.fixture
+def user_id(session):
+    Users.create_user('testuser', 'securepassword123')
+    return Users.get_id_by_username('testuser')
+
+
+##################################################
+# Buying Test Cases
+##################################################
+
+def test_buy_creates_holding(user_id):
+    """Test that buying a stock that is not held creates a holding at the purchase price."""
+    assert Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 100.0) == 5
+    holding = Holding.get_holdings(user_id)[0]
+    assert (holding.symbol, holding.quantity, holding.purchase_price) == ('IBM', 5, 100.0)
+
+def test_buy_adds_to_holding_and_averages_cost(user_id):
+    """Test that buying more shares increments the quantity and averages the cost."""
+    Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 100.0)
+    assert Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 120.0) == 10
+    holding = Holding.get_holdings(user_id)[0]
+    assert holding.purchase_price == pytest.approx(110.0)
+    assert holding.current_price == 120.0
+
+def test_holdings_are_per_user(session, user_id):
+    """Test that each user only sees their own holdings."""
+    Users.create_user('otheruser', 'password')
+    other_id = Users.get_id_by_username('otheruser')
+    Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 100.0)
+    assert Holding.get_holdings(other_id) == []
+
+##################################################
+# Selling Test Cases
+##################################################
+
+def test_sell_decrements_holding(user_id):
+    """Test that selling shares decrements the quantity."""
+    Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 100.0)
+    assert Holding.sell(user_id, 'IBM', 2) == 3
+
+def test_sell_all_deletes_holding(user_id):
+    """Test that selling every share removes the holding."""
+    Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 100.0)
+    assert Holding.sell(user_id, 'IBM', 5) == 0
+    assert Holding.get_holdings(user_id) == []
+
+def test_sell_more_than_held(user_id):
+    """Test error when selling more shares than are held."""
+    Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 100.0)
+    with pytest.raises(ValueError, match="Not enough shares of IBM to sell. You have 5 shares."):
+        Holding.sell(user_id, 'IBM', 6)
+    assert Holding.get_holdings(user_id)[0].quantity == 5
+
+def test_sell_not_held(user_id):
+    """Test error when selling a stock that is not held."""
+    with pytest.raises(KeyError, match="Stock IBM is not in the portfolio."):
+        Holding.sell(user_id, 'IBM', 1)
+
+##################################################
+# Price and User Test Cases
+##################################################
+
+def test_update_prices(user_id):
+    """Test that refreshed prices are written to every holding of the symbol in one batch."""
+    Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 100.0)
+    Holding.buy(user_id, 'AAPL', 'Apple Inc', 1, 200.0)
+    Holding.update_prices({'IBM': 105.0, 'MSFT': 400.0})
+    prices = {holding.symbol: holding.current_price for holding in Holding.get_holdings(user_id)}
+    assert prices == {'AAPL': 200.0, 'IBM': 105.0}
+    assert sorted(Holding.held_symbols()) == ['AAPL', 'IBM']
+
+def test_delete_user_deletes_holdings(user_id):
+    """Test that deleting a user also deletes their holdings."""
+    Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 100.0)
+    Users.delete_user('testuser')
+    assert Holding.held_symbols() == []
+
+##################################################
+# Per-User Portfolio Test Cases
+##################################################
+
+def test_portfolio_persists_trades(user_id, mocker):
+    """Test that a user's portfolio writes trades through and reloads them in a new instance."""
+    mocker.patch('stock_collection.utils.market_data.get_current_price', return_value=100.0)
+    portfolio = PortfolioModel(user_id=user_id)
+    assert portfolio.buy_stock('IBM', 'IBM Common Stock', 5) == 5
+    assert portfolio.sell_stock('IBM', 2) == 3
+
+    reloaded = PortfolioModel(user_id=user_id)
+    assert reloaded.stock_list['IBM'].quantity == 3
+    assert reloaded.calculate_portfolio_value() == 300.0
+
+def test_portfolio_valuation_uses_cost_basis(user_id, mocker):
+    """Test that the valuation of a user's portfolio reports the gain over the average cost."""
+    mocker.patch('stock_collection.utils.market_data.get_current_price', return_value=100.0)
+    PortfolioModel(user_id=user_id).buy_stock('IBM', 'IBM Common Stock', 5)
+    Holding.update_prices({'IBM': 110.0})
+
+    valuation = PortfolioModel(user_id=user_id).valuation()
+    assert valuation.total_value == 550.0
+    assert valuation.total_unrealized_gain == 50.0
+
+def test_value_portfolios_command(app, user_id):
+    """Test that the reporting command values every user's portfolio in one CSV."""
+    Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 100.0)
+    result = app.test_cli_runner().invoke(args=['value-portfolios'])
+    assert result.stdout.splitlines() == ['user_id,total_value,daily_pnl,unrealized_gain',
+                                          f'{user_id},500.00,0.00,0.00']
+
+##################################################
+# Batch Trade Test Cases
+##################################################
+
+def test_apply_trades_replays_orders_in_sequence(user_id):
+    """Test that a batch can sell shares bought earlier in the same batch."""
+    Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 100.0)
+    quantities = Holding.apply_trades(user_id, [
+        ('buy', 'AAPL', 'Apple Inc', 4),
+        ('sell', 'AAPL', 'Apple Inc', 1),
+        ('sell', 'IBM', 'IBM Common Stock', 5),
+    ], {'AAPL': 200.0})
+
+    assert quantities == {'IBM': 0, 'AAPL': 3}
+    assert [(h.symbol, h.quantity, h.purchase_price) for h in Holding.get_holdings(user_id)] == [('AAPL', 3, 200.0)]
+
+def test_apply_trades_is_all_or_nothing(user_id):
+    """Test that one unfillable order leaves every holding untouched."""
+    Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 100.0)
+    with pytest.raises(ValueError, match="Not enough shares of IBM to sell. You have 7 shares."):
+        Holding.apply_trades(user_id, [('buy', 'AAPL', 'Apple Inc', 4), ('buy', 'IBM', 'IBM Common Stock', 2),
+                                       ('sell', 'IBM', 'IBM Common Stock', 8)], {'AAPL': 200.0, 'IBM': 110.0})
+    assert [(h.symbol, h.quantity) for h in Holding.get_holdings(user_id)] == [('IBM', 5)]
+
+def test_apply_trades_detects_concurrent_change(session, user_id, mocker):
+    """Test that the batch is rolled back if a holding changed after it was read."""
+    Holding.buy(user_id, 'IBM', 'IBM Common Stock', 5, 100.0)
+    execute = session.execute
+
+    def sell_after_read(statement, *args, **kwargs):
+        result = execute(statement, *args, **kwargs)
+        if statement.is_select:
+            # Another worker sells a share between the read and the write
+            execute(Holding.__table__.update().values(quantity=4))
+        return result
+
+    mocker.patch.object(session, 'execute', side_effect=sell_after_read)
+    with pytest.raises(RuntimeError, match="no trades were applied"):
+        Holding.apply_trades(user_id, [('sell', 'IBM', 'IBM Common Stock', 2)], {})
+    mocker.stopall()
+
+def test_batch_trade_endpoint(client, user_id, auth_headers, mocker):
+    """Test that the batch endpoint prices every bought stock once and reports the new quantities."""
+    get_price = mocker.patch('stock_collection.utils.market_data.get_current_price', return_value=100.0)
+    response = client.post('/api/batch-trade', headers=auth_headers(user_id, 'testuser'), json={'trades': [
+        {'side': 'buy', 'symbol': 'IBM', 'name': 'IBM Common Stock', 'quantity': 5},
+        {'side': 'buy', 'symbol': 'IBM', 'quantity': 1},
+        {'side': 'sell', 'symbol': 'IBM', 'quantity': 2},
+    ]})
+    assert response.status_code == 201
+    assert response.get_json()['quantities'] == {'IBM': 4}
+    assert get_price.call_count == 1
+
+    response = client.post('/api/batch-trade', headers=auth_headers(user_id, 'testuser'), json={'trades': [
+        {'side': 'sell', 'symbol': 'IBM', 'quantity': 1},
+        {'side': 'sell', 'symbol': 'AAPL', 'quantity': 1},
+    ]})
+    assert response.status_code == 400
+    assert Holding.get_holdings(user_id)[0].quantity == 4
@@ -0,0 +1,78 @@
+import io
+import time
+
+import pytest
+
+from stock_collection.db import db
+from stock_collection.models.listing_model import Listing
+from stock_collection.utils.listings import read_listings
+from stock_collection.utils.symbol_index import symbol_index
+
+
+##################################################
+# Listing File Test Cases
+##################################################
+
+def test_read_listings_normalizes_rows():
+    """Test that symbols are upper-cased, duplicates keep the last row and bad rows are skipped."""
+    listing = io.StringIO("Symbol,Security Name,Exchange\n"
+                          "aapl,Apple Inc.,NASDAQ\n"
+                          ",No Symbol,NYSE\n"
+                          "AAPL,Apple Inc,NASDAQ\n"
+                          "IBM,International Business Machines,\n")
+    listings, skipped = read_listings(listing)
+    assert listings == [{'symbol': 'AAPL', 'name': 'Apple Inc', 'exchange': 'NASDAQ'},
+                        {'symbol': 'IBM', 'name': 'International Business Machines', 'exchange': None}]
+    assert skipped == 1
+
+def test_read_listings_requires_columns():
+    """Test error when the listing file has no name column."""
+    with pytest.raises(ValueError, match="Listing file must have symbol and name columns."):
+        read_listings(io.StringIO("symbol,exchange\nIBM,NYSE\n"))
+
+##################################################
+# Bulk Import Test Cases
+##################################################
+
+def test_import_listings_is_idempotent(session):
+    """Test that re-importing the same listings changes nothing and keeps stored prices."""
+    rows = [{'symbol': 'IBM', 'name': 'International Business Machines', 'exchange': 'NYSE'}]
+    assert Listing.import_listings(rows) == 1
+    session.get(Listing, 'IBM').price = 150.0
+    session.commit()
+
+    assert Listing.import_listings(rows) == 0
+    assert Listing.import_listings([{**rows[0], 'exchange': 'NASDAQ'}]) == 1
+    listing = session.get(Listing, 'IBM')
+    session.refresh(listing)
+    assert (listing.exchange, listing.price) == ('NASDAQ', 150.0)
+    assert 'IBM' in symbol_index
+
+def test_import_listings_large_file(session):
+    """Test that 10k listings are imported in batches within seconds."""
+    rows = [{'symbol': f"T{i:05d}", 'name': f"Company {i}", 'exchange': 'NYSE'} for i in range(10000)]
+    batches = []
+
+    started = time.perf_counter()
+    assert Listing.import_listings(rows, batch_size=2000, progress=batches.append) == 10000
+    assert time.perf_counter() - started < 5
+    assert batches == [2000, 4000, 6000, 8000, 10000]
+    assert db.session.query(Listing).count() == 10000
+
+def test_import_symbols_command(app, tmp_path):
+    """Test that the CLI command reports inserted, unchanged and skipped rows."""
+    listing = tmp_path / 'listing.csv'
+    listing.write_text("symbol,name,exchange\nIBM,International Business Machines,NYSE\nTOOLONGSYMBOL,X,NYSE\n")
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['import-symbols', str(listing)])
+    assert "Imported 1 symbols (1 inserted or updated, 0 unchanged, 1 rows skipped)." in result.stdout
+    result = runner.invoke(args=['import-symbols', str(listing)])
+    assert "(0 inserted or updated, 1 unchanged, 1 rows skipped)" in result.stdout
+
+def test_import_listings_stores_no_placeholder_prices(session):
+    """Test that imported listings carry only universe columns and stay unpriced until a price is stored."""
+    Listing.import_listings([{'symbol': 'IBM', 'name': 'International Business Machines'}])
+    listing = session.get(Listing, 'IBM')
+    assert (listing.price, listing.last_updated) == (None, None)
+    assert 'quantity' not in Listing.__table__.columns
@@ -0,0 +1,71 @@
+import io
+import json
+import logging
+
+import pytest
+
+from stock_collection.utils.logger import LogPipeline
+
+
+@pytest.fixture
+def stream():
+    return io.StringIO()
+
+
+@pytest.fixture
+def pipeline(stream):
+    """Fixture to provide a logging pipeline writing to a string buffer."""
+    pipeline = LogPipeline(level='INFO', fmt='json', stream=stream)
+    yield pipeline
+    pipeline.stop()
+
+
+def make_logger(name):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.handlers.clear()
+    return logger
+
+
+##################################################
+# Logging Pipeline Test Cases
+##################################################
+
+def test_records_are_written_as_json_by_the_listener(pipeline, stream):
+    """Test that records are written by the listener thread as one JSON object per line, with extra fields."""
+    logger = make_logger('test.json')
+    pipeline.attach(logger)
+    logger.info("Bought %d shares of %s", 5, 'IBM', extra={'user_id': 7})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Trade failed")
+    pipeline.stop()
+
+    first, second = (json.loads(line) for line in stream.getvalue().splitlines())
+    assert first['message'] == 'Bought 5 shares of IBM'
+    assert first['level'] == 'INFO' and first['logger'] == 'test.json' and first['user_id'] == 7
+    assert 'ValueError: boom' in second['exception']
+
+def test_handlers_are_attached_once(pipeline):
+    """Test that configuring a logger repeatedly does not add duplicate handlers."""
+    logger = make_logger('test.dedup')
+    for _ in range(3):
+        pipeline.attach(logger)
+    assert len(logger.handlers) == 1
+
+def test_level_applies_to_configured_loggers(pipeline, stream):
+    """Test that disabled levels are filtered by the logger, before a record is created."""
+    logger = make_logger('test.level')
+    pipeline.attach(logger)
+    assert not logger.isEnabledFor(logging.DEBUG)
+    pipeline.configure(level='DEBUG', fmt='text')
+    assert logger.isEnabledFor(logging.DEBUG)
+    logger.debug("Holding %s", 'IBM')
+    pipeline.stop()
+    assert stream.getvalue().rstrip().endswith('test.level - DEBUG - Holding IBM')
+
+def test_unknown_level_is_rejected(pipeline):
+    """Test that an unknown level name is rejected."""
+    with pytest.raises(ValueError, match="Unknown log level"):
+        pipeline.configure(level='LOUD')
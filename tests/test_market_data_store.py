@@ -0,0 +1,92 @@
+import pytest
+
+from stock_collection.utils import market_data
+from stock_collection.utils.market_data_store import MarketDataStore
+from stock_collection.utils.quote_cache import quote_cache
+
+
+@pytest.fixture
+def store(mocker):
+    """Fixture to provide an empty in-memory store used by the market data fetchers."""
+    store = MarketDataStore(':memory:')
+    mocker.patch.object(market_data, 'market_data_store', store)
+    quote_cache.clear()
+    yield store
+    quote_cache.clear()
+
+
+def daily_response(*bars):
+    return {'Time Series (Daily)': {day: {'4. close': str(close)} for day, close in bars}}
+
+
+def mock_stream(mocker, body):
+    """Patches the streaming query to feed body to the parser in small chunks."""
+    import json
+    raw = json.dumps(body).encode()
+    return mocker.patch.object(market_data, '_stream_query', side_effect=lambda params, consume, priority:
+                               consume(raw[i:i + 7] for i in range(0, len(raw), 7)))
+
+
+##################################################
+# Store Test Cases
+##################################################
+
+def test_append_daily_bars_is_idempotent(store):
+    """Test that appending the same bars twice only stores them once."""
+    bars = [{'date': '2024-01-02', 'price': 155.0}, {'date': '2024-01-01', 'price': 145.0}]
+    assert store.append_daily_bars('IBM', bars) == 2
+    assert store.append_daily_bars('IBM', bars) == 0
+    assert store.get_daily_bars('IBM') == bars
+    assert store.latest_bar_date('IBM') == '2024-01-02'
+
+def test_closes_before_reads_all_symbols_at_once(store, mocker):
+    """Test that the newest close before a date is read for every symbol in one batched query."""
+    store.append_daily_bars('IBM', [{'date': '2024-01-02', 'price': 100.0}, {'date': '2024-01-03', 'price': 101.0},
+                                    {'date': '2024-01-04', 'price': 102.0}])
+    store.append_daily_bars('AAPL', [{'date': '2024-01-01', 'price': 180.0}])
+    mocker.patch('stock_collection.utils.market_data_store.SYMBOLS_PER_QUERY', 2)
+
+    assert store.closes_before(['IBM', 'AAPL', 'MSFT', 'IBM'], '2024-01-04') == {'IBM': 101.0, 'AAPL': 180.0}
+
+def test_save_and_get_overview(store):
+    """Test storing and reading back a company overview."""
+    store.save_overview('IBM', {'name': 'IBM', 'description': 'A tech company.', 'market_cap': '1000'})
+    overview = store.get_overview('IBM')
+    assert overview['description'] == 'A tech company.'
+    assert overview['market_cap'] == '1000'
+
+##################################################
+# Read-through / Write-back Test Cases
+##################################################
+
+def test_history_read_through_after_restart(store, mocker):
+    """Test that a cold cache is answered from the store without calling the API."""
+    mock_query = mock_stream(mocker, daily_response(('2024-01-02', 155.0)))
+    assert market_data.get_stock_history('IBM').to_records() == [{'date': '2024-01-02', 'price': 155.0}]
+
+    quote_cache.clear()  # Simulate a restart
+    assert market_data.get_stock_history('IBM').to_records() == [{'date': '2024-01-02', 'price': 155.0}]
+    assert mock_query.call_count == 1
+
+def test_history_incremental_refresh(store, mocker):
+    """Test that a stale history only fetches the compact series and appends new bars."""
+    from datetime import date, timedelta
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    today = date.today().isoformat()
+    store.append_daily_bars('IBM', [{'date': yesterday, 'price': 145.0}])
+    store._conn.execute("UPDATE history_refreshes SET refreshed_at = 0")
+
+    mock_query = mock_stream(mocker, daily_response((today, 155.0), (yesterday, 999.0)))
+    history = market_data.get_stock_history('IBM')
+
+    assert mock_query.call_args[0][0]['outputsize'] == 'compact'
+    assert history.to_records() == [{'date': today, 'price': 155.0}, {'date': yesterday, 'price': 145.0}]
+
+def test_overview_write_back(store, mocker):
+    """Test that a fetched description is written back and reused after a restart."""
+    mock_query = mocker.patch.object(market_data, '_query', return_value={'Name': 'IBM', 'Description': 'A tech company.'})
+    assert market_data.get_stock_description('IBM') == 'A tech company.'
+
+    quote_cache.clear()
+    assert market_data.get_stock_description('IBM') == 'A tech company.'
+    assert mock_query.call_count == 1
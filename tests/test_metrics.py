@@ -0,0 +1,99 @@
+import pytest
+
+from app import create_app
+from config import TestConfig
+from stock_collection.db import db
+from stock_collection.utils.metrics import Metrics, metrics
+from stock_collection.utils.provider_client import ProviderClient, ProviderError
+from stock_collection.utils.quote_cache import quote_cache
+
+
+@pytest.fixture
+def metrics_client():
+    """Fixture to provide a test client of an application with metrics enabled."""
+    class MetricsConfig(TestConfig):
+        METRICS_ENABLED = True
+
+    app = create_app(MetricsConfig)
+    metrics.reset()
+    with app.app_context():
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+    metrics.configure(enabled=False)
+    metrics.reset()
+
+
+##################################################
+# Registry Test Cases
+##################################################
+
+def test_histograms_render_cumulative_buckets():
+    """Test that histograms are exported with cumulative buckets, sum and count."""
+    registry = Metrics(enabled=True, buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        registry.observe('db_query_duration_seconds', value, operation='SELECT')
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ['# HELP db_query_duration_seconds App database statement latency by operation.',
+                         '# TYPE db_query_duration_seconds histogram']
+    assert lines[2:] == [
+        'db_query_duration_seconds_bucket{operation="SELECT",le="0.1"} 1',
+        'db_query_duration_seconds_bucket{operation="SELECT",le="1.0"} 3',
+        'db_query_duration_seconds_bucket{operation="SELECT",le="+Inf"} 4',
+        'db_query_duration_seconds_sum{operation="SELECT"} 4.05',
+        'db_query_duration_seconds_count{operation="SELECT"} 4',
+    ]
+
+def test_disabled_registry_records_nothing():
+    """Test that nothing is recorded while metrics are disabled."""
+    registry = Metrics()
+    registry.observe('db_query_duration_seconds', 0.5, operation='SELECT')
+    with registry.timed('provider_call_duration_seconds', function='OVERVIEW'):
+        pass
+    assert registry.render() == '\n'
+
+def test_timed_labels_the_outcome():
+    """Test that timed blocks are labelled by whether they raised, and label values are escaped."""
+    registry = Metrics(enabled=True)
+    with pytest.raises(ProviderError):
+        with registry.timed('provider_call_duration_seconds', function='A "quoted"\\name'):
+            raise ProviderError("down")
+    assert 'provider_call_duration_seconds_count{function="A \\"quoted\\"\\\\name",outcome="error"} 1' \
+        in registry.render()
+
+def test_provider_calls_are_timed_per_function(mocker):
+    """Test that provider calls record their latency by Alpha Vantage function."""
+    registry = Metrics(enabled=True)
+    mocker.patch('stock_collection.utils.provider_client.metrics', registry)
+    client = ProviderClient(max_retries=0)
+    response = mocker.Mock(status_code=200, headers={})
+    response.json.return_value = {'ok': 1}
+    mocker.patch.object(client.session, 'get', return_value=response)
+
+    client.get_json({'function': 'OVERVIEW', 'symbol': 'IBM'})
+
+    assert 'provider_call_duration_seconds_count{function="OVERVIEW",outcome="success"} 1' in registry.render()
+
+##################################################
+# Route Test Cases
+##################################################
+
+def test_metrics_route_is_absent_when_disabled(client, app):
+    """Test that no metrics route or request hooks are installed unless enabled."""
+    assert client.get('/api/metrics').status_code == 404
+    assert not app.before_request_funcs
+
+def test_requests_queries_and_hashes_are_exported(metrics_client):
+    """Test that route latency, database statements, password hashing and cache hit rates are exported."""
+    metrics_client.post('/api/create-account', json={'username': 'alice', 'password': 'secret'})
+    metrics_client.get('/api/no-such-route')
+
+    body = metrics_client.get('/api/metrics').get_data(as_text=True)
+
+    assert 'http_request_duration_seconds_count{method="POST",route="/api/create-account",status="201"} 1' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1' in body
+    assert 'db_query_duration_seconds_count{operation="INSERT"}' in body
+    assert 'password_hash_duration_seconds_count{operation="hash",outcome="success"} 1' in body
+    assert f'cache_lookups_total{{cache="quote",result="hit"}} {quote_cache.hits}' in body
+    assert '# TYPE cache_hit_ratio gauge' in body
@@ -0,0 +1,71 @@
+import hashlib
+import threading
+
+import pytest
+
+from stock_collection.utils.password_hasher import HasherBusyError, PasswordHasher
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(pbkdf2_iterations=1000, max_workers=1, max_queue=0)
+    yield hasher
+    hasher.shutdown()
+
+
+##################################################
+# Hashing Test Cases
+##################################################
+
+def test_hash_and_verify(hasher):
+    """Test that a hashed password verifies and stores its parameters."""
+    salt, hashed, scheme = hasher.hash('secret')
+    assert scheme == 'pbkdf2_sha256$1000'
+    assert len(salt) == 32 and len(hashed) == 64
+    assert hasher.verify('secret', salt, hashed, scheme) is True
+    assert hasher.verify('wrong', salt, hashed, scheme) is False
+
+def test_scrypt_scheme():
+    """Test that scrypt hashes carry their cost parameters."""
+    hasher = PasswordHasher(scheme='scrypt', scrypt_n=2 ** 10, max_workers=1)
+    salt, hashed, scheme = hasher.hash('secret')
+    assert scheme == 'scrypt$1024$8$1'
+    assert hasher.verify('secret', salt, hashed, scheme) is True
+    hasher.shutdown()
+
+def test_verify_legacy_sha256(hasher):
+    """Test that rows hashed with the legacy single SHA-256 still verify and need a rehash."""
+    salt = 'ab' * 16
+    legacy = hashlib.sha256(('secret' + salt).encode()).hexdigest()
+    assert hasher.verify('secret', salt, legacy, 'sha256') is True
+    assert hasher.needs_rehash('sha256') is True
+    assert hasher.needs_rehash('pbkdf2_sha256$500') is True
+    assert hasher.needs_rehash(hasher.current_scheme) is False
+
+def test_unknown_scheme(hasher):
+    """Test error when configuring an unknown scheme."""
+    with pytest.raises(ValueError, match="Unknown password hash scheme: md5"):
+        hasher.configure(scheme='md5')
+
+##################################################
+# Worker Pool Test Cases
+##################################################
+
+def test_saturated_pool_rejects_work(hasher, mocker):
+    """Test that hashes beyond the pool and queue bound fail fast instead of piling up."""
+    started, release = threading.Event(), threading.Event()
+
+    def slow_derive(*args):
+        started.set()
+        release.wait(1)
+        return ''
+
+    mocker.patch.object(hasher, 'derive', side_effect=slow_derive)
+    worker = threading.Thread(target=hasher.verify, args=('secret', '', '', 'sha256'))
+    worker.start()
+    started.wait(1)
+
+    with pytest.raises(HasherBusyError):
+        hasher.verify('secret', '', '', 'sha256')
+    release.set()
+    worker.join()
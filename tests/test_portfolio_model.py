@@ -90,3 +90,71 @@ def test_get_current_price(portfolio_model, sample_stock1, sample_stock2):
         pytest.fail("get_current_price rased ValueError unexpectedly on portfolio value")
 
     
+##################################################
+# Concurrent Price Refresh Test Cases
+##################################################
+
+def test_refresh_prices(portfolio_model, mocker):
+    """Test that refresh_prices updates every holding and values the portfolio in one pass"""
+    portfolio_model.stock_list = {
+        'IBM': Stock('IBM', 'IBM Common Stock', 5, 100.0),
+        'MBG.DEX': Stock('MBG.DEX', 'Mercedes Benz Group AG', 4, 70.0),
+    }
+    prices = {'IBM': 110.0, 'MBG.DEX': 0.0}
+    mocker.patch('stock_collection.models.portfolio_model.market_data.get_current_price',
+                 side_effect=lambda symbol, priority: prices[symbol])
+
+    value = portfolio_model.calculate_portfolio_value(refresh=True)
+
+    assert portfolio_model.stock_list['IBM'].current_price == 110.0
+    assert portfolio_model.stock_list['MBG.DEX'].current_price == 70.0  # Failed fetch keeps the old price
+    assert value == 5 * 110.0 + 4 * 70.0
+
+def test_view_portfolio_lists_holdings(portfolio_model, sample_stock1, capsys):
+    """Test that view_portfolio returns each holding with its value instead of printing it"""
+    portfolio_model.stock_list = {'IBM': sample_stock1}
+    assert portfolio_model.view_portfolio() == [{'symbol': 'IBM', 'name': 'IBM Common Stock', 'quantity': 5,
+                                                 'current_price': 109.2, 'total_value': 5 * 109.2}]
+    assert capsys.readouterr().out == ''
+
+def test_refresh_prices_timeout(mocker):
+    """Test that a slow quote does not hold up the refresh past its timeout"""
+    import threading
+    release = threading.Event()
+    portfolio_model = PortfolioModel(refresh_workers=2, refresh_timeout=0.05)
+    portfolio_model.stock_list = {'IBM': Stock('IBM', 'IBM Common Stock', 5, 100.0)}
+    mocker.patch('stock_collection.models.portfolio_model.market_data.get_current_price',
+                 side_effect=lambda symbol, priority: release.wait(1) and 110.0)
+
+    assert portfolio_model.refresh_prices() == {}
+    assert portfolio_model.stock_list['IBM'].current_price == 100.0
+    release.set()
+
+##################################################
+# Batch Trade Test Cases
+##################################################
+
+def test_execute_trades_all_or_nothing(portfolio_model, mocker):
+    """Test that a failing order in a batch leaves the in-memory portfolio untouched"""
+    portfolio_model.stock_list = {'IBM': Stock('IBM', 'IBM Common Stock', 5, 100.0)}
+    mocker.patch('stock_collection.models.portfolio_model.market_data.get_current_price', return_value=50.0)
+
+    with pytest.raises(ValueError):
+        portfolio_model.execute_trades([('buy', 'AAPL', 'Apple Inc', 2), ('sell', 'IBM', 'IBM Common Stock', 6)])
+    assert list(portfolio_model.stock_list) == ['IBM']
+    assert portfolio_model.stock_list['IBM'].quantity == 5
+
+    assert portfolio_model.execute_trades([('buy', 'AAPL', 'Apple Inc', 2),
+                                           ('sell', 'IBM', 'IBM Common Stock', 1)]) == {'AAPL': 2, 'IBM': 4}
+
+def test_execute_trades_stages_fresh_holdings(portfolio_model, mocker):
+    """Test that a batch is staged on new holding objects rather than copies sharing their ORM state"""
+    original = Stock('IBM', 'IBM Common Stock', 5, 100.0)
+    portfolio_model.stock_list = {'IBM': original}
+    mocker.patch('stock_collection.models.portfolio_model.market_data.get_current_price', return_value=50.0)
+
+    portfolio_model.execute_trades([('sell', 'IBM', 'IBM Common Stock', 2)])
+
+    assert original.quantity == 5
+    assert portfolio_model.stock_list['IBM'] is not original
+    assert portfolio_model.stock_list['IBM'].quantity == 3
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from stock_collection.utils.price_history import PriceHistory
+
+
+@pytest.fixture
+def history():
+    return PriceHistory.from_bars('IBM', [
+        {'date': '2024-01-05', 'price': 152.0},
+        {'date': '2024-01-02', 'price': 145.0},
+        {'date': '2024-01-03', 'price': 150.0},
+        {'date': '2024-01-04', 'price': 148.0},
+    ])
+
+
+##################################################
+# Columnar History Test Cases
+##################################################
+
+def test_from_bars_sorts_into_typed_arrays(history):
+    """Test that bars are stored oldest first as datetime64 and float64 arrays."""
+    assert history.dates.dtype == np.dtype('datetime64[D]')
+    assert history.close.dtype == np.float64
+    assert history.close.tolist() == [145.0, 150.0, 148.0, 152.0]
+    assert history.latest_date == '2024-01-05'
+    assert history.latest_close == 152.0
+    assert history.nbytes == 4 * 16
+
+def test_between_and_tail(history):
+    """Test date-range and limit filters."""
+    assert history.between('2024-01-03', '2024-01-04').close.tolist() == [150.0, 148.0]
+    assert history.between(start='2024-01-05').close.tolist() == [152.0]
+    assert history.tail(2).close.tolist() == [148.0, 152.0]
+    assert len(history.between(end='2023-12-31')) == 0
+
+def test_close_asof_forward_fills(history):
+    """Test that prices are carried forward over non-trading days and NaN before the first bar."""
+    dates = np.array(['2024-01-01', '2024-01-03', '2024-01-06'], dtype='datetime64[D]')
+    prices = history.close_asof(dates)
+    assert np.isnan(prices[0])
+    assert prices[1:].tolist() == [150.0, 152.0]
+
+def test_returns(history):
+    """Test vectorized daily returns."""
+    assert history.returns() == pytest.approx([150 / 145 - 1, 148 / 150 - 1, 152 / 148 - 1])
+
+def test_to_records_newest_first(history):
+    """Test that the JSON representation keeps the original {'date', 'price'} layout, newest first."""
+    assert history.to_records()[:2] == [{'date': '2024-01-05', 'price': 152.0}, {'date': '2024-01-04', 'price': 148.0}]
+    assert PriceHistory.empty('IBM').to_records() == []
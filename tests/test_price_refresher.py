@@ -0,0 +1,48 @@
+import pytest
+
+from stock_collection.utils import price_refresher as price_refresher_module
+from stock_collection.utils.price_refresher import PriceRefresher
+from stock_collection.utils.rate_limiter import RequestScheduler
+
+
+@pytest.fixture
+def scheduler():
+    return RequestScheduler(per_minute=60, per_day=10, max_wait=0)
+
+
+##################################################
+# Background Refresh Test Cases
+##################################################
+
+def test_refresh_once_updates_prices(scheduler, mocker):
+    """Test that a cycle refreshes every symbol and reports each new price."""
+    prices = {'IBM': 110.0, 'AAPL': None}
+    mocker.patch.object(price_refresher_module.market_data, 'refresh_current_price',
+                        side_effect=lambda symbol, priority: prices[symbol])
+    stored = {}
+    refresher = PriceRefresher(symbols=lambda: ['IBM', 'AAPL'], on_price=stored.__setitem__, scheduler=scheduler)
+
+    assert refresher.refresh_once() == {'IBM': 110.0}
+    assert stored == {'IBM': 110.0}
+
+def test_refresh_once_preserves_daily_budget(scheduler, mocker):
+    """Test that a cycle stops once the daily budget reaches the reserve."""
+    mock_refresh = mocker.patch.object(price_refresher_module.market_data, 'refresh_current_price', return_value=1.0)
+    mocker.patch.object(scheduler, 'remaining_daily', side_effect=[6, 5])
+    refresher = PriceRefresher(symbols=lambda: ['AAPL', 'IBM', 'MSFT'], min_daily_budget=5, scheduler=scheduler)
+
+    assert refresher.refresh_once() == {'AAPL': 1.0}
+    assert mock_refresh.call_count == 1
+
+def test_start_and_stop(scheduler):
+    """Test that the worker thread starts and shuts down cleanly."""
+    refresher = PriceRefresher(symbols=lambda: [], interval=60, scheduler=scheduler)
+    refresher.start()
+    assert refresher.running
+    refresher.stop(timeout=1)
+    assert not refresher.running
+
+def test_next_delay_within_jitter(scheduler):
+    """Test that cycle delays stay within the configured jitter."""
+    refresher = PriceRefresher(symbols=lambda: [], interval=100, jitter=0.2, scheduler=scheduler)
+    assert all(80 <= refresher.next_delay() <= 120 for _ in range(100))
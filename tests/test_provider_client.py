@@ -0,0 +1,165 @@
+import pytest
+import requests
+
+from stock_collection.utils.provider_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderClient,
+    ProviderError,
+    RateLimitedError,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_response(mocker, status_code=200, body=None, headers=None):
+    response = mocker.Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = body if body is not None else {}
+    response.raise_for_status.return_value = None
+    return response
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def client(sleeps):
+    return ProviderClient(max_retries=2, backoff_factor=0.5, sleep=sleeps.append,
+                          breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30))
+
+
+##################################################
+# Retry and Backoff Test Cases
+##################################################
+
+def test_get_json_uses_pooled_session_with_timeouts(client, mocker):
+    """Test that requests go through the shared session with connect/read timeouts."""
+    mock_get = mocker.patch.object(client.session, 'get', return_value=make_response(mocker, body={'ok': 1}))
+    assert client.get_json({'function': 'OVERVIEW'}) == {'ok': 1}
+    assert mock_get.call_args.kwargs['timeout'] == (client.connect_timeout, client.read_timeout)
+
+def test_get_json_retries_5xx_with_backoff(client, sleeps, mocker):
+    """Test that server errors are retried with exponential backoff."""
+    mocker.patch.object(client.session, 'get', side_effect=[
+        make_response(mocker, status_code=503),
+        make_response(mocker, status_code=502),
+        make_response(mocker, body={'ok': 1}),
+    ])
+    assert client.get_json({}) == {'ok': 1}
+    assert sleeps == [0.5, 1.0]
+
+def test_get_json_throttled_body_raises_after_retries(client, sleeps, mocker):
+    """Test that Alpha Vantage throttling notices are retried, then surfaced as RateLimitedError."""
+    throttled = {'Note': 'Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute.'}
+    mocker.patch.object(client.session, 'get', return_value=make_response(mocker, body=throttled))
+    with pytest.raises(RateLimitedError):
+        client.get_json({})
+    assert len(sleeps) == 2
+
+def test_get_json_timeout_raises_provider_error(client, mocker):
+    """Test that a hung upstream surfaces as a ProviderError instead of blocking."""
+    mocker.patch.object(client.session, 'get', side_effect=requests.exceptions.ReadTimeout("timed out"))
+    with pytest.raises(ProviderError):
+        client.get_json({})
+
+##################################################
+# Circuit Breaker Test Cases
+##################################################
+
+def test_circuit_opens_and_fails_fast(client, mocker):
+    """Test that the breaker opens after repeated failures and stops calling the provider."""
+    mock_get = mocker.patch.object(client.session, 'get', side_effect=requests.exceptions.ConnectionError("down"))
+    for _ in range(2):
+        with pytest.raises(ProviderError):
+            client.get_json({})
+    calls = mock_get.call_count
+
+    with pytest.raises(CircuitOpenError):
+        client.get_json({})
+    assert mock_get.call_count == calls
+
+def test_circuit_half_open_trial():
+    """Test that a successful trial call after the reset timeout closes the breaker."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow_request() is False
+
+    clock.now = 10
+    assert breaker.allow_request() is True
+    assert breaker.allow_request() is False  # Only one trial call at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_circuit_replaces_lost_trial_after_timeout():
+    """Test that a trial call that never reports back does not hold the breaker half-open forever."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, trial_timeout=5, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.allow_request() is True
+    clock.now = 14
+    assert breaker.allow_request() is False
+    clock.now = 15
+    assert breaker.allow_request() is True
+
+def test_trial_failing_outside_provider_errors_reopens_circuit(client, mocker):
+    """Test that a trial call whose handler raises a non-provider error still reports a failure."""
+    clock = FakeClock()
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    client.breaker.record_failure()
+    clock.now = 10
+    mocker.patch.object(client.session, 'get', return_value=make_response(mocker, body={'ok': 1}))
+
+    def consume(chunks):
+        raise KeyError('4. close')
+
+    with pytest.raises(KeyError):
+        client.stream({}, consume)
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20
+    assert client.get_json({}) == {'ok': 1}
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+def test_interrupted_trial_is_released_without_a_failure(client, mocker):
+    """Test that an interrupted call neither counts as a failure nor keeps the half-open trial slot."""
+    clock = FakeClock()
+    client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    mocker.patch.object(client.session, 'get', side_effect=KeyboardInterrupt)
+    with pytest.raises(KeyboardInterrupt):
+        client.get_json({})
+    assert client.breaker._failures == 0
+
+    client.breaker.record_failure()
+    client.breaker.record_failure()
+    clock.now = 10
+    with pytest.raises(KeyboardInterrupt):
+        client.get_json({})
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.breaker.allow_request()
+
+##################################################
+# Streaming Test Cases
+##################################################
+
+def test_stream_hands_chunks_to_consumer(client, mocker):
+    """Test that stream() requests a streamed response and passes its chunks on."""
+    response = make_response(mocker)
+    response.iter_content.return_value = iter([b'{"a"', b': 1}'])
+    mock_get = mocker.patch.object(client.session, 'get', return_value=response)
+
+    assert client.stream({}, lambda chunks: b''.join(chunks)) == b'{"a": 1}'
+    assert mock_get.call_args.kwargs['stream'] is True
+    response.close.assert_called_once()
@@ -0,0 +1,116 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from stock_collection.db import db
+from stock_collection.models.holding_model import Holding
+from stock_collection.models.listing_model import Listing
+from stock_collection.models.user_model import Users
+
+
+@contextmanager
+def captured_statements():
+    """Records the SQL and parameters of every statement executed inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def query_plans(statements):
+    """Returns the EXPLAIN QUERY PLAN details of each statement, one string per statement."""
+    connection = db.session.connection()
+    return [' | '.join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params))
+            for sql, params in statements]
+
+
+def assert_index_seeks(plans):
+    assert plans
+    for plan in plans:
+        assert 'SCAN' not in plan, plan
+        assert 'SEARCH' in plan, plan
+
+
+@pytest.fixture
+def users(app):
+    """Fixture to provide a few users, so the planner has rows to choose plans for."""
+    for number in range(20):
+        Users.create_user(f"user{number}", 'password123')
+    return app
+
+
+##################################################
+# User Lookup Query Plan Test Cases
+##################################################
+
+def test_login_seeks_the_username_index(users):
+    """Test that checking a password looks the user up through the username index."""
+    with captured_statements() as statements:
+        assert Users.check_password('user7', 'password123')
+    plans = query_plans(statements)
+    assert_index_seeks(plans)
+    assert 'USING INDEX ix_users_username (username=?)' in plans[0]
+
+def test_get_id_by_username_is_index_only(users):
+    """Test that the username index alone answers ID lookups."""
+    with captured_statements() as statements:
+        Users.get_id_by_username('user7')
+    assert query_plans(statements) == ['SEARCH users USING COVERING INDEX ix_users_username (username=?)']
+
+def test_update_and_delete_seek_by_username(users):
+    """Test that password updates and account deletion never scan the users or holdings tables."""
+    with captured_statements() as statements:
+        Users.update_password('user3', 'new password')
+        Users.delete_user('user4')
+    assert_index_seeks(query_plans(statements))
+
+def test_username_stays_unique(users):
+    """Test that the username index still rejects duplicate usernames."""
+    with pytest.raises(ValueError, match="already exists"):
+        Users.create_user('user1', 'password123')
+
+##################################################
+# Trade and Listing Query Plan Test Cases
+##################################################
+
+def test_trades_seek_by_user_and_symbol(app):
+    """Test that buys and sells touch holdings only through their primary key."""
+    Holding.buy(1, 'AAPL', 'Apple', 10, 150.0)
+    with captured_statements() as statements:
+        Holding.buy(1, 'AAPL', 'Apple', 5, 155.0)
+        Holding.sell(1, 'AAPL', 3)
+        Holding.get_holdings(1)
+    assert_index_seeks(query_plans(statements))
+
+def test_stock_lookup_seeks_the_symbol_key(app):
+    """Test that a stock is looked up by its symbol primary key."""
+    db.session.add(Listing(symbol='AAPL', name='Apple Inc.'))
+    db.session.commit()
+    db.session.expire_all()
+    with captured_statements() as statements:
+        assert db.session.get(Listing, 'AAPL').name == 'Apple Inc.'
+    assert_index_seeks(query_plans(statements))
+
+def test_stale_symbols_use_the_last_updated_index(app):
+    """Test that staleness queries return never-priced then oldest symbols through the last_updated index."""
+    db.session.add_all([Listing(symbol='AAPL', name='Apple Inc.'), Listing(symbol='MSFT', name='Microsoft'),
+                        Listing(symbol='IBM', name='IBM')])
+    db.session.commit()
+    Listing.update_prices({'AAPL': 190.0}, at=datetime(2024, 1, 2))
+    Listing.update_prices({'MSFT': 410.0})
+
+    with captured_statements() as statements:
+        assert Listing.stale_symbols(max_age=3600) == ['IBM', 'AAPL']
+    plan = query_plans(statements)[0]
+    assert_index_seeks([plan])
+    assert 'COVERING INDEX ix_stocks_last_updated (last_updated<?)' in plan
+    assert db.session.get(Listing, 'MSFT').price == 410.0
@@ -0,0 +1,86 @@
+import pytest
+
+from stock_collection.utils import market_data
+from stock_collection.utils.quote_cache import QuoteCache, quote_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    return QuoteCache(max_size=2, ttls={'TIME_SERIES_INTRADAY': 10}, clock=clock)
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_cache():
+    quote_cache.clear()
+    yield
+    quote_cache.clear()
+
+
+##################################################
+# TTL and LRU Test Cases
+##################################################
+
+def test_get_or_load_caches_value(cache):
+    """Test that a second lookup is answered from the cache."""
+    calls = []
+    loader = lambda: calls.append(1) or 150.0
+    assert cache.get_or_load('TIME_SERIES_INTRADAY', 'IBM', loader) == 150.0
+    assert cache.get_or_load('TIME_SERIES_INTRADAY', 'IBM', loader) == 150.0
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_entry_expires_after_ttl(cache, clock):
+    """Test that an entry is reloaded once its TTL has passed, but remains available as stale."""
+    cache.set('TIME_SERIES_INTRADAY', 'IBM', 150.0)
+    clock.now = 11
+    assert cache.get('TIME_SERIES_INTRADAY', 'IBM') is None
+    assert cache.get_stale('TIME_SERIES_INTRADAY', 'IBM') == 150.0
+
+def test_failed_load_is_not_cached(cache):
+    """Test that a loader returning None is retried on the next call."""
+    assert cache.get_or_load('OVERVIEW', 'IBM', lambda: None) is None
+    assert cache.get_or_load('OVERVIEW', 'IBM', lambda: {'description': 'A tech company.'}) == {'description': 'A tech company.'}
+
+def test_lru_eviction(cache):
+    """Test that the least recently used entry is evicted when the cache is full."""
+    cache.set('TIME_SERIES_INTRADAY', 'IBM', 1.0)
+    cache.set('TIME_SERIES_INTRADAY', 'AAPL', 2.0)
+    cache.get('TIME_SERIES_INTRADAY', 'IBM')
+    cache.set('TIME_SERIES_INTRADAY', 'MSFT', 3.0)
+    assert cache.get_stale('TIME_SERIES_INTRADAY', 'AAPL') is None
+    assert cache.get_stale('TIME_SERIES_INTRADAY', 'IBM') == 1.0
+    assert cache.stats()['evictions'] == 1
+
+##################################################
+# Market Data Fetcher Test Cases
+##################################################
+
+def test_get_current_price_uses_cache(mocker):
+    """Test that repeat price lookups of the same symbol only query the API once."""
+    mock_query = mocker.patch.object(market_data, '_query', return_value={
+        'Time Series (5min)': {'2024-01-02 16:00:00': {'4. close': '155.0'}}
+    })
+    assert market_data.get_current_price('IBM') == 155.0
+    assert market_data.get_current_price('IBM') == 155.0
+    assert mock_query.call_count == 1
+
+def test_get_current_price_api_error_not_cached(mocker):
+    """Test that an API error returns 0.0 and is not cached."""
+    mock_query = mocker.patch.object(market_data, '_query', return_value={'Note': 'Rate limited'})
+    assert market_data.get_current_price('IBM') == 0.0
+    assert market_data.get_current_price('IBM') == 0.0
+    assert mock_query.call_count == 2
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from stock_collection.utils import market_data
+from stock_collection.utils.provider_client import DailyLimitError, ProviderClient, RateLimitedError
+from stock_collection.utils.quote_cache import quote_cache
+from stock_collection.utils.rate_limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    QuotaExhaustedError,
+    RequestScheduler,
+    TokenBucket,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+##################################################
+# Token Bucket Test Cases
+##################################################
+
+def test_token_bucket_refills():
+    """Test that tokens are spent and refilled over time up to capacity."""
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=2, refill_rate=1, clock=clock)
+    assert bucket.try_take() and bucket.try_take()
+    assert bucket.try_take() is False
+    assert bucket.time_until_available() == pytest.approx(1.0)
+    clock.now = 10
+    assert bucket.tokens == 2
+
+##################################################
+# Scheduler Test Cases
+##################################################
+
+def test_scheduler_rejects_when_budget_spent():
+    """Test that calls beyond the budget fail fast with QuotaExhaustedError."""
+    scheduler = RequestScheduler(per_minute=5, per_day=2, max_wait=0, clock=FakeClock())
+    assert scheduler.run('a', lambda: 1) == 1
+    assert scheduler.run('b', lambda: 2) == 2
+    with pytest.raises(QuotaExhaustedError):
+        scheduler.run('c', lambda: 3)
+    metrics = scheduler.metrics()
+    assert metrics['day_remaining'] == 0
+    assert metrics['dispatched'] == 2
+    assert metrics['rejected'] == 1
+
+def test_scheduler_coalesces_and_prioritizes():
+    """Test that queued duplicates share one call and interactive calls go before background ones."""
+    scheduler = RequestScheduler(per_minute=60, per_day=100, max_wait=5)
+    scheduler._minute_bucket._tokens = 0  # Next token arrives in one second
+    order, results = [], []
+
+    def call(key, priority):
+        results.append(scheduler.run(key, lambda: order.append(key) or key, priority))
+
+    threads = [threading.Thread(target=call, args=('background', PRIORITY_BACKGROUND))]
+    threads[0].start()
+    time.sleep(0.05)
+    for _ in range(3):
+        threads.append(threading.Thread(target=call, args=('interactive', PRIORITY_INTERACTIVE)))
+        threads[-1].start()
+    for thread in threads:
+        thread.join()
+
+    assert order == ['interactive', 'background']
+    assert sorted(results) == ['background', 'interactive', 'interactive', 'interactive']
+    assert scheduler.metrics()['coalesced'] == 2
+
+def test_try_acquire_yields_to_queued_calls():
+    """Test that a non-blocking acquire takes a free token but never jumps queued calls."""
+    assert RequestScheduler(per_minute=2, per_day=100).try_acquire() == 0.0
+
+    scheduler = RequestScheduler(per_minute=60, per_day=100, max_wait=5)
+    scheduler._minute_bucket._tokens = 0  # Next token arrives in one second
+    queued = threading.Thread(target=scheduler.run, args=('queued', lambda: None))
+    queued.start()
+    time.sleep(0.05)
+    assert scheduler.try_acquire(PRIORITY_BACKGROUND) > 0
+    queued.join()
+    assert scheduler.metrics()['dispatched'] == 1
+
+def test_acquire_async_rejects_when_budget_spent():
+    """Test that an async caller fails fast once the budget is spent."""
+    scheduler = RequestScheduler(per_minute=5, per_day=1, max_wait=0, clock=FakeClock())
+    asyncio.run(scheduler.acquire_async())
+    with pytest.raises(QuotaExhaustedError):
+        asyncio.run(scheduler.acquire_async())
+    assert scheduler.metrics()['dispatched'] == 1
+    assert scheduler.metrics()['rejected'] == 1
+
+def test_provider_retries_are_counted_against_the_budget(mocker):
+    """Test that each retry of a throttled call takes a token, and retrying stops when none is left."""
+    scheduler = RequestScheduler(per_minute=2, per_day=25, max_wait=0, clock=FakeClock())
+    client = ProviderClient(max_retries=5, sleep=lambda delay: None)
+    response = mocker.Mock(status_code=429, headers={})
+    mock_get = mocker.patch.object(client.session, 'get', return_value=response)
+    mocker.patch.object(market_data, 'request_scheduler', scheduler)
+    mocker.patch.object(market_data, 'provider_client', client)
+
+    with pytest.raises(RateLimitedError):
+        market_data._query({'function': 'OVERVIEW', 'symbol': 'IBM'})
+    assert mock_get.call_count == 2
+    assert scheduler.metrics()['minute_remaining'] == 0
+
+def test_daily_limit_notice_empties_the_daily_budget(mocker):
+    """Test that the provider's daily-limit notice is not retried and no further calls are scheduled."""
+    scheduler = RequestScheduler(per_minute=5, per_day=25, max_wait=0, clock=FakeClock())
+    client = ProviderClient(max_retries=2, sleep=lambda delay: None)
+    response = mocker.Mock(status_code=200, headers={})
+    response.json.return_value = {'Information': 'Our standard API rate limit is 25 requests per day.'}
+    mock_get = mocker.patch.object(client.session, 'get', return_value=response)
+    mocker.patch.object(market_data, 'request_scheduler', scheduler)
+    mocker.patch.object(market_data, 'provider_client', client)
+
+    with pytest.raises(DailyLimitError):
+        market_data._query({'function': 'OVERVIEW', 'symbol': 'IBM'})
+    assert mock_get.call_count == 1
+    with pytest.raises(QuotaExhaustedError):
+        market_data._query({'function': 'OVERVIEW', 'symbol': 'MSFT'})
+
+def test_daily_spend_is_recorded_and_seeds_the_budget():
+    """Test that every daily token taken, and the rest once the quota is reported spent, is passed to
+    the spend recorder, and that a budget configured with the day's spend starts with what is left."""
+    spent = []
+    scheduler = RequestScheduler(per_minute=5, per_day=10, max_wait=0, clock=FakeClock())
+    scheduler.record_spend(spent.append)
+    scheduler.run('a', lambda: 1)
+    assert scheduler.acquire_retry()
+    scheduler.exhaust_daily()
+    assert spent == [1, 1, 8]
+
+    scheduler.configure(per_day=10, spent_today=sum(spent) - 4)
+    assert scheduler.remaining_daily() == 4
+    scheduler.configure(per_day=10, spent_today=12)
+    assert scheduler.remaining_daily() == 0
+
+##################################################
+# Graceful Degradation Test Cases
+##################################################
+
+def test_get_current_price_serves_stale_when_throttled(mocker):
+    """Test that a throttled lookup returns the last known price instead of 0.0."""
+    quote_cache.clear()
+    quote_cache.set('TIME_SERIES_INTRADAY', 'IBM', 150.0, ttl=0)
+    mocker.patch.object(market_data, '_query', side_effect=QuotaExhaustedError("budget exhausted"))
+    assert market_data.get_current_price('IBM') == 150.0
+    quote_cache.clear()
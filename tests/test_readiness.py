@@ -0,0 +1,88 @@
+import pytest
+
+from stock_collection.utils.provider_client import provider_client
+from stock_collection.utils.rate_limiter import request_scheduler
+from stock_collection.utils.readiness import DEGRADED, FAILING, OK, ReadinessCheck
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+##################################################
+# Readiness Check Test Cases
+##################################################
+
+def test_report_is_memoized_for_ttl(clock):
+    """Test that checks run at most once per TTL, however often the report is requested."""
+    calls = []
+
+    def check():
+        calls.append(clock.now)
+        return {'status': OK}
+
+    readiness = ReadinessCheck({'database': check}, ttl=5, clock=clock)
+    for now in (0.0, 1.0, 4.9):
+        clock.now = now
+        assert readiness.run() == (True, {'status': 'ready', 'checks': {'database': {'status': OK}},
+                                          'age': now})
+    clock.now = 5.0
+    readiness.run()
+    assert calls == [0.0, 5.0]
+
+def test_degraded_checks_keep_the_service_ready(clock):
+    """Test that a degraded dependency is reported without failing the probe."""
+    readiness = ReadinessCheck({'database': lambda: {'status': OK},
+                                'provider': lambda: {'status': DEGRADED, 'circuit': 'open'}}, clock=clock)
+    ready, report = readiness.run()
+    assert ready
+    assert report['status'] == 'degraded'
+
+def test_raising_check_makes_the_service_unavailable(clock):
+    """Test that a check that raises is reported as failing with its error."""
+    def check():
+        raise RuntimeError("database is locked")
+
+    ready, report = ReadinessCheck({'database': check}, clock=clock).run()
+    assert not ready
+    assert report['status'] == 'unavailable'
+    assert report['checks']['database'] == {'status': FAILING, 'error': 'database is locked'}
+
+##################################################
+# Readiness Route Test Cases
+##################################################
+
+def test_ready_route_reports_dependencies(client):
+    """Test that the readiness route reports the database, breaker, quota and caches."""
+    response = client.get('/api/ready')
+    assert response.status_code == 200
+    checks = response.json['checks']
+    assert response.json['status'] == 'ready'
+    assert checks['database']['latency_ms'] >= 0
+    assert checks['provider'] == {'status': OK, 'circuit': 'closed'}
+    assert checks['quota']['day_remaining'] == request_scheduler.metrics()['day_remaining']
+    assert 'quote_cache_fill' in checks['caches']
+
+def test_ready_route_reports_open_circuit(client, mocker):
+    """Test that an open circuit breaker degrades the service without failing the probe."""
+    mocker.patch.object(type(provider_client.breaker), 'state', new_callable=mocker.PropertyMock,
+                        return_value='open')
+    response = client.get('/api/ready')
+    assert response.status_code == 200
+    assert response.json['status'] == 'degraded'
+
+def test_ready_route_fails_without_database(app, client, mocker):
+    """Test that the probe fails with 503 when the database cannot be reached."""
+    mocker.patch('app.db.engine.connect', side_effect=RuntimeError("unable to open database file"))
+    response = client.get('/api/ready')
+    assert response.status_code == 503
+    assert response.json['checks']['database']['status'] == FAILING
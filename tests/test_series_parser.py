@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+
+from stock_collection.utils.provider_client import ProviderError, RateLimitedError
+from stock_collection.utils.series_parser import iter_daily_bars, read_daily_bars
+
+
+BODY = json.dumps({
+    'Meta Data': {'1. Information': 'Daily Prices', '2. Symbol': 'IBM'},
+    'Time Series (Daily)': {
+        '2024-01-04': {'1. open': '150.0', '4. close': '151.5', '5. volume': '100'},
+        '2024-01-03': {'1. open': '149.0', '4. close': '150.25', '5. volume': '100'},
+        '2024-01-02': {'1. open': '148.0', '4. close': '149.0', '5. volume': '100'},
+    },
+}, indent=4).encode()
+
+
+def chunked(data, size):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+##################################################
+# Streaming Parser Test Cases
+##################################################
+
+@pytest.mark.parametrize('size', [1, 3, 64, len(BODY)])
+def test_parses_bars_across_any_chunk_boundary(size):
+    """Test that bars are parsed as floats whatever the chunk boundaries are."""
+    assert list(iter_daily_bars(chunked(BODY, size))) == [
+        {'date': '2024-01-04', 'price': 151.5},
+        {'date': '2024-01-03', 'price': 150.25},
+        {'date': '2024-01-02', 'price': 149.0},
+    ]
+
+def test_date_range_filter():
+    """Test that only bars within the date range are yielded."""
+    bars = list(iter_daily_bars(chunked(BODY, 16), start='2024-01-03', end='2024-01-03'))
+    assert bars == [{'date': '2024-01-03', 'price': 150.25}]
+
+def test_stops_reading_early():
+    """Test that parsing stops as soon as the limit is reached, without consuming the rest of the body."""
+    chunks = chunked(BODY, 16)
+    assert [bar['date'] for bar in iter_daily_bars(chunks, limit=1)] == ['2024-01-04']
+    assert next(chunks, None) is not None
+
+def test_async_reader_stops_reading_early():
+    """Test that the async reader parses chunks as they arrive and stops reading at the start date."""
+    read = []
+
+    async def stream():
+        for chunk in chunked(BODY, 16):
+            read.append(chunk)
+            yield chunk
+
+    bars = asyncio.run(read_daily_bars(stream(), start='2024-01-04'))
+    assert bars == [{'date': '2024-01-04', 'price': 151.5}]
+    assert len(read) < len(list(chunked(BODY, 16)))
+
+def test_throttling_notice_raises_rate_limited():
+    """Test that a throttling notice instead of a series raises RateLimitedError."""
+    body = json.dumps({'Note': 'Our standard API call frequency is 5 calls per minute.'}).encode()
+    with pytest.raises(RateLimitedError):
+        list(iter_daily_bars([body]))
+
+def test_truncated_body_raises():
+    """Test that a body cut off mid-series raises ProviderError."""
+    with pytest.raises(ProviderError):
+        list(iter_daily_bars([BODY[:len(BODY) // 2]]))
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+import pytest
+
+from stock_collection.utils import market_data
+from stock_collection.utils.quote_cache import quote_cache
+from stock_collection.utils.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def run_concurrently(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+##################################################
+# Single-Flight Test Cases
+##################################################
+
+def test_concurrent_callers_share_one_call():
+    """Test that concurrent callers for the same key share a single call and its result."""
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(1)
+        return 150.0
+
+    leader = threading.Thread(target=lambda: results.append(flight.do('IBM', slow)))
+    leader.start()
+    started.wait(1)
+    followers = [threading.Thread(target=lambda: results.append(flight.do('IBM', slow))) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    while flight.shared < 4:
+        pass
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [150.0] * 5
+    assert flight.in_flight() == 0
+
+def test_error_is_shared_and_not_remembered():
+    """Test that an error reaches the caller and the next call runs again."""
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do('IBM', lambda: (_ for _ in ()).throw(ValueError("API request failed")))
+    assert flight.do('IBM', lambda: 155.0) == 155.0
+
+def test_async_callers_share_one_call():
+    """Test that concurrent coroutines for the same key share one call, and errors are not remembered."""
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 150.0
+
+    async def burst():
+        return await asyncio.gather(*(flight.do('IBM', slow) for _ in range(5)))
+
+    assert asyncio.run(burst()) == [150.0] * 5
+    assert len(calls) == 1 and flight.shared == 4 and flight.in_flight() == 0
+
+    async def fail():
+        raise ValueError("API request failed")
+
+    with pytest.raises(ValueError):
+        asyncio.run(flight.do('IBM', fail))
+    assert asyncio.run(flight.do('IBM', slow)) == 150.0
+
+def test_get_current_price_deduplicates_concurrent_misses(mocker):
+    """Test that a burst of lookups for a hot ticker makes one upstream request."""
+    quote_cache.clear()
+    release = threading.Event()
+
+    def slow_query(params, priority):
+        release.wait(0.2)
+        return {'Time Series (5min)': {'2024-01-02 16:00:00': {'4. close': '155.0'}}}
+
+    mock_query = mocker.patch.object(market_data, '_query', side_effect=slow_query)
+    results = []
+    run_concurrently(lambda: results.append(market_data.get_current_price('IBM')), 8)
+
+    assert results == [155.0] * 8
+    assert mock_query.call_count == 1
+    quote_cache.clear()
+
+def test_late_leader_rechecks_the_cache(mocker):
+    """Test that a caller whose miss raced a finished load reuses its result instead of fetching again."""
+    quote_cache.clear()
+    quote_cache.set('TIME_SERIES_INTRADAY', 'IBM', 155.0)
+    mocker.patch.object(quote_cache, 'get', return_value=None)  # The miss seen just before the store
+    mock_query = mocker.patch.object(market_data, '_query')
+
+    assert market_data.get_current_price('IBM') == 155.0
+    mock_query.assert_not_called()
+    quote_cache.clear()
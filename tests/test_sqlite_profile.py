@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+from app import create_app
+from config import ProductionConfig, TestConfig
+from stock_collection.db import db
+from stock_collection.utils.market_data_store import MarketDataStore
+from stock_collection.utils.sqlite_profile import apply_pragmas
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    """Fixture to provide an application on a SQLite file with the production profile."""
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': 2, 'max_overflow': 0}
+        SQLITE_PRAGMAS = ProductionConfig.SQLITE_PRAGMAS
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+##################################################
+# SQLite Profile Test Cases
+##################################################
+
+def test_apply_pragmas_reports_applied_values(tmp_path):
+    """Test that PRAGMAs are set on the connection and their resulting values returned."""
+    connection = sqlite3.connect(str(tmp_path / 'test.db'))
+    applied = apply_pragmas(connection, {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 2500})
+    assert applied == {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 2500}
+    connection.close()
+
+def test_every_pooled_connection_gets_the_profile(file_app):
+    """Test that each connection the engine opens is in WAL mode with the configured busy timeout."""
+    with db.engine.connect() as first, db.engine.connect() as second:
+        for connection in (first, second):
+            assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert connection.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+            assert connection.execute(text('PRAGMA synchronous')).scalar() == 1
+    assert db.engine.pool.size() == 2
+
+def test_market_data_store_keeps_pragmas_across_reconfigure(tmp_path):
+    """Test that the market data store opens its connection with the configured PRAGMAs."""
+    store = MarketDataStore(str(tmp_path / 'first.db'), pragmas={'journal_mode': 'WAL'})
+    store.configure(str(tmp_path / 'second.db'))
+    store.save_overview('IBM', {'name': 'IBM', 'description': 'Computers.', 'market_cap': '1'})
+    assert sqlite3.connect(str(tmp_path / 'second.db')).execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
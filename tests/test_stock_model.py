@@ -4,6 +4,8 @@ import sqlite3
 
 import pytest
 
+from config import TestConfig
+from stock_collection.models import stock_model
 from stock_collection.models.stock_model import Stock
    
 
@@ -126,4 +128,51 @@ def test_get_stock_history_api_error(stock_instance, mocker):
     mocker.patch.object(stock_instance, 'get_stock_history', side_effect=Exception("API request failed"))
     
     with pytest.raises(Exception, match="API request failed"):
-        stock_instance.get_stock_history()
\ No newline at end of file
+        stock_instance.get_stock_history()
+
+######################################################
+#
+#    Concurrent Look-up
+#
+######################################################
+
+def test_look_up_stock_fetches_concurrently(mocker):
+    """Test that look_up_stock issues its three fetches concurrently."""
+    import threading
+    barrier = threading.Barrier(3, timeout=1)
+    stock = Stock('IBM', 'IBM Common Stock', 0, 0.0)
+    mocker.patch.object(Stock, 'get_current_price', side_effect=lambda: (barrier.wait(), 150.0)[1])
+    mocker.patch.object(Stock, 'get_stock_description', side_effect=lambda: (barrier.wait(), 'A tech company.')[1])
+    mocker.patch.object(Stock, 'get_stock_history', side_effect=lambda: (barrier.wait(), mock_stock_history)[1])
+
+    stock_info = stock.look_up_stock(timeout=2)
+
+    assert stock_info['current_price'] == 150.0
+    assert stock_info['description'] == 'A tech company.'
+    assert stock_info['historical_prices'] == mock_stock_history
+    assert stock_info['unavailable'] == []
+
+
+def test_look_up_stock_partial_result_on_deadline(mocker):
+    """Test that a slow fetch is reported as unavailable instead of delaying the look-up."""
+    import threading
+    release = threading.Event()
+    stock = Stock('MSFT', 'Microsoft', 0, 0.0)
+    mocker.patch.object(Stock, 'get_current_price', return_value=150.0)
+    mocker.patch.object(Stock, 'get_stock_description', side_effect=lambda: release.wait(1) and 'Late.')
+    mocker.patch.object(Stock, 'get_stock_history', return_value=mock_stock_history)
+
+    stock_info = stock.look_up_stock(timeout=0.1)
+    release.set()
+
+    assert stock_info['current_price'] == 150.0
+    assert stock_info['description'] is None
+    assert stock_info['unavailable'] == ['description']
+
+
+def test_lookup_pool_is_sized_from_config(app):
+    """Test that create_app sizes the look-up pool from LOOKUP_MAX_WORKERS."""
+    assert stock_model.lookup_executor._max_workers == TestConfig.LOOKUP_MAX_WORKERS
+    stock_model.configure_lookup_pool(9)
+    assert stock_model.lookup_executor._max_workers == 9
+    stock_model.configure_lookup_pool(TestConfig.LOOKUP_MAX_WORKERS)
@@ -0,0 +1,95 @@
+import pytest
+
+from stock_collection.db import db
+from stock_collection.models.listing_model import Listing
+from stock_collection.utils.symbol_index import SymbolIndex, symbol_index
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def rows():
+    return [('AAPL', 'Apple Inc'), ('AA', 'Alcoa Corp'), ('AAL', 'American Airlines Group Inc'),
+            ('IBM', 'International Business Machines'), ('AMZN', 'Amazon.com Inc')]
+
+
+##################################################
+# Lookup and Search Test Cases
+##################################################
+
+def test_contains_is_case_insensitive(rows):
+    """Test that membership checks ignore case."""
+    index = SymbolIndex(loader=lambda: rows)
+    assert 'aapl' in index
+    assert 'MSFT' not in index
+    assert index.name_of('IBM') == 'International Business Machines'
+
+def test_search_symbol_prefix_then_name_prefix(rows):
+    """Test that symbol matches come first, followed by company name matches."""
+    index = SymbolIndex(loader=lambda: rows)
+    assert [match['symbol'] for match in index.search('aa')] == ['AA', 'AAL', 'AAPL']
+    assert [match['symbol'] for match in index.search('am')] == ['AMZN', 'AAL']
+    assert index.search('a', limit=2) == [{'symbol': 'AA', 'name': 'Alcoa Corp'},
+                                          {'symbol': 'AAL', 'name': 'American Airlines Group Inc'}]
+    assert index.search('') == []
+
+def test_search_full_ticker_list_is_fast():
+    """Test that a prefix search over a US-sized ticker list stays well under a millisecond."""
+    import itertools
+    import string
+    import time
+
+    tickers = [''.join(letters) for letters in itertools.product(string.ascii_uppercase, repeat=3)]
+    index = SymbolIndex(loader=lambda: [(ticker, f"{ticker} Corp") for ticker in tickers])
+    index.search('A')  # Build the snapshot
+
+    started = time.perf_counter()
+    for _ in range(100):
+        results = index.search('QX')
+    assert (time.perf_counter() - started) / 100 < 0.001
+    assert len(results) == 10
+
+##################################################
+# Reload Test Cases
+##################################################
+
+def test_index_reloads_after_ttl(rows):
+    """Test that the index is reloaded once it is older than its TTL."""
+    clock = FakeClock()
+    loaded = []
+    index = SymbolIndex(loader=lambda: loaded.append(1) or rows, ttl=60, clock=clock)
+    assert 'IBM' in index and 'AA' in index
+    assert len(loaded) == 1
+
+    clock.now = 60
+    assert len(index) == 5
+    assert len(loaded) == 2
+
+def test_stock_commit_invalidates_index(session):
+    """Test that committing a write to the stocks table invalidates the shared index."""
+    assert 'IBM' not in symbol_index
+    session.add(Listing(symbol='IBM', name='International Business Machines'))
+    session.commit()
+    assert 'IBM' in symbol_index
+
+    session.delete(db.session.get(Listing, 'IBM'))
+    session.commit()
+    assert 'IBM' not in symbol_index
+
+def test_buy_stock_rejects_unknown_symbol(client, session, auth_headers):
+    """Test that buys are validated against the symbol universe once it is loaded."""
+    session.add(Listing(symbol='IBM', name='International Business Machines'))
+    session.commit()
+    response = client.post('/api/buy-stock', headers=auth_headers(1, 'testuser'),
+                           json={'symbol': 'XYZ', 'name': 'XYZ', 'quantity': 1})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Stock symbol XYZ not found."
+
+    response = client.get('/api/search-symbols?q=ib')
+    assert response.get_json()['results'] == [{'symbol': 'IBM', 'name': 'International Business Machines'}]
@@ -1,6 +1,13 @@
+import hashlib
+import sqlite3
+
 import pytest
 
+from app import create_app
+from config import TestConfig
+from stock_collection.db import db
 from stock_collection.models.user_model import Users
+from stock_collection.utils.password_hasher import password_hasher
 
 
 @pytest.fixture
@@ -64,3 +71,46 @@ def test_update_password_user_not_found(session):
     """Test updating the password for a non-existent user."""
     with pytest.raises(ValueError, match="User nonexistentuser not found"):
         Users.update_password("nonexistentuser", "newpassword")
+
+##########################################################
+# Password Hash Migration
+##########################################################
+
+def test_check_password_rehashes_legacy_hash(session, sample_user):
+    """Test that a correct login migrates a legacy SHA-256 hash to the current scheme."""
+    salt = "00" * 16
+    legacy = hashlib.sha256((sample_user["password"] + salt).encode()).hexdigest()
+    session.add(Users(username=sample_user["username"], salt=salt, password=legacy, hash_scheme="sha256"))
+    session.commit()
+
+    assert Users.check_password(sample_user["username"], "wrongpassword") is False
+    assert session.query(Users).one().hash_scheme == "sha256", "Failed logins should not rehash."
+
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+    user = session.query(Users).one()
+    assert user.hash_scheme == password_hasher.current_scheme
+    assert user.password != legacy
+    assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+
+def test_startup_adds_hash_scheme_to_baseline_users_table(tmp_path, sample_user):
+    """Test that starting on a users table without hash_scheme adds the column and keeps legacy logins working."""
+    path = tmp_path / 'app.db'
+    salt = "00" * 16
+    legacy = hashlib.sha256((sample_user["password"] + salt).encode()).hexdigest()
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE users (id INTEGER NOT NULL PRIMARY KEY, username VARCHAR(80) NOT NULL UNIQUE, "
+                           "salt VARCHAR(32) NOT NULL, password VARCHAR(64) NOT NULL)")
+        connection.execute("INSERT INTO users (username, salt, password) VALUES (?, ?, ?)",
+                           (sample_user["username"], salt, legacy))
+    connection.close()
+
+    class BaselineConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+
+    app = create_app(BaselineConfig)
+    with app.app_context():
+        assert db.session.query(Users).one().hash_scheme == "sha256"
+        assert Users.check_password(sample_user["username"], sample_user["password"]) is True
+        Users.add_missing_columns()  # Later starts find the column and change nothing
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,155 @@
+from datetime import date
+import math
+
+import numpy as np
+import pytest
+
+from stock_collection.utils.market_data_store import MarketDataStore
+from stock_collection.utils.price_history import PriceHistory
+from stock_collection.utils.valuation import (
+    PortfolioValuation,
+    backtest_allocation,
+    portfolio_value_history,
+    previous_closes,
+    value_portfolios,
+)
+
+
+@pytest.fixture
+def valuation():
+    return PortfolioValuation(['IBM', 'AAPL'], [10, 5], [100.0, 200.0],
+                              cost_basis=[80.0, float('nan')], previous_close=[95.0, 210.0])
+
+
+##################################################
+# Single Portfolio Test Cases
+##################################################
+
+def test_market_value_and_weights(valuation):
+    """Test that market values and weights are computed for every holding."""
+    assert valuation.market_value.tolist() == [1000.0, 1000.0]
+    assert valuation.weights.tolist() == [0.5, 0.5]
+    assert valuation.total_value == 2000.0
+
+def test_daily_pnl_and_unrealized_gain(valuation):
+    """Test that P&L and gains are computed per holding and unknown cost is left out of the total."""
+    assert valuation.daily_pnl.tolist() == [50.0, -50.0]
+    assert valuation.total_daily_pnl == 0.0
+    assert valuation.unrealized_gain[0] == 200.0
+    assert math.isnan(valuation.unrealized_gain[1])
+    assert valuation.total_unrealized_gain == 200.0
+
+def test_to_dict_replaces_nan_with_none(valuation):
+    """Test that the JSON form reports unknown values as None."""
+    holdings = valuation.to_dict()['holdings']
+    assert holdings[1]['unrealized_gain'] is None
+    assert holdings[0]['quantity'] == 10
+
+def test_empty_portfolio():
+    """Test that an empty portfolio is worth nothing."""
+    valuation = PortfolioValuation([], [], [])
+    assert valuation.total_value == 0.0
+    assert valuation.to_dict()['holdings'] == []
+
+def test_previous_closes_reads_store(mocker):
+    """Test that previous closes come from the local store, before the valuation date."""
+    store = MarketDataStore()
+    store.append_daily_bars('IBM', [{'date': '2024-01-02', 'price': 100.0}, {'date': '2024-01-03', 'price': 101.0}])
+    mocker.patch('stock_collection.utils.valuation.market_data_store', store)
+
+    closes = previous_closes(['IBM', 'AAPL'], asof=date(2024, 1, 3))
+    assert closes[0] == 100.0
+    assert np.isnan(closes[1])
+
+##################################################
+# Bulk Valuation Test Cases
+##################################################
+
+def test_value_portfolios_sums_per_portfolio():
+    """Test that many portfolios are valued in one pass over all positions."""
+    positions = [(1, 'IBM', 10, 80.0), (1, 'AAPL', 1, 150.0), (2, 'IBM', 2, 100.0)]
+    values = value_portfolios(positions, {'IBM': 100.0, 'AAPL': 200.0}, {'IBM': 90.0})
+
+    assert values[1] == {'total_value': 1200.0, 'daily_pnl': 100.0, 'unrealized_gain': 250.0}
+    assert values[2] == {'total_value': 200.0, 'daily_pnl': 20.0, 'unrealized_gain': 0.0}
+
+def test_value_portfolios_unpriced_symbol():
+    """Test that positions without a price are valued at zero."""
+    values = value_portfolios([(1, 'IBM', 10, 80.0), (1, 'XYZ', 5, 10.0)], {'IBM': 100.0})
+    assert values[1]['total_value'] == 1000.0
+
+def test_value_portfolios_matches_single_valuation():
+    """Test that bulk totals agree with valuing each portfolio on its own."""
+    rng = np.random.default_rng(0)
+    symbols = [f"S{i}" for i in range(50)]
+    prices = {symbol: float(price) for symbol, price in zip(symbols, rng.uniform(1, 500, len(symbols)))}
+    positions = [(int(owner), symbols[int(i)], int(quantity), 1.0)
+                 for owner, i, quantity in zip(rng.integers(0, 200, 2000), rng.integers(0, 50, 2000),
+                                               rng.integers(1, 100, 2000))]
+
+    values = value_portfolios(positions, prices)
+    for owner in (0, 57, 199):
+        owned = [position for position in positions if position[0] == owner]
+        expected = PortfolioValuation([p[1] for p in owned], [p[2] for p in owned],
+                                      [prices[p[1]] for p in owned]).total_value
+        assert values[owner]['total_value'] == pytest.approx(expected)
+
+##################################################
+# Value History and Backtest Test Cases
+##################################################
+
+@pytest.fixture
+def histories():
+    return {
+        'IBM': PriceHistory.from_rows('IBM', [('2024-01-02', 100.0), ('2024-01-03', 110.0), ('2024-01-05', 121.0)]),
+        'AAPL': PriceHistory.from_rows('AAPL', [('2024-01-03', 50.0), ('2024-01-04', 40.0)]),
+    }
+
+def test_portfolio_value_history_aligns_dates(histories):
+    """Test that holdings are aligned on every trading date with closes carried forward."""
+    series = portfolio_value_history({'IBM': 2, 'AAPL': 10, 'XYZ': 1}, histories)
+    assert series.dates.astype(str).tolist() == ['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05']
+    assert series.values.tolist() == [200.0, 720.0, 620.0, 642.0]
+    assert series.missing == ['XYZ']
+
+def test_backtest_allocation_buy_and_hold(histories):
+    """Test that the backtest invests on the first date every symbol is priced and holds."""
+    series = backtest_allocation({'IBM': 1, 'AAPL': 1}, histories, initial_value=1000.0)
+    assert series.dates.astype(str).tolist() == ['2024-01-03', '2024-01-04', '2024-01-05']
+    assert series.values == pytest.approx([1000.0, 900.0, 950.0])
+
+    stats = series.stats()
+    assert stats['total_return'] == pytest.approx(-0.05)
+    assert stats['max_drawdown'] == pytest.approx(-0.1)
+
+def test_backtest_allocation_rejects_negative_weights(histories):
+    """Test error when an allocation has a negative weight."""
+    with pytest.raises(ValueError, match="Allocation weights must be non-negative"):
+        backtest_allocation({'IBM': 1, 'AAPL': -1}, histories)
+
+def test_backtest_endpoint_uses_local_data_only(client, auth_headers, mocker):
+    """Test that the backtest endpoint reads stored prices and never calls the provider."""
+    store = MarketDataStore()
+    store.append_daily_bars('IBM', [{'date': '2024-01-02', 'price': 100.0}, {'date': '2024-01-03', 'price': 110.0}])
+    mocker.patch('stock_collection.utils.market_data.market_data_store', store)
+    provider = mocker.patch('stock_collection.utils.market_data._stream_query')
+
+    headers = auth_headers(1, 'testuser')
+    response = client.post('/api/backtest', headers=headers, json={'allocation': {'IBM': 1}, 'initial_value': 1000})
+    assert response.status_code == 200
+    assert response.get_json()['values'][-1] == {'date': '2024-01-03', 'value': 1100.0}
+    provider.assert_not_called()
+
+    response = client.post('/api/backtest', headers=headers, json={'allocation': {'MSFT': 1}})
+    assert response.status_code == 400
+
+def test_backtest_endpoint_rejects_non_finite_values(client, auth_headers, mocker):
+    """Test that NaN, infinite and boolean weights or initial values are rejected with a 400."""
+    store = MarketDataStore()
+    store.append_daily_bars('IBM', [{'date': '2024-01-02', 'price': 100.0}, {'date': '2024-01-03', 'price': 110.0}])
+    mocker.patch('stock_collection.utils.market_data.market_data_store', store)
+    headers = {**auth_headers(1, 'testuser'), 'Content-Type': 'application/json'}
+    for body in ('{"allocation": {"IBM": NaN}}', '{"allocation": {"IBM": true}}',
+                 '{"allocation": {"IBM": 1}, "initial_value": Infinity}', '{"allocation": {"IBM": 1}, "initial_value": true}'):
+        response = client.post('/api/backtest', headers=headers, data=body)
+        assert response.status_code == 400
@@ -0,0 +1,6 @@
+from app import create_app
+
+
+# The production WSGI application: gunicorn --config gunicorn.conf.py wsgi:app
+# The price refresher is started after the fork, in one worker (see gunicorn.conf.py).
+app = create_app(start_background_tasks=False)